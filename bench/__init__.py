@@ -0,0 +1,14 @@
+"""Benchmarks for the vault scripts.
+
+    python3 -m bench.generate /tmp/vault --notes 10000
+    python3 -m bench.run --sizes 1000,10000,100000 --output bench.json
+
+Run from the repository root. The scripts import each other as top-level
+modules, so their directory is put on sys.path here.
+"""
+import os
+import sys
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+import os
+import json
+import math
+import random
+import argparse
+
+# Generator knobs and their defaults; a vault is fully determined by these
+DEFAULTS = {
+    "notes": 1000,
+    "seed": 0,
+    "mean_words": 300,        # mean note length; lengths are log-normal
+    "size_sigma": 1.0,        # spread of the log-normal length distribution
+    "links_per_note": 5.0,    # mean outgoing wikilinks per note
+    "broken_rate": 0.05,      # share of links pointing to no note
+    "cjk_ratio": 0.3,         # share of paragraphs written in CJK text
+    "attachments": 100,
+    "depth": 3,               # maximum folder nesting
+    "agents": 20,             # agent definitions under .antigravity/agents
+}
+
+# Marker file recording the parameters of a generated vault (hidden, so never scanned)
+MARKER = ".bench-vault.json"
+# Word present in ~1% of the notes, used as the search benchmark query
+NEEDLE = "benchneedle"
+
+ASCII_WORDS = ("knowledge graph note link vault concept pattern solution index "
+               "search memory model agent context system design review cache "
+               "thread process queue token stream parser anchor heading").split()
+CJK_CHARS = "知识图谱笔记链接概念模式解法索引搜索记忆模型上下文系统设计缓存线程进程队列解析标题"
+TAGS = ["project", "area/work", "area/life", "idea", "reference", "todo", "读书", "方法论"]
+
+
+def _folders(rnd, count, depth):
+    folders = [""]
+    for i in range(count):
+        parts = [f"area-{rnd.randrange(10)}"] + [f"topic-{rnd.randrange(20)}" for _ in range(rnd.randrange(depth))]
+        folders.append("/".join(parts[:depth]) if depth else "")
+    return sorted(set(folders))
+
+
+def _paragraph(rnd, words, cjk):
+    if cjk:
+        return "".join(rnd.choice(CJK_CHARS) for _ in range(words * 2))
+    return " ".join(rnd.choice(ASCII_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _note_body(rnd, params, names, attachments, title):
+    sigma = params["size_sigma"]
+    mu = math.log(max(params["mean_words"], 1)) - sigma * sigma / 2
+    words = max(1, int(rnd.lognormvariate(mu, sigma)))
+    links = int(rnd.expovariate(1 / params["links_per_note"])) if params["links_per_note"] else 0
+
+    lines = ["---", f"title: {title}", f"tags: [{', '.join(rnd.sample(TAGS, rnd.randrange(3)))}]", "---",
+             f"# {title}", ""]
+    while words > 0:
+        n = min(words, rnd.randint(20, 80))
+        words -= n
+        lines.append(_paragraph(rnd, n, rnd.random() < params["cjk_ratio"]))
+        lines.append("")
+    refs = []
+    for _ in range(links):
+        if rnd.random() < params["broken_rate"]:
+            refs.append(f"[[missing-{rnd.randrange(10 ** 6)}]]")
+        else:
+            target = rnd.choice(names)
+            refs.append(f"[[{target}|{target[:8]}]]" if rnd.random() < 0.2 else f"[[{target}]]")
+    if attachments and rnd.random() < 0.1:
+        refs.append(f"![[{rnd.choice(attachments)}]]")
+    if refs:
+        lines.append("Related: " + " ".join(refs))
+    if rnd.random() < 0.01:
+        lines.append(f"Marker {NEEDLE} here.")
+    lines.append(f"#{rnd.choice(TAGS)}")
+    return "\n".join(lines) + "\n"
+
+
+def generate_vault(root, **overrides):
+    """Create a synthetic vault under `root` and return its parameters.
+
+    The same parameters always produce the same vault; if `root` already
+    holds a vault generated with them it is reused as is.
+    """
+    params = dict(DEFAULTS, **overrides)
+    marker = os.path.join(root, MARKER)
+    if os.path.exists(marker):
+        with open(marker, 'r', encoding='utf-8') as f:
+            if json.load(f) == params:
+                return params
+        raise FileExistsError(f"{root} holds a vault generated with other parameters")
+    if os.path.exists(root) and os.listdir(root):
+        raise FileExistsError(f"{root} is not empty")
+
+    rnd = random.Random(params["seed"])
+    folders = _folders(rnd, max(1, params["notes"] // 50), params["depth"])
+    names = [f"笔记-{i:06d}" if rnd.random() < params["cjk_ratio"] else f"note-{i:06d}"
+             for i in range(params["notes"])]
+
+    attachments = [f"img-{i:05d}.png" for i in range(params["attachments"])]
+    if attachments:
+        os.makedirs(os.path.join(root, "附件"), exist_ok=True)
+    for name in attachments:
+        with open(os.path.join(root, "附件", name), 'wb') as f:
+            f.write(rnd.randbytes(rnd.randint(1, 64) * 1024))
+
+    for name in names:
+        folder = os.path.join(root, rnd.choice(folders))
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, name + ".md"), 'w', encoding='utf-8') as f:
+            f.write(_note_body(rnd, params, names, attachments, name))
+
+    agents_dir = os.path.join(root, ".antigravity", "agents")
+    if params["agents"]:
+        os.makedirs(agents_dir, exist_ok=True)
+    for i in range(params["agents"]):
+        with open(os.path.join(agents_dir, f"agent-{i:03d}.md"), 'w', encoding='utf-8') as f:
+            f.write(f"---\nname: agent-{i:03d}\ndescription: Synthetic agent {i}\n---\n\n"
+                    + _paragraph(rnd, 200, False) + "\n")
+
+    with open(marker, 'w', encoding='utf-8') as f:
+        json.dump(params, f, indent=2)
+    return params
+
+
+def add_generator_args(parser):
+    for key, default in DEFAULTS.items():
+        if key == "notes":
+            continue
+        parser.add_argument("--" + key.replace("_", "-"), type=type(default), default=default,
+                            help=f"(default: {default})")
+
+
+def generator_params(args):
+    return {key: getattr(args, key) for key in DEFAULTS if key != "notes"}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a reproducible synthetic Obsidian vault")
+    parser.add_argument("root", help="Directory to create the vault in (must be empty or absent)")
+    parser.add_argument("--notes", type=int, default=DEFAULTS["notes"], help="Number of notes")
+    add_generator_args(parser)
+    args = parser.parse_args()
+
+    params = generate_vault(args.root, notes=args.notes, **generator_params(args))
+    print(json.dumps(params, indent=2))
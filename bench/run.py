@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+import os
+import io
+import sys
+import json
+import time
+import hashlib
+import platform
+import argparse
+import tempfile
+import subprocess
+import contextlib
+
+from bench import SCRIPTS_DIR
+from bench.generate import MARKER, NEEDLE, add_generator_args, generate_vault, generator_params
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPO_ROOT = os.path.dirname(SCRIPTS_DIR)
+
+
+def op_audit_cold(vault):
+    from audit_vault import VaultAuditor
+    auditor = VaultAuditor(vault, use_index=False)
+    auditor.scan_vault(quiet=True)
+    auditor.verify_links()
+    auditor.identify_orphans()
+    return len(auditor.all_files)
+
+
+def op_audit_index_build(vault):
+    from audit_vault import VaultAuditor
+    auditor = VaultAuditor(vault, rebuild_index=True)
+    auditor.scan_vault(quiet=True)
+    auditor.verify_links()
+    auditor.identify_orphans()
+    return len(auditor.all_files)
+
+
+def op_audit_index_warm(vault):
+    from audit_vault import VaultAuditor
+    auditor = VaultAuditor(vault)
+    auditor.scan_vault(quiet=True)
+    auditor.verify_links()
+    auditor.identify_orphans()
+    return len(auditor.all_files)
+
+
+def op_search_files(vault):
+    from obsidian_fs import search_files
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        search_files(vault, NEEDLE)
+    with open(os.path.join(vault, MARKER), encoding="utf-8") as f:
+        return json.load(f)["notes"]
+
+
+def op_scan_dir(vault):
+    from list_agents import scan_dir
+    return len(scan_dir(os.path.join(vault, ".antigravity", "agents")))
+
+
+# Operations in run order; the warm audit relies on the index built just before it
+OPERATIONS = {
+    "audit_cold": op_audit_cold,
+    "audit_index_build": op_audit_index_build,
+    "audit_index_warm": op_audit_index_warm,
+    "search_files": op_search_files,
+    "scan_dir": op_scan_dir,
+}
+
+
+def io_counters():
+    """read()/write() call counts of this process from /proc/self/io (Linux only).
+
+    Only the syscr/syscw counters exist there; stat, open and getdents
+    calls are not included.
+    """
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(":", 1) for line in f)
+    except OSError:
+        return None
+    return {"read": int(fields["syscr"]), "write": int(fields["syscw"])}
+
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # macOS reports bytes
+
+
+def measure(operation, vault):
+    """Time one operation in this process; returns the measurement record."""
+    before = io_counters()
+    start = time.perf_counter()
+    files = OPERATIONS[operation](vault)
+    wall = time.perf_counter() - start
+    after = io_counters()
+    return {
+        "operation": operation,
+        "files": files,
+        "wall_s": round(wall, 4),
+        "files_per_sec": round(files / wall, 1) if wall else None,
+        "peak_rss_kb": peak_rss_kb(),
+        "io_calls": {k: after[k] - before[k] for k in after} if before and after else None,
+    }
+
+
+def run_isolated(operation, vault):
+    """Measure an operation in a fresh interpreter so peak RSS is its own."""
+    proc = subprocess.run([sys.executable, "-m", "bench.run", "--child", operation, vault],
+                          cwd=REPO_ROOT, capture_output=True, text=True,
+                          env=dict(os.environ, VAULTD_DISABLE="1"))
+    if proc.returncode != 0:
+        raise RuntimeError(f"{operation} failed on {vault}:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run_benchmarks(sizes, operations, workdir, params, quiet=False):
+    results = []
+    for notes in sizes:
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:8]
+        vault = os.path.join(workdir, f"vault-{notes}-{digest}")
+        if not quiet:
+            print(f"Preparing {vault}", file=sys.stderr)
+        generate_vault(vault, notes=notes, **params)
+        for operation in operations:
+            record = run_isolated(operation, vault)
+            record["notes"] = notes
+            results.append(record)
+            if not quiet:
+                print(f"  {operation:<18} {record['wall_s']:>9.3f}s {record['files_per_sec'] or 0:>10.0f} files/s",
+                      file=sys.stderr)
+    return {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params,
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the vault scripts on synthetic vaults")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated note counts (default: 1000,10000,100000)")
+    parser.add_argument("--ops", default=",".join(OPERATIONS), help=f"Comma-separated operations (default: all of {', '.join(OPERATIONS)})")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "vault-bench"), help="Where generated vaults are kept and reused")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--quiet", action="store_true", help="No progress output on stderr")
+    parser.add_argument("--child", nargs=2, metavar=("OPERATION", "VAULT"), help=argparse.SUPPRESS)
+    add_generator_args(parser)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(*args.child)))
+        sys.exit(0)
+
+    operations = args.ops.split(",")
+    unknown = [op for op in operations if op not in OPERATIONS]
+    if unknown:
+        print(f"Error: unknown operations: {', '.join(unknown)}")
+        sys.exit(1)
+    report = run_benchmarks([int(n) for n in args.sizes.split(",")], operations,
+                            args.workdir, generator_params(args), args.quiet)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
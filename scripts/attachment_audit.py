@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+import os
+import re
+import time
+import hashlib
+from collections import defaultdict
+from datetime import datetime
+
+try:
+    import xxhash
+except ImportError:  # optional: content hashes fall back to blake2b
+    xxhash = None
+
+import perf_trace
+from vault_index import VaultIndex
+
+# Where SKILL.md requires attachments to live, and how they must be named:
+# {slug}_{YYYYMMDD_HHMMSS}.{ext}
+ATTACHMENT_DIR = "附件"
+NAME_RE = re.compile(r'^[A-Za-z0-9]+(?:[-_][A-Za-z0-9]+)*_(?P<stamp>\d{8}_\d{6})\.[A-Za-z0-9]+$')
+# Files Obsidian opens as notes rather than attachments
+NOTE_EXTENSIONS = ('.md', '.canvas', '.base')
+
+# Same-size files are first told apart by a hash of their head, and only
+# hashed in full when the heads agree
+HEAD_BYTES = 64 * 1024
+CHUNK_BYTES = 1024 * 1024
+HASH_NAME = "xxh3_128" if xxhash is not None else "blake2b-128"
+
+
+def is_attachment(rel_path):
+    return not rel_path.lower().endswith(NOTE_EXTENSIONS)
+
+
+def in_attachment_dir(rel_path):
+    return rel_path.replace(os.sep, '/').startswith(ATTACHMENT_DIR + '/')
+
+
+def valid_name(rel_path):
+    """True if the file name follows {slug}_{YYYYMMDD_HHMMSS}.{ext} with a real timestamp."""
+    match = NAME_RE.match(os.path.basename(rel_path))
+    if not match:
+        return False
+    try:
+        datetime.strptime(match.group('stamp'), '%Y%m%d_%H%M%S')
+    except ValueError:
+        return False
+    return True
+
+
+def _new_hash():
+    return xxhash.xxh3_128() if xxhash is not None else hashlib.blake2b(digest_size=16)
+
+
+def hash_file(path, limit=None):
+    """Hex digest of a file's content (only its first `limit` bytes if given) and the bytes read."""
+    digest = _new_hash()
+    buffer = bytearray(min(CHUNK_BYTES, limit) if limit else CHUNK_BYTES)
+    view = memoryview(buffer)
+    total = 0
+    start = time.perf_counter()
+    with open(path, 'rb', buffering=0) as f:
+        while limit is None or total < limit:
+            n = f.readinto(view if limit is None else view[:min(len(buffer), limit - total)])
+            if not n:
+                break
+            digest.update(view[:n])
+            total += n
+    perf_trace.record_read(path, total, time.perf_counter() - start)
+    return digest.hexdigest(), total
+
+
+class HashCache:
+    """Content hashes of attachments, cached on disk by stat key (mtime, size, inode).
+
+    Each row holds the head hash and, once needed, the full hash; rows of
+    another hash algorithm are ignored and recomputed.
+    """
+
+    def __init__(self, vault_root, use_index=True):
+        self.vault_root = os.path.abspath(vault_root)
+        self.index = VaultIndex(self.vault_root, filename="attachment_hashes.sqlite") if use_index else None
+        self.hashed_bytes = 0
+        self.entries = {}  # rel_path -> {"head", "full"} for this run
+
+    def _entry(self, rel_path, st):
+        entry = self.entries.get(rel_path)
+        if entry is None:
+            cached = self.index.lookup(rel_path, st) if self.index else None
+            entry = cached if cached and cached.get("algo") == HASH_NAME else {"algo": HASH_NAME}
+            self.entries[rel_path] = entry
+        return entry
+
+    def _hash(self, rel_path, st, field, limit):
+        entry = self._entry(rel_path, st)
+        if entry.get(field) is None:
+            entry[field], read = hash_file(os.path.join(self.vault_root, rel_path), limit)
+            self.hashed_bytes += read
+            if self.index:
+                self.index.store(rel_path, st, entry)
+        return entry[field]
+
+    def head(self, rel_path, st):
+        return self._hash(rel_path, st, "head", HEAD_BYTES)
+
+    def full(self, rel_path, st):
+        if st.st_size <= HEAD_BYTES:
+            return self.head(rel_path, st)
+        return self._hash(rel_path, st, "full", None)
+
+    def save(self, present):
+        """Write new hashes and drop rows of files not in `present`."""
+        if not self.index:
+            return
+        for rel_path in self.index.paths():
+            if rel_path not in present:
+                self.index.forget(rel_path)
+        self.index.save(prune=False)
+
+    def close(self):
+        if self.index:
+            self.index.close()
+
+
+def find_duplicates(files, cache):
+    """Groups of byte-identical files among `files` ({rel_path: stat}), each sorted by path.
+
+    Files are bucketed by size, then by head hash, and only files still
+    colliding are hashed in full, so unique files are never read at all.
+    Empty files are not reported.
+    """
+    by_size = defaultdict(list)
+    for rel_path, st in files.items():
+        if st.st_size:
+            by_size[st.st_size].append(rel_path)
+    groups = []
+    for size, paths in by_size.items():
+        if len(paths) < 2:
+            continue
+        by_head = defaultdict(list)
+        for rel_path in paths:
+            by_head[cache.head(rel_path, files[rel_path])].append(rel_path)
+        for same_head in by_head.values():
+            if len(same_head) < 2:
+                continue
+            if size <= HEAD_BYTES:
+                groups.append(sorted(same_head))
+                continue
+            by_full = defaultdict(list)
+            for rel_path in same_head:
+                by_full[cache.full(rel_path, files[rel_path])].append(rel_path)
+            groups.extend(sorted(g) for g in by_full.values() if len(g) > 1)
+    groups.sort()
+    return groups
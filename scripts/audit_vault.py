@@ -1,172 +1,1078 @@
 #!/usr/bin/env python3
 import os
-import re
+import sys
+import json
+import stat
+import time
+import sqlite3
 import argparse
+from array import array
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from urllib.parse import quote
+
+import md_tokens
+import perf_trace
+import attachment_audit
+import vaultd_client
+from link_resolver import LinkResolver, link_key
+from path_table import FieldView, IdListView, PackedLists, PathTable
+from vault_index import VaultIndex, stat_key
+from vault_watch import make_watcher
+
+# Entry-point notes that are never reported as orphans
+INDEX_NOTES = {'index.md', 'README.md', 'Home.md', '首页.md'}
+
+def _read_note(path):
+    """(stat, (data, error)) of a note; stat'ed before it is read, so a cached key never postdates its data."""
+    try:
+        st = os.stat(path)
+    except OSError as e:
+        return None, (None, str(e))
+    return st, md_tokens.read_note(path, st)
+
+def _read_notes_chunk(paths):
+    # Unit of work for the process pool: one round-trip per chunk, not per file
+    return [_read_note(p) for p in paths]
+
+# Finding types: SARIF rule id, SARIF level, description
+FINDING_RULES = {
+    "broken_link": ("VA001", "error", "Link target does not exist in the vault"),
+    "broken_anchor": ("VA002", "warning", "Linked heading or block does not exist in the target note"),
+    "orphan": ("VA003", "note", "Note has no incoming links"),
+    "empty_file": ("VA004", "note", "Note is empty"),
+    "misplaced_attachment": ("VA005", "warning", f"Attachment is not in the {attachment_audit.ATTACHMENT_DIR}/ folder"),
+    "misnamed_attachment": ("VA006", "note", "Attachment name does not follow {slug}_{YYYYMMDD_HHMMSS}.{ext}"),
+    "unreferenced_attachment": ("VA007", "note", "Attachment is not linked or embedded by any note"),
+    "duplicate_attachment": ("VA008", "warning", "Attachment is byte-identical to another one"),
+}
+
+class FindingWriter:
+    """Writes findings to a stream as they are reported, then a summary.
+
+    Findings beyond `max_findings` are counted but not written. `elapsed`
+    is the time spent writing, reported as the `report` phase. `root` is
+    the vault the finding paths are relative to.
+    """
+
+    def __init__(self, stream, max_findings=None, root=None):
+        self.stream = stream
+        self.max_findings = max_findings
+        self.root = root
+        self.found = 0
+        self.emitted = 0
+        self.elapsed = 0.0
+
+    @property
+    def truncated(self):
+        return self.emitted < self.found
+
+    def begin(self):
+        start = time.perf_counter()
+        self._write_begin()
+        self.elapsed += time.perf_counter() - start
+
+    def finding(self, record):
+        self.found += 1
+        if self.max_findings is not None and self.emitted >= self.max_findings:
+            return
+        start = time.perf_counter()
+        self._write_finding(record)
+        self.emitted += 1
+        self.elapsed += time.perf_counter() - start
+
+    def end(self, summary):
+        summary = dict(summary, findings=self.emitted, truncated=self.truncated)
+        summary["timings_ms"] = dict(summary.get("timings_ms", {}), report=round(self.elapsed * 1000, 3))
+        self._write_end(summary)
+        self.stream.flush()
+
+    def _write_begin(self):
+        pass
+
+    def _write_finding(self, record):
+        raise NotImplementedError
+
+    def _write_end(self, summary):
+        raise NotImplementedError
+
+class JsonlWriter(FindingWriter):
+    """One JSON object per finding, then a {"summary": ...} line."""
+
+    def _write_finding(self, record):
+        self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _write_end(self, summary):
+        self.stream.write(json.dumps({"summary": summary}, ensure_ascii=False) + "\n")
+
+class JsonWriter(FindingWriter):
+    """A single {"findings": [...], "summary": {...}} document, written incrementally."""
+
+    def _write_begin(self):
+        self.stream.write('{"findings": [')
+
+    def _write_finding(self, record):
+        self.stream.write(("," if self.emitted else "") + "\n  " + json.dumps(record, ensure_ascii=False))
+
+    def _write_end(self, summary):
+        self.stream.write('\n],\n"summary": ' + json.dumps(summary, ensure_ascii=False, indent=2) + "}\n")
+
+class SarifWriter(FindingWriter):
+    """SARIF 2.1.0 log with one result per finding, for code-scanning dashboards."""
+
+    def _write_begin(self):
+        rules = [{"id": rule_id, "name": name, "shortDescription": {"text": text},
+                  "defaultConfiguration": {"level": level}}
+                 for name, (rule_id, level, text) in FINDING_RULES.items()]
+        run = {"tool": {"driver": {"name": "audit_vault", "rules": rules}}}
+        if self.root is not None:
+            # Artifact URIs are relative to the vault; a trailing slash makes it a directory base
+            run["originalUriBaseIds"] = {"%SRCROOT%": {"uri": Path(self.root).resolve().as_uri() + "/"}}
+        run["results"] = []
+        header = json.dumps({
+            "version": "2.1.0",
+            "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+            "runs": [run],
+        }, ensure_ascii=False)
+        # Leave the results array open; findings are appended as they arrive
+        self.stream.write(header[:header.rindex('"results": []') + len('"results": [')])
+
+    def _write_finding(self, record):
+        rule_id, level, _ = FINDING_RULES[record["type"]]
+        if "target" in record:
+            text = f"{record['type'].replace('_', ' ').capitalize()}: [[{record['target']}]]"
+        else:
+            text = FINDING_RULES[record["type"]][2]
+        result = {"ruleId": rule_id, "level": level, "message": {"text": text},
+                  "locations": [{"physicalLocation": {"artifactLocation": {
+                      "uri": quote(record["path"]), "uriBaseId": "%SRCROOT%"}}}]}
+        if "status" in record:  # diff mode (--baseline)
+            result["baselineState"] = "new" if record["status"] == "new" else "absent"
+        self.stream.write(("," if self.emitted else "") + "\n" + json.dumps(result, ensure_ascii=False))
+
+    def _write_end(self, summary):
+        self.stream.write('\n], "properties": {"summary": ' + json.dumps(summary, ensure_ascii=False)
+                          + '}}]}\n')
+
+WRITERS = {"json": JsonWriter, "jsonl": JsonlWriter, "sarif": SarifWriter}
+
+# Format version of the files written by --snapshot
+SNAPSHOT_VERSION = 1
+
+def load_baseline(path):
+    """Read a snapshot written with --snapshot, for a diff-mode audit."""
+    with open(path, 'r', encoding='utf-8') as f:
+        snapshot = json.load(f)
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"{path} is not an audit snapshot (version {SNAPSHOT_VERSION})")
+    snapshot["notes"] = {p: ((m, s, i), out) for p, (m, s, i, out) in snapshot["notes"].items()}
+    return snapshot
+
+def _finding_key(record):
+    return (record["type"], record["path"], record.get("target"))
+
+class NoteRecord:
+    """Per-note data of the inventory, kept as slots rather than one dict per attribute."""
+
+    __slots__ = ("mtime_ns", "size", "ino", "tags", "anchors", "link_anchors")
+
+    def __init__(self, key):
+        self.mtime_ns, self.size, self.ino = key  # stat key at scan time, without a tuple per note
+        self.tags = ()  # distinct tags
+        self.anchors = ()  # anchor keys of its headings and ^blocks
+        self.link_anchors = ()  # (target, anchor) of its links into a note
+
+    @property
+    def key(self):
+        return (self.mtime_ns, self.size, self.ino)
+
 
 class VaultAuditor:
-    def __init__(self, vault_path):
+    """Inventory of a vault's files and links, and the findings derived from them.
+
+    Paths and link targets are interned in PathTables and links are kept as
+    array('I') of their ids, so a path or target costs one string however
+    many links mention it. `outgoing`, `incoming`, `unresolved`,
+    `all_links`, `note_keys`, `tags`, `anchors` and `link_anchors` are
+    read-only mapping views of that storage, with the plain strings, lists
+    and tuples of the notes' data.
+    """
+
+    def __init__(self, vault_path, use_index=True, rebuild_index=False, index=None, log=None):
         self.vault_path = Path(vault_path).resolve()
+        self.log = log or sys.stdout  # progress and warnings; stderr when the report goes to stdout
+        self.paths = PathTable()  # vault paths; all_files and the resolver share its strings
+        self.targets = PathTable()  # link targets as written
         self.all_files = set()
-        self.all_links = defaultdict(list)  # target -> [sources]
+        self._links = {}  # source -> array of target ids, in scan order
+        self._linked_from = None  # target -> array of source path ids, built on first use (all_links)
+        self._notes = {}  # note -> NoteRecord
         self.broken_links = defaultdict(list) # source -> [missing_targets]
-        self.orphans = []
-        self.empty_files = []
-        
-    def scan_vault(self):
-        """Walk strictly through the vault to inventory files."""
-        print(f"Scanning vault: {self.vault_path}")
+        self.orphans = set()
+        self.empty_files = set()
+        self.resolver = None  # LinkResolver, built once by resolve_links
+        self._incoming = PackedLists()  # resolved file id -> source path ids, packed by resolve_links
+        self._unresolved = PackedLists()  # source id -> ids of targets matching no file, packed by resolve_links
+        self.broken_anchors = defaultdict(list)  # source -> ['target#anchor']
+        self._targets_by_key = None  # link_key -> raw targets, built for apply_changes
+        self.on_finding = None  # callback(record) receiving findings as each phase finds them
+        self.resolved_out = None  # source -> resolved path (or None) per outgoing link; set to {} to record for a snapshot
+        self.baseline_stats = None  # {"carried", "reverified"} sources of a diff-mode run
+        self.attachment_stats = None  # counts of the attachment pass, once it ran
+        self.misplaced = set()  # attachments outside the attachment folder
+        self.misnamed = set()  # attachments not named {slug}_{timestamp}.{ext}
+        self.unreferenced = set()  # attachments no note links to
+        self.duplicates = {}  # attachment -> the identical copy it duplicates
+        self.timings = {}  # phase -> milliseconds
+        self.index = index
+        if use_index and index is None:
+            try:
+                self.index = VaultIndex(self.vault_path, rebuild=rebuild_index)
+            except (OSError, sqlite3.Error) as e:
+                print(f"Warning: index unavailable, scanning without cache: {e}", file=self.log)
+
+    @property
+    def outgoing(self):
+        """source -> [targets], the inverse of all_links."""
+        return IdListView(self._links, self.targets)
+
+    @property
+    def incoming(self):
+        """resolved file -> [sources linking to it]."""
+        return IdListView(self._incoming, self.paths, keys=self.paths)
+
+    @property
+    def unresolved(self):
+        """source -> [targets matching no file]."""
+        return IdListView(self._unresolved, self.targets, keys=self.paths)
+
+    @property
+    def all_links(self):
+        """target -> [sources]."""
+        return IdListView(self._link_sources(), self.paths)
+
+    @property
+    def note_keys(self):
+        """note -> stat key at scan time."""
+        return FieldView(self._notes, "key")
+
+    @property
+    def tags(self):
+        """note -> (tags), only notes that have any."""
+        return FieldView(self._notes, "tags")
+
+    @property
+    def anchors(self):
+        """note -> (anchor keys of its headings and ^blocks), only notes that have any."""
+        return FieldView(self._notes, "anchors")
+
+    @property
+    def link_anchors(self):
+        """source -> ((target, anchor)) for links into a note."""
+        return FieldView(self._notes, "link_anchors")
+
+    def scan_vault(self, workers=1, quiet=False):
+        """Walk strictly through the vault to inventory files.
+
+        With workers > 1 the notes that miss the index are parsed in a process
+        pool; results are still merged in walk order, so the output is
+        identical to the serial path.
+        """
+        if not quiet:
+            print(f"Scanning vault: {self.vault_path}", file=self.log)
+        start = time.perf_counter()
+        if self.index:
+            self.index.begin_scan()
+        notes = {}  # every note, in walk order (values unused); stat keys are in the records
         for root, dirs, files in os.walk(self.vault_path):
             # Skip hidden directories (like .git, .obsidian, .trash)
             dirs[:] = [d for d in dirs if not d.startswith('.')]
+            rel_root = os.path.relpath(root, self.vault_path)
             
             for file in files:
                 if file.startswith('.'): continue
                 
-                file_path = Path(root) / file
-                rel_path = file_path.relative_to(self.vault_path)
-                
-                self.all_files.add(str(rel_path))
+                rel_path = self.paths.canonical(file if rel_root == '.' else os.path.join(rel_root, file))
+                self.all_files.add(rel_path)
                 
                 if file.endswith('.md'):
-                    self._analyze_markdown(file_path, str(rel_path))
-                    if file_path.stat().st_size == 0:
-                        self.empty_files.append(str(rel_path))
+                    st = os.stat(os.path.join(root, file))
+                    notes[rel_path] = None
+                    self._notes[rel_path] = NoteRecord(stat_key(st))
+                    # Placeholder keeping outgoing links in walk order whatever order notes are analyzed in
+                    self._links[rel_path] = None
+                    if st.st_size == 0:
+                        self.empty_files.add(rel_path)
+                        self._emit({"type": "empty_file", "path": rel_path})
+        perf_trace.add_span("walk", start)
+        perf_trace.count("files", len(self.all_files))
+        perf_trace.count("notes", len(notes))
 
-    def _analyze_markdown(self, file_path, rel_path):
-        """Parse markdown for wikilinks and check validity."""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            # Regex for [[link]] or [[link|alias]]
-            # We capture the content inside [[...]]
-            links = re.findall(r'\[\[([^\]]+)\]\]', content)
-            
-            for link in links:
-                # Extract actual link target (remove alias)
-                target = link.split('|')[0].strip()
-                # Remove anchor links (e.g. [[Note#Heading]])
-                target_file_base = target.split('#')[0].strip()
-                
-                if not target_file_base:
+        parse_start = time.perf_counter()
+        if self.index:
+            # Fresh rows are streamed one at a time; only the misses are left to parse
+            for rel_path, raw in self.index.fresh_rows({rp: self._notes[rp].key for rp in notes}):
+                self._add_note(rel_path, json.loads(raw))
+                del notes[rel_path]
+        parsed = self._parse_parallel(notes, workers) if workers > 1 else {}
+        for rel_path in notes:
+            self._read_markdown(self.vault_path / rel_path, rel_path, parsed=parsed.pop(rel_path, None))
+        perf_trace.add_span("parse", parse_start, workers=workers)
+
+        if self.index:
+            with perf_trace.span("index save"):
+                self.index.save()
+        self._timed("scan", start)
+
+    def _emit(self, record):
+        if self.on_finding is not None:
+            self.on_finding(record)
+
+    def _timed(self, phase, start):
+        self.timings[phase] = round((time.perf_counter() - start) * 1000, 3)
+        perf_trace.add_span(phase, start)
+
+    def _parse_parallel(self, todo, workers):
+        """Parse the notes of `todo` in a process pool."""
+        todo = list(todo)
+        if not todo:
+            return {}
+        chunk_size = max(1, min(256, len(todo) // (workers * 4)))
+        chunks = [todo[i:i + chunk_size] for i in range(0, len(todo), chunk_size)]
+        parsed = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(_read_notes_chunk, [[str(self.vault_path / rp) for rp in c] for c in chunks])
+            for chunk, chunk_results in zip(chunks, results):
+                for rel_path, result in zip(chunk, chunk_results):
+                    parsed[rel_path] = result
+        return parsed
+
+    def _analyze_markdown(self, file_path, rel_path, st):
+        """Collect wikilinks and tags of a note, re-parsing it only if the index is stale."""
+        data = self.index.lookup(rel_path, st) if self.index else None
+        if data is None:
+            self._read_markdown(file_path, rel_path, st)
+        else:
+            self._add_note(rel_path, data)
+
+    def _read_markdown(self, file_path, rel_path, st=None, parsed=None):
+        """Parse a note and cache the result.
+
+        Without `st` the note is stat'ed again first; `parsed` is the
+        (stat, (data, error)) a worker process already computed.
+        """
+        if parsed is None:
+            parsed = _read_note(file_path) if st is None else (st, md_tokens.read_note(file_path, st))
+        st, (data, error) = parsed
+        if error is not None:
+            print(f"Error reading {rel_path}: {error}", file=self.log)
+            self._links.pop(rel_path, None)
+            return
+        if self.index:
+            self.index.store(rel_path, st, data)
+        self._add_note(rel_path, data)
+
+    def _add_note(self, rel_path, data):
+        """Record the parsed data of a note; its record must exist (created with its stat key)."""
+        self._set_links(rel_path, data["links"])
+        record = self._notes[rel_path]
+        # Tags and heading anchors repeat across notes; interned, each is stored once
+        record.tags = tuple(map(sys.intern, data["tags"]))
+        anchors = {md_tokens.anchor_key(h) for h in data["headings"]}
+        anchors.update('^' + b.casefold() for b in data["blocks"])
+        record.anchors = tuple(map(sys.intern, anchors))
+        record.link_anchors = tuple(tuple(pair) for pair in data["anchors"])
+
+    def _link_sources(self):
+        """target -> array of source path ids; built on first use, then kept up to date by _set_links."""
+        if self._linked_from is None:
+            linked_from = {}
+            for source, ids in self._links.items():
+                source_id = self.paths.intern(source)
+                for target_id in ids:
+                    target = self.targets[target_id]
+                    sources = linked_from.get(target)
+                    if sources is None:
+                        sources = linked_from[target] = array('I')
+                    sources.append(source_id)
+            self._linked_from = linked_from
+        return self._linked_from
+
+    def _set_links(self, source, links):
+        """Replace the outgoing links of `source` (None removes them), and its all_links entries once built."""
+        linked_from = self._linked_from
+        source_id = self.paths.intern(source)
+        old = self._links.get(source)
+        if old is not None and linked_from is not None:
+            for target_id in old:
+                target = self.targets[target_id]
+                sources = linked_from[target]
+                sources.remove(source_id)
+                if not sources:
+                    del linked_from[target]
+                    if self._targets_by_key is not None:
+                        self._targets_by_key[link_key(target)].discard(target)
+        if links is None:
+            self._links.pop(source, None)
+            return
+        ids = self.targets.encode(links)
+        self._links[source] = ids  # a note already listed keeps its place
+        if linked_from is not None:
+            for target_id in ids:
+                target = self.targets[target_id]
+                sources = linked_from.get(target)
+                if sources is None:
+                    sources = linked_from[target] = array('I')
+                    if self._targets_by_key is not None:
+                        self._targets_by_key[link_key(target)].add(target)
+                sources.append(source_id)
+
+    def index_stats(self):
+        """Cache hit/miss counters of the last scan (None without an index)."""
+        return self.index.stats() if self.index else None
+
+    def resolve_links(self, baseline=None):
+        """Resolve every captured link once against the file inventory.
+
+        Fills `incoming` (file -> notes linking to it) and
+        `unresolved` (source -> targets that match no file); both
+        verify_links and identify_orphans read from these.
+
+        With a `baseline` snapshot, sources whose file and link targets are
+        unchanged since it take their resolutions from it instead (see
+        _carry_over), so only churn is resolved again.
+        """
+        if self.resolver is not None:
+            return
+        start = time.perf_counter()
+        self.resolver = LinkResolver(self.all_files)
+        carried = self._carry_over(baseline) if baseline else {}
+        resolve = self.resolver.resolve
+        targets = self.targets.strings
+        intern = self.paths.intern
+        # (resolved file, source) and (source, unresolved target) id pairs of
+        # all links, packed into incoming and unresolved once all are known
+        files, sources = array('I'), array('I')
+        broken_sources, broken_targets = array('I'), array('I')
+        for source, ids in self._links.items():
+            out = carried.get(source)
+            if out is None:
+                out = [resolve(targets[i], source) for i in ids]
+            source_id = intern(source)
+            for target_id, resolved in zip(ids, out):
+                if resolved is None:
+                    broken_sources.append(source_id)
+                    broken_targets.append(target_id)
+                else:
+                    files.append(intern(resolved))
+                    sources.append(source_id)
+            if self.resolved_out is not None:
+                self.resolved_out[source] = out
+        self._incoming = PackedLists.pack(len(self.paths), files, sources)
+        self._unresolved = PackedLists.pack(len(self.paths), broken_sources, broken_targets)
+        if baseline:
+            self.baseline_stats = {"carried": len(carried), "reverified": len(self._links) - len(carried)}
+        perf_trace.add_span("resolve", start)
+
+    def _carry_over(self, baseline):
+        """Resolutions still valid from a baseline: {source: [resolved path or None]}.
+
+        A link resolves differently only if its source changed, or a file
+        named like its target (any path suffix) was added or removed, or it
+        is relative and files came or went; everything else is reused.
+        """
+        old_files = baseline["files"]
+        old_set = set(old_files)
+        came_or_went = (self.all_files - old_set) | (old_set - self.all_files)
+        keys = set()
+        for path in came_or_went:
+            keys.update(self.resolver.suffix_keys(path))
+
+        carried = {}
+        for source, (key, out) in baseline["notes"].items():
+            ids = self._links.get(source)
+            if ids is None or self._notes[source].key != tuple(key) or len(ids) != len(out):
+                continue
+            if came_or_went and any(t.startswith('.') or link_key(t) in keys for t in self.targets.decode(ids)):
+                continue
+            carried[source] = [old_files[i] if i >= 0 else None for i in out]
+        return carried
+
+    def verify_links(self, baseline=None):
+        """Check if captured links exist in the file inventory, and their anchors in the target."""
+        start = time.perf_counter()
+        self.resolve_links(baseline)
+        for source, targets in self.unresolved.items():
+            self.broken_links[source].extend(targets)
+            for target in dict.fromkeys(targets):
+                self._emit({"type": "broken_link", "path": source, "target": target})
+        self._check_anchors()
+        for source, links in self.broken_anchors.items():
+            for link in dict.fromkeys(links):
+                self._emit({"type": "broken_anchor", "path": source, "target": link})
+        self._timed("verify", start)
+
+    def _check_anchors(self):
+        """Rebuild broken_anchors: one lookup per anchored link, no file reads.
+
+        Links whose file is missing are already broken links; links into
+        non-notes (`doc.pdf#page=2`) carry no checkable anchor.
+        """
+        start = time.perf_counter()
+        self.broken_anchors.clear()
+        for source, pairs in self.link_anchors.items():
+            for target, anchor in pairs:
+                resolved = self.resolver.resolve(target, source) if target else source
+                if resolved is None or not resolved.endswith('.md'):
                     continue
-                    
-                self.all_links[target_file_base].append(rel_path)
-                
-        except Exception as e:
-            print(f"Error reading {rel_path}: {e}")
-
-    def verify_links(self):
-        """Check if captured links exist in the file inventory."""
-        # Create a set of "normalized" file paths/names for easier matching
-        # Obsidian allows linking by filename alone if unique
-        file_inventory_names = {os.path.basename(f): f for f in self.all_files}
-        file_inventory_paths = set(self.all_files)
-        
-        for target, sources in self.all_links.items():
-            # 1. Exact path match
-            if target in file_inventory_paths:
+                if md_tokens.anchor_key(anchor) not in self.anchors.get(resolved, ()):
+                    self.broken_anchors[source].append(f"{target}#{anchor}")
+        perf_trace.add_span("anchors", start)
+
+    def audit_attachments(self, use_cache=True):
+        """Check location, naming and use of every attachment, and find identical copies.
+
+        Needs resolved links (an attachment is referenced when a link or
+        embed resolves to it). Of each group of identical files, the original
+        the others are reported against is preferably one that is referenced,
+        then one in the attachment folder, then one with a valid name, then
+        the first by path.
+        Content hashes are cached by stat key, so unchanged files are not
+        read again.
+        """
+        start = time.perf_counter()
+        self.resolve_links()
+        for findings in (self.misplaced, self.misnamed, self.unreferenced, self.duplicates):
+            findings.clear()
+        files = {}
+        for f in sorted(self.all_files):
+            if not attachment_audit.is_attachment(f):
                 continue
-            
-            # 2. Filename match (with or without extension)
-            target_name = os.path.basename(target)
-            
-            # Try matching with .md extension if not present
-            if not os.path.splitext(target_name)[1]:
-                 candidate_md = target_name + ".md"
-                 if candidate_md in file_inventory_names:
-                     continue
-            
-            # Try exact name match against inventory files
-            if target_name in file_inventory_names:
+            try:
+                files[f] = os.stat(self.vault_path / f)
+            except OSError:
                 continue
-               
-            # If we get here, the link is likely broken
-            for source in sources:
-                self.broken_links[source].append(target)
+            if not attachment_audit.in_attachment_dir(f):
+                self.misplaced.add(f)
+                self._emit({"type": "misplaced_attachment", "path": f})
+            if not attachment_audit.valid_name(f):
+                self.misnamed.add(f)
+                self._emit({"type": "misnamed_attachment", "path": f})
+            if not self._is_linked(f):
+                self.unreferenced.add(f)
+                self._emit({"type": "unreferenced_attachment", "path": f})
+
+        cache = attachment_audit.HashCache(self.vault_path, use_index=use_cache and self.index is not None)
+        try:
+            groups = attachment_audit.find_duplicates(files, cache)
+            cache.save(files)
+        finally:
+            cache.close()
+        for group in groups:
+            original = min(group, key=lambda f: (not self._is_linked(f), f in self.misplaced,
+                                                 f in self.misnamed, f))
+            for f in group:
+                if f != original:
+                    self.duplicates[f] = original
+                    self._emit({"type": "duplicate_attachment", "path": f, "target": original})
+        self.attachment_stats = {
+            "attachments": len(files),
+            "bytes": sum(st.st_size for st in files.values()),
+            "hashed_bytes": cache.hashed_bytes,
+            "hash": attachment_audit.HASH_NAME,
+        }
+        self._timed("attachments", start)
 
     def identify_orphans(self):
         """Find markdown files with no incoming links (excluding index files)."""
-        # Build set of all targets that have at least one valid link
-        linked_targets = set()
-        
-        # We need to map the "targets" back to actual files
-        file_inventory_names = {os.path.basename(f): f for f in self.all_files}
-        
-        for target in self.all_links.keys():
-             # Resolve target to actual file
-             if target in self.all_files:
-                 linked_targets.add(target)
-             else:
-                 # Try to resolve by filename
-                 target_name = os.path.basename(target)
-                 if not os.path.splitext(target_name)[1]:
-                     target_name += ".md"
-                 
-                 if target_name in file_inventory_names:
-                     linked_targets.add(file_inventory_names[target_name])
-        
-        for f in self.all_files:
-            if not f.endswith('.md'): continue
-            
-            # Skip obvious index files
-            if f in ['index.md', 'README.md', 'Home.md', '首页.md']: continue
-            
-            # If not in linked_targets, it's an orphan
-            if f not in linked_targets:
-                self.orphans.append(f)
+        start = time.perf_counter()
+        self.resolve_links()
+        for f in sorted(self.all_files):
+            if self._is_orphan(f):
+                self.orphans.add(f)
+                self._emit({"type": "orphan", "path": f})
+        self._timed("orphans", start)
+
+    def findings(self):
+        """All current findings, sorted, in the records passed to on_finding."""
+        for source, targets in sorted(self.broken_links.items()):
+            for target in sorted(set(targets)):
+                yield {"type": "broken_link", "path": source, "target": target}
+        for source, links in sorted(self.broken_anchors.items()):
+            for link in sorted(set(links)):
+                yield {"type": "broken_anchor", "path": source, "target": link}
+        for f in sorted(self.orphans):
+            yield {"type": "orphan", "path": f}
+        for f in sorted(self.empty_files):
+            yield {"type": "empty_file", "path": f}
+        for kind, paths in (("misplaced_attachment", self.misplaced), ("misnamed_attachment", self.misnamed),
+                            ("unreferenced_attachment", self.unreferenced)):
+            for f in sorted(paths):
+                yield {"type": kind, "path": f}
+        for f, original in sorted(self.duplicates.items()):
+            yield {"type": "duplicate_attachment", "path": f, "target": original}
+
+    def summary(self):
+        """Counts, phase timings and index statistics of the current results."""
+        summary = {
+            "vault": str(self.vault_path),
+            "files": len(self.all_files),
+            "broken_links": sum(len(set(t)) for t in self.broken_links.values()),
+            "broken_link_sources": len(self.broken_links),
+            "broken_anchors": sum(len(set(l)) for l in self.broken_anchors.values()),
+            "broken_anchor_sources": len(self.broken_anchors),
+            "orphans": len(self.orphans),
+            "empty_files": len(self.empty_files),
+            "timings_ms": dict(self.timings),
+        }
+        if self.attachment_stats:
+            summary["attachments"] = dict(self.attachment_stats, misplaced=len(self.misplaced),
+                                          misnamed=len(self.misnamed), unreferenced=len(self.unreferenced),
+                                          duplicates=len(self.duplicates))
+        stats = self.index_stats()
+        if stats:
+            summary["index"] = stats
+        return summary
+
+    def write_findings(self, fmt, stream, max_findings=None):
+        """Write the current results in a machine format (json, jsonl or sarif)."""
+        writer = WRITERS[fmt](stream, max_findings, root=self.vault_path)
+        writer.begin()
+        for record in self.findings():
+            writer.finding(record)
+        writer.end(self.summary())
+        return writer
+
+    def write_report(self, fmt, output_file, max_findings=None):
+        """Write the current results to a file in any format, markdown included."""
+        if fmt == "markdown":
+            self.generate_report(output_file)
+            return
+        with open(output_file, 'w', encoding='utf-8') as f:
+            self.write_findings(fmt, f, max_findings)
+
+    def write_snapshot(self, path):
+        """Save what a later `--baseline` run needs: inventory, resolutions, findings.
+
+        Requires resolved_out to have been enabled before verify_links. The
+        file is replaced atomically, so it may also be the baseline just read.
+        """
+        files = sorted(self.all_files)
+        position = {p: i for i, p in enumerate(files)}
+        notes = {source: [*self.note_keys[source], [position[r] if r is not None else -1 for r in out]]
+                 for source, out in self.resolved_out.items()}
+        snapshot = {"version": SNAPSHOT_VERSION, "vault": str(self.vault_path),
+                    "generated": datetime.now().isoformat(timespec='seconds'),
+                    "files": files, "notes": notes, "findings": list(self.findings())}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def diff_findings(self, baseline):
+        """Compare current findings with a baseline's: returns (new, resolved) records."""
+        old = {_finding_key(r): r for r in baseline["findings"]}
+        new = []
+        for record in self.findings():
+            if old.pop(_finding_key(record), None) is None:
+                new.append(dict(record, status="new"))
+        return new, [dict(r, status="resolved") for r in old.values()]
+
+    def write_delta(self, fmt, output, baseline, max_findings=None):
+        """Write only the findings that appeared or disappeared since `baseline`.
+
+        `output` is a file path, or a stream for the machine formats.
+        """
+        new, resolved = self.diff_findings(baseline)
+        if fmt == "markdown":
+            self.generate_delta_report(output, new, resolved, baseline)
+            return
+        summary = self.summary()
+        summary["baseline"] = {"generated": baseline.get("generated"), "new": len(new),
+                               "resolved": len(resolved), **(self.baseline_stats or {})}
+        if isinstance(output, str):
+            with open(output, 'w', encoding='utf-8') as f:
+                self.write_delta(fmt, f, baseline, max_findings)
+            return
+        writer = WRITERS[fmt](output, max_findings, root=self.vault_path)
+        writer.begin()
+        for record in new + resolved:
+            writer.finding(record)
+        writer.end(summary)
+
+    def _is_linked(self, f):
+        return self.paths.get(f) in self._incoming
+
+    def _is_orphan(self, f):
+        # Skip non-notes and obvious index files; anything else needs an incoming link
+        return f.endswith('.md') and f not in INDEX_NOTES and not self._is_linked(f)
+
+    def apply_changes(self, paths):
+        """Fold file-system changes into the scan and audit results in place.
+
+        `paths` are vault-relative paths that may have changed (directories
+        stand for everything below them, '' for the whole vault). Only links
+        from changed notes, and links whose target name matches a created or
+        deleted file, are re-resolved; orphan status is recomputed only for
+        files whose incoming links changed. Returns the classified paths as
+        {"created": [...], "modified": [...], "deleted": [...]}.
+        """
+        self.resolve_links()
+        linked_from = self._link_sources()
+        if self._targets_by_key is None:
+            self._targets_by_key = defaultdict(set)
+            for target in linked_from:
+                self._targets_by_key[link_key(target)].add(target)
+
+        created, modified, deleted = [], [], []
+        for rel_path in sorted(self._expand_paths(paths)):
+            try:
+                st = (self.vault_path / rel_path).stat()
+            except OSError:
+                st = None
+            if st is None or not stat.S_ISREG(st.st_mode):
+                if rel_path in self.all_files:
+                    deleted.append(rel_path)
+            elif rel_path not in self.all_files:
+                created.append((self.paths.canonical(rel_path), st))
+            elif rel_path.endswith('.md'):
+                modified.append((self.paths.canonical(rel_path), st))
+
+        added_or_removed = [p for p, _ in created] + deleted
+        sources = {p for p, _ in created + modified if p.endswith('.md')}
+        sources.update(p for p in deleted if p in self._links)
+        # Targets whose resolution can change: those named like a file that came or went
+        targets = set()
+        for path in added_or_removed:
+            for key in self.resolver.suffix_keys(path):
+                targets.update(self._targets_by_key.get(key, ()))
+        if added_or_removed:
+            targets.update(t for t in linked_from if t.startswith('.'))
+
+        touched = set(added_or_removed)  # files whose orphan status must be rechecked
+        dirty = set(sources)  # sources whose broken-link list must be rebuilt
+
+        def affected_pairs():
+            for source in sources:
+                for target_id in self._links.get(source, ()):
+                    yield source, self.targets[target_id]
+            for target in targets:
+                for source_id in linked_from.get(target, ()):
+                    source = self.paths[source_id]
+                    if source not in sources:
+                        yield source, target
+
+        # Withdraw the affected links while the resolver still reflects the old state
+        for source, target in affected_pairs():
+            resolved = self.resolver.resolve(target, source)
+            if resolved is None:
+                self._unresolved.remove(self.paths.get(source), self.targets.get(target))
+            else:
+                self._incoming.remove(self.paths.get(resolved), self.paths.get(source))
+                touched.add(resolved)
+            dirty.add(source)
+
+        for rel_path in deleted:
+            self._notes.pop(rel_path, None)
+            self.all_files.discard(rel_path)
+            self.resolver.remove(rel_path)
+            self.empty_files.discard(rel_path)
+            self._set_links(rel_path, None)
+            if self.index:
+                self.index.forget(rel_path)
+        for rel_path, st in created:
+            self.all_files.add(rel_path)
+            self.resolver.add(rel_path)
+        for rel_path, st in created + modified:
+            if not rel_path.endswith('.md'):
+                continue
+            self._notes[rel_path] = NoteRecord(stat_key(st))
+            self._set_links(rel_path, None)
+            self._analyze_markdown(self.vault_path / rel_path, rel_path, st)
+            if st.st_size == 0:
+                self.empty_files.add(rel_path)
+            else:
+                self.empty_files.discard(rel_path)
+
+        # Re-add them against the updated inventory
+        for source, target in affected_pairs():
+            resolved = self.resolver.resolve(target, source)
+            if resolved is None:
+                self._unresolved.append(self.paths.intern(source), self.targets.intern(target))
+            else:
+                self._incoming.append(self.paths.intern(resolved), self.paths.intern(source))
+                touched.add(resolved)
+
+        for source in dirty:
+            ids = self._unresolved.get(self.paths.get(source))
+            if ids:
+                self.broken_links[source] = self.targets.decode(ids)
+            else:
+                self.broken_links.pop(source, None)
+        for f in touched:
+            if f in self.all_files and self._is_orphan(f):
+                self.orphans.add(f)
+            else:
+                self.orphans.discard(f)
+        # Headings of any changed note may be linked from anywhere; anchored
+        # links are few, so they are simply all rechecked
+        self._check_anchors()
+
+        if self.index:
+            self.index.save(prune=False)
+        return {"created": [p for p, _ in created], "modified": [p for p, _ in modified],
+                "deleted": deleted}
+
+    def _expand_paths(self, paths):
+        """Replace directory paths by the files below them, on disk and in the inventory."""
+        expanded = set()
+        for rel_path in paths:
+            full_path = self.vault_path / rel_path
+            if rel_path in self.all_files or full_path.is_file():
+                expanded.add(rel_path)
+                continue
+            if full_path.is_dir():
+                for root, dirs, files in os.walk(full_path):
+                    dirs[:] = [d for d in dirs if not d.startswith('.')]
+                    for file in files:
+                        if not file.startswith('.'):
+                            expanded.add(str((Path(root) / file).relative_to(self.vault_path)))
+            prefix = rel_path + os.sep if rel_path else ''
+            expanded.update(f for f in self.all_files if f.startswith(prefix))
+        return expanded
 
     def generate_report(self, output_file):
         """Write the audit results to a markdown file."""
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(f"# Vault Audit Report\n")
+            f.write("# Vault Audit Report\n")
             f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
             f.write(f"Vault: `{self.vault_path}`\n\n")
             
-            f.write(f"## Summary\n")
+            f.write("## Summary\n")
             f.write(f"- Total Files: {len(self.all_files)}\n")
             f.write(f"- Broken Links (Source Files): {len(self.broken_links)}\n")
+            f.write(f"- Broken Anchors (Source Files): {len(self.broken_anchors)}\n")
             f.write(f"- Orphan Files: {len(self.orphans)}\n")
-            f.write(f"- Empty Files: {len(self.empty_files)}\n\n")
+            f.write(f"- Empty Files: {len(self.empty_files)}\n")
+            stats = self.index_stats()
+            if stats:
+                f.write(f"- Index: {stats['hits']} cached, {stats['misses']} parsed, "
+                        f"{stats['removed']} removed\n")
+            if self.timings:
+                f.write("- Timings: " + ", ".join(f"{phase} {ms:.0f} ms" for phase, ms in self.timings.items()) + "\n")
+            f.write("\n")
             
-            f.write(f"## Broken Links\n")
+            f.write("## Broken Links\n")
             if not self.broken_links:
                 f.write("_No broken links found._\n")
             else:
                 for source, targets in sorted(self.broken_links.items()):
                     f.write(f"### [[{source}]]\n")
-                    for t in set(targets):
+                    for t in sorted(set(targets)):
                         f.write(f"- ❌ [[{t}]]\n")
                     f.write("\n")
             
-            f.write(f"## Orphan Files\n")
+            f.write("## Broken Anchors\n")
+            if not self.broken_anchors:
+                f.write("_No broken anchors found._\n")
+            else:
+                for source, links in sorted(self.broken_anchors.items()):
+                    f.write(f"### [[{source}]]\n")
+                    for link in sorted(set(links)):
+                        f.write(f"- ❌ [[{link}]]\n")
+                    f.write("\n")
+            
+            f.write("## Orphan Files\n")
             if not self.orphans:
                 f.write("_No orphans found._\n")
             else:
                 for orphan in sorted(self.orphans):
                     f.write(f"- [[{orphan}]]\n")
             
-            f.write(f"\n## Empty Files\n")
+            f.write("\n## Empty Files\n")
             if not self.empty_files:
                 f.write("_No empty files found._\n")
             else:
                 for ef in sorted(self.empty_files):
                     f.write(f"- `{ef}`\n")
 
+            if self.attachment_stats:
+                stats = self.attachment_stats
+                f.write("\n## Attachments\n")
+                f.write(f"- Checked: {stats['attachments']} files, {stats['bytes'] / 1e6:.1f} MB "
+                        f"({stats['hashed_bytes'] / 1e6:.1f} MB hashed)\n")
+                for title, paths in (("Outside " + attachment_audit.ATTACHMENT_DIR + "/", self.misplaced),
+                                     ("Misnamed", self.misnamed), ("Unreferenced", self.unreferenced)):
+                    f.write(f"\n### {title}\n")
+                    if not paths:
+                        f.write("_None._\n")
+                    for path in sorted(paths):
+                        f.write(f"- `{path}`\n")
+                f.write("\n### Duplicates\n")
+                if not self.duplicates:
+                    f.write("_None._\n")
+                for path, original in sorted(self.duplicates.items()):
+                    f.write(f"- `{path}` = `{original}`\n")
+
+    def generate_delta_report(self, output_file, new, resolved, baseline):
+        """Write the new and resolved findings since a baseline to a markdown file."""
+        titles = {"broken_link": "Broken Links", "broken_anchor": "Broken Anchors",
+                  "orphan": "Orphan Files", "empty_file": "Empty Files",
+                  "misplaced_attachment": "Misplaced Attachments", "misnamed_attachment": "Misnamed Attachments",
+                  "unreferenced_attachment": "Unreferenced Attachments",
+                  "duplicate_attachment": "Duplicate Attachments"}
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write("# Vault Audit Delta\n")
+            f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write(f"Vault: `{self.vault_path}`\n")
+            f.write(f"Baseline: {baseline.get('generated')}\n\n")
+
+            f.write("## Summary\n")
+            f.write(f"- New Findings: {len(new)}\n")
+            f.write(f"- Resolved Findings: {len(resolved)}\n")
+            f.write(f"- Total Files: {len(self.all_files)}\n")
+            if self.baseline_stats:
+                f.write(f"- Sources: {self.baseline_stats['reverified']} re-verified, "
+                        f"{self.baseline_stats['carried']} unchanged since baseline\n")
+            f.write("\n")
+
+            for heading, records, mark in (("New", new, "❌"), ("Resolved", resolved, "✅")):
+                f.write(f"## {heading}\n")
+                if not records:
+                    f.write(f"_No {heading.lower()} findings._\n\n")
+                    continue
+                for kind, title in titles.items():
+                    rows = [r for r in records if r["type"] == kind]
+                    if not rows:
+                        continue
+                    f.write(f"### {title}\n")
+                    for r in rows:
+                        if "target" in r:
+                            f.write(f"- {mark} [[{r['path']}]] → [[{r['target']}]]\n")
+                        elif kind == "duplicate_attachment":
+                            f.write(f"- {mark} `{r['path']}` = `{r['target']}`\n")
+                        elif kind == "empty_file" or kind.endswith("_attachment"):
+                            f.write(f"- {mark} `{r['path']}`\n")
+                        else:
+                            f.write(f"- {mark} [[{r['path']}]]\n")
+                    f.write("\n")
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Audit Obsidian Vault for issues.")
     parser.add_argument("--vault", required=True, help="Path to the Obsidian vault root")
-    parser.add_argument("--output", default="vault_audit_report.md", help="Output report file path")
+    parser.add_argument("--output", help="Output report path, '-' for stdout (default: vault_audit_report.md; stdout for json/jsonl/sarif)")
+    parser.add_argument("--format", choices=["markdown", "json", "jsonl", "sarif"], default="markdown", help="Report format; json/jsonl/sarif stream findings as they are found")
+    parser.add_argument("--max-findings", type=int, help="Write at most N findings (json/jsonl/sarif); the summary still counts all of them")
+    parser.add_argument("--rebuild-index", action="store_true", help="Discard the cached link index and re-parse every note")
+    parser.add_argument("--no-index", action="store_true", help="Do not read or write the on-disk link index")
+    parser.add_argument("--workers", type=int, default=1, help="Parse notes in N worker processes (default: 1, serial)")
+    parser.add_argument("--watch", action="store_true", help="Keep running: apply file changes incrementally and rewrite the report after each batch")
+    parser.add_argument("--interval", type=float, default=1.0, help="Polling interval in seconds when inotify is unavailable (default: 1)")
+    parser.add_argument("--baseline", help="Snapshot of an earlier run (see --snapshot): report only new and resolved findings, re-verifying only changed notes")
+    parser.add_argument("--snapshot", help="Save this run's findings and link resolutions here, for use as a later --baseline")
+    parser.add_argument("--attachments", action="store_true", help=f"Also audit attachments: location ({attachment_audit.ATTACHMENT_DIR}/), naming, references and byte-identical duplicates")
+    perf_trace.add_arguments(parser)
     
     args = parser.parse_args()
+    perf_trace.start_from_args(args, "audit_vault")
+    if args.output is None:
+        args.output = "vault_audit_report.md" if args.format == "markdown" else "-"
+    to_stdout = args.output == "-"
+    if to_stdout and args.format == "markdown":
+        print("Error: the markdown report needs an --output file; use --format json/jsonl/sarif for stdout")
+        sys.exit(1)
+    # Keep stdout clean for the report when it is written there
+    log = sys.stderr if to_stdout else sys.stdout
+    
+    baseline = None
+    if args.baseline:
+        try:
+            baseline = load_baseline(args.baseline)
+        except (OSError, ValueError) as e:
+            print(f"Error: cannot read baseline: {e}")
+            sys.exit(1)
+
+    # A running vaultd already holds a fresh scan; index flags force a local run
+    if not (args.no_index or args.rebuild_index or args.watch or to_stdout or args.baseline or args.snapshot
+            or args.attachments):
+        try:
+            vaultd_client.call(args.vault, "audit", output=os.path.abspath(args.output),
+                               format=args.format, max_findings=args.max_findings)
+            print(f"Audit complete. Report written to {args.output}")
+            sys.exit(0)
+        except vaultd_client.DaemonUnavailable:
+            pass
+        except vaultd_client.DaemonError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
     
-    auditor = VaultAuditor(args.vault)
-    auditor.scan_vault()
-    auditor.verify_links()
+    auditor = VaultAuditor(args.vault, use_index=not args.no_index, rebuild_index=args.rebuild_index, log=log)
+    if args.snapshot:
+        auditor.resolved_out = {}
+    writer = None
+    # In diff mode nothing is known to be new until all findings are in
+    if args.format != "markdown" and baseline is None:
+        stream = sys.stdout if to_stdout else open(args.output, 'w', encoding='utf-8')
+        writer = WRITERS[args.format](stream, args.max_findings, root=args.vault)
+        writer.begin()
+        auditor.on_finding = writer.finding
+    auditor.scan_vault(workers=args.workers, quiet=to_stdout)
+    auditor.verify_links(baseline)
     auditor.identify_orphans()
-    auditor.generate_report(args.output)
+    if args.attachments:
+        auditor.audit_attachments()
+    report_start = time.perf_counter()
+    if baseline is not None:
+        auditor.write_delta(args.format, sys.stdout if to_stdout else args.output, baseline, args.max_findings)
+    elif writer:
+        writer.end(auditor.summary())
+        auditor.on_finding = None
+        if not to_stdout:
+            stream.close()
+    else:
+        auditor.generate_report(args.output)
+    perf_trace.add_span("report", report_start)
     
-    print(f"Audit complete. Report written to {args.output}")
+    stats = auditor.index_stats()
+    if stats:
+        print(f"Index: {stats['hits']} cache hits, {stats['misses']} misses, {stats['removed']} removed", file=log)
+    if auditor.attachment_stats:
+        print(f"Attachments: {auditor.attachment_stats['attachments']} checked, "
+              f"{auditor.attachment_stats['hashed_bytes'] / 1e6:.1f} MB hashed", file=log)
+    if auditor.baseline_stats:
+        print(f"Baseline: {auditor.baseline_stats['reverified']} sources re-verified, "
+              f"{auditor.baseline_stats['carried']} unchanged", file=log)
+    if args.snapshot:
+        auditor.write_snapshot(args.snapshot)
+        # Resolutions are only recorded for the snapshot; watch mode does not keep them
+        auditor.resolved_out = None
+        print(f"Snapshot written to {args.snapshot}", file=log)
+    print(f"Audit complete. Report written to {'stdout' if to_stdout else args.output}", file=log)
+
+    if args.watch:
+        watcher = make_watcher(args.vault, args.interval)
+        print(f"Watching {auditor.vault_path} ({type(watcher).__name__}), Ctrl-C to stop", file=log)
+        try:
+            while True:
+                changes = auditor.apply_changes(watcher.wait())
+                if not any(changes.values()):
+                    continue
+                if args.attachments:
+                    auditor.audit_attachments()
+                if baseline is not None:
+                    auditor.write_delta(args.format, sys.stdout if to_stdout else args.output,
+                                        baseline, args.max_findings)
+                elif to_stdout:
+                    auditor.write_findings(args.format, sys.stdout, args.max_findings)
+                else:
+                    auditor.write_report(args.format, args.output, args.max_findings)
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] "
+                      f"+{len(changes['created'])} ~{len(changes['modified'])} -{len(changes['deleted'])} | "
+                      f"broken sources: {len(auditor.broken_links)}, broken anchors: {len(auditor.broken_anchors)}, orphans: {len(auditor.orphans)}",
+                      file=log)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            watcher.close()
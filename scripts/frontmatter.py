@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+import os
+import re
+import json
+import threading
+from collections import OrderedDict
+
+from vault_index import stat_key
+
+FRONTMATTER_RE = re.compile(rb'\A---[ \t]*\r?\n(?P<body>.*?)^(?:---|\.\.\.)[ \t]*\r?(?:\n|\Z)', re.S | re.M)
+
+# Frontmatter is read in growing chunks until its closing fence; a file
+# whose fence is not found within this many bytes has no frontmatter
+READ_CHUNK = 4096
+MAX_FRONTMATTER_BYTES = 1 << 20
+
+KEY_RE = re.compile(r'''^(?P<key>"(?:[^"\\]|\\.)*"|'(?:[^']|'')*'|[^\s#'"{\[\]-][^#]*?|-[^\s#][^#]*?)[ \t]*:(?:[ \t]+(?P<rest>.*))?$''')
+BLOCK_SCALAR_RE = re.compile(r'^([|>])([+-]?)[1-9]?[ \t]*(?:#.*)?$')
+INT_RE = re.compile(r'^[-+]?(?:0|[1-9][0-9_]*)$')
+FLOAT_RE = re.compile(r'^[-+]?(?:[0-9][0-9_]*)?\.[0-9]+(?:[eE][-+]?[0-9]+)?$')
+
+
+def _strip_comment(text):
+    """Drop a trailing ` # comment` that is not inside quotes."""
+    if '#' not in text:
+        return text.rstrip()
+    quote = None
+    for i, ch in enumerate(text):
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in '"\'':
+            quote = ch
+        elif ch == '#' and (i == 0 or text[i - 1] in ' \t'):
+            return text[:i].rstrip()
+    return text.rstrip()
+
+
+def _split_flow(text):
+    """Split the inside of a flow collection at top-level commas."""
+    if not any(ch in text for ch in '"\'[{'):
+        return [item.strip() for item in text.split(',') if item.strip()]
+    items, depth, quote, start = [], 0, None, 0
+    for i, ch in enumerate(text):
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in '"\'':
+            quote = ch
+        elif ch in '[{':
+            depth += 1
+        elif ch in ']}':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            items.append(text[start:i])
+            start = i + 1
+    items.append(text[start:])
+    return [item.strip() for item in items if item.strip()]
+
+
+def _unquote(text):
+    if text[:1] == '"':
+        try:
+            return json.loads(text)
+        except ValueError:
+            return text.strip('"')
+    return text[1:-1].replace("''", "'")
+
+
+def parse_scalar(text):
+    """Value of an inline YAML scalar or flow collection (`[a, b]`, `{k: v}`)."""
+    text = _strip_comment(text.strip())
+    if text[:1] in '"\'' and len(text) > 1 and text[-1] == text[0]:
+        return _unquote(text)
+    if text.startswith('[') and text.endswith(']'):
+        return [parse_scalar(item) for item in _split_flow(text[1:-1])]
+    if text.startswith('{') and text.endswith('}'):
+        mapping = {}
+        for item in _split_flow(text[1:-1]):
+            key, _, value = item.partition(':')
+            mapping[parse_scalar(key)] = parse_scalar(value) if value.strip() else None
+        return mapping
+    lowered = text.lower()
+    if lowered in ('', '~', 'null'):
+        return None
+    if lowered in ('true', 'false'):
+        return lowered == 'true'
+    if INT_RE.match(text):
+        return int(text.replace('_', ''))
+    if FLOAT_RE.match(text):
+        return float(text.replace('_', ''))
+    return text
+
+
+class _Parser:
+    """Indentation-driven parser for the block YAML found in frontmatter.
+
+    Covers mappings, sequences (including sequences of mappings), nested
+    blocks, `|`/`>` block scalars, multi-line plain scalars, flow
+    collections, quoting and comments. Anchors, tags and multiple
+    documents are not supported; lines it cannot place are skipped.
+    """
+
+    def __init__(self, text):
+        self.lines = [(len(line) - len(line.lstrip(' ')), line.strip(), line)
+                      for line in text.replace('\t', '  ').splitlines()]
+        self.pos = 0
+
+    def _next(self):
+        """Advance past blank and comment lines; return the current line or None."""
+        while self.pos < len(self.lines):
+            indent, content, _ = self.lines[self.pos]
+            if content and not content.startswith('#'):
+                return indent, content
+            self.pos += 1
+        return None
+
+    def block(self, indent):
+        line = self._next()
+        if line is None or line[0] < indent:
+            return None
+        if line[1] == '-' or line[1].startswith('- '):
+            return self.sequence(line[0])
+        return self.mapping(line[0])
+
+    def mapping(self, indent):
+        result = {}
+        while True:
+            line = self._next()
+            if line is None or line[0] < indent:
+                return result
+            match = KEY_RE.match(line[1]) if line[0] == indent else None
+            self.pos += 1
+            if not match:
+                continue
+            key = match.group('key')
+            if key[:1] in '"\'':
+                key = _unquote(key)
+            result[key] = self.value(match.group('rest'), indent)
+
+    def sequence(self, indent):
+        result = []
+        while True:
+            line = self._next()
+            if line is None or line[0] != indent or not (line[1] == '-' or line[1].startswith('- ')):
+                return result
+            item = line[1][1:].strip()
+            if not item:
+                self.pos += 1
+                result.append(self.block(indent + 1))
+            elif KEY_RE.match(item) and item[:1] not in '[{"\'':
+                # `- key: value` opens a mapping indented to the item text
+                item_indent = indent + len(line[1]) - len(item)
+                self.lines[self.pos] = (item_indent, item, self.lines[self.pos][2])
+                result.append(self.mapping(item_indent))
+            else:
+                self.pos += 1
+                result.append(self.value(item, indent))
+
+    def value(self, rest, indent):
+        """Value of `key: rest` (or `- rest`) whose line is at `indent`."""
+        rest = (rest or '').strip()
+        block_scalar = BLOCK_SCALAR_RE.match(rest)
+        if block_scalar:
+            return self.block_scalar(indent, *block_scalar.groups())
+        if not _strip_comment(rest):
+            line = self._next()
+            if line is None:
+                return None
+            if line[0] > indent:
+                return self.block(line[0])
+            if line[0] == indent and (line[1] == '-' or line[1].startswith('- ')):
+                return self.sequence(indent)
+            return None
+        if rest[:1] in '[{"\'':
+            return parse_scalar(rest)
+        # Plain scalars may continue on more-indented lines
+        parts = [_strip_comment(rest)]
+        while self.pos < len(self.lines):
+            line_indent, content, _ = self.lines[self.pos]
+            if content and line_indent <= indent:
+                break
+            if content:
+                parts.append(content)
+            self.pos += 1
+        return parse_scalar(' '.join(parts)) if len(parts) == 1 else ' '.join(parts)
+
+    def block_scalar(self, indent, style, chomp):
+        lines = []
+        block_indent = None
+        while self.pos < len(self.lines):
+            line_indent, content, raw = self.lines[self.pos]
+            if content and line_indent <= indent:
+                break
+            if content and block_indent is None:
+                block_indent = line_indent
+            lines.append(raw[block_indent:] if content else '')
+            self.pos += 1
+        while chomp != '+' and lines and not lines[-1]:
+            lines.pop()
+        if style == '|':
+            text = '\n'.join(lines)
+        else:
+            text = ''
+            for line in lines:
+                if not line:
+                    text += '\n'
+                elif text and not text.endswith('\n'):
+                    text += ' ' + line
+                else:
+                    text += line
+        if chomp == '-' or not lines:
+            return text
+        return text + '\n'
+
+
+def parse_yaml(text):
+    """Parse a frontmatter body into a dict (empty if it is not a mapping)."""
+    result = _Parser(text).block(0)
+    return result if isinstance(result, dict) else {}
+
+
+def note_tags(properties):
+    """Tags listed under `tags`/`tag`, as a list or a comma/space separated string."""
+    tags = []
+    for key, value in properties.items():
+        if str(key).strip().lower() not in ('tags', 'tag') or value is None:
+            continue
+        items = value if isinstance(value, list) else str(value).replace(',', ' ').split()
+        tags.extend(str(t).strip().lstrip('#') for t in items if t is not None)
+    return [t for t in tags if t]
+
+
+def read_frontmatter_bytes(path):
+    """Raw frontmatter body of a file, reading only up to its closing fence.
+
+    Returns None when the file does not start with a `---` block.
+    """
+    with open(path, 'rb') as f:
+        data = f.read(READ_CHUNK)
+        if not data.startswith(b'---'):
+            return None
+        while True:
+            match = FRONTMATTER_RE.match(data)
+            # A fence at the very end of the buffer may be a longer line cut short
+            if match and match.end() < len(data):
+                return match.group('body')
+            more = f.read(len(data)) if len(data) < MAX_FRONTMATTER_BYTES else b''
+            if not more:
+                return match.group('body') if match else None
+            data += more
+
+
+# Parsed frontmatter of recently read files, keyed by path and checked
+# against the stat key, so repeated listings only stat unchanged files
+CACHE_SIZE = 4096
+_cache = OrderedDict()  # path -> (stat key, properties)
+_cache_lock = threading.Lock()
+
+
+def read_frontmatter(path, st=None):
+    """Frontmatter properties of a file as a dict ({} without frontmatter).
+
+    The result is shared with the cache and must not be modified.
+    """
+    path = os.path.abspath(path)
+    key = stat_key(st or os.stat(path))
+    with _cache_lock:
+        entry = _cache.get(path)
+        if entry is not None and entry[0] == key:
+            _cache.move_to_end(path)
+            return entry[1]
+    body = read_frontmatter_bytes(path)
+    properties = parse_yaml(body.decode('utf-8', 'replace')) if body is not None else {}
+    with _cache_lock:
+        _cache[path] = (key, properties)
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return properties
@@ -1,9 +1,9 @@
 #!/usr/bin/env python3
 import os
 import sys
-import shutil
 import argparse
-import glob
+
+from vault_write import atomic_write, content_hash
 
 def get_builtin_agents_dir():
     # Helper to find the agents directory relative to this script
@@ -12,55 +12,105 @@ def get_builtin_agents_dir():
     # Agents should be at: skills/obsidian-knowledge-adapter/agents/
     return os.path.abspath(os.path.join(script_dir, '../agents'))
 
-def list_builtin_agents():
+def builtin_agents():
+    """{agent name: file path} of the built-in agents ({} if the directory is missing)."""
+    agents_dir = get_builtin_agents_dir()
+    if not os.path.isdir(agents_dir):
+        return {}
+    return {name[:-3]: os.path.join(agents_dir, name)
+            for name in sorted(os.listdir(agents_dir)) if name.endswith('.md') and not name.startswith('.')}
+
+def list_builtin_agents(agents=None):
     agents_dir = get_builtin_agents_dir()
-    if not os.path.exists(agents_dir):
+    if agents is None:
+        agents = builtin_agents()
+    if not os.path.isdir(agents_dir):
         print(f"Error: Built-in agents directory not found at {agents_dir}")
         return []
-    
-    agents = []
+
     print(f"Available built-in agents in {agents_dir}:")
-    for file_path in glob.glob(os.path.join(agents_dir, "*.md")):
-        agent_name = os.path.basename(file_path).replace('.md', '')
+    for agent_name in agents:
         print(f"- {agent_name}")
-        agents.append(agent_name)
-    return agents
+    return list(agents)
 
-def install_agent(agent_name, target_vault_root=None):
+def _read(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def install_agents(agent_names, target_vault_root=None, update_only=False):
+    """Install (or update) built-in agents into the vault's .antigravity/agents.
+
+    Copies whose content already matches the built-in (same size and
+    sha256) are left untouched; others are replaced atomically. With
+    update_only, agents not installed yet are skipped. Returns the counts
+    of installed, updated, unchanged, skipped, missing and failed agents.
+    """
     if not target_vault_root:
         target_vault_root = os.getcwd()
-    
-    agents_dir = get_builtin_agents_dir()
-    source_path = os.path.join(agents_dir, f"{agent_name}.md")
-    
-    if not os.path.exists(source_path):
-        print(f"Error: Agent '{agent_name}' not found.")
-        list_builtin_agents()
-        return False
-
-    # Define target directory
+    available = builtin_agents()
     target_dir = os.path.join(target_vault_root, ".antigravity", "agents")
-    os.makedirs(target_dir, exist_ok=True)
-    
-    target_path = os.path.join(target_dir, f"{agent_name}.md")
-    
-    try:
-        shutil.copy2(source_path, target_path)
-        print(f"Successfully installed '{agent_name}' to {target_path}")
-        return True
-    except Exception as e:
-        print(f"Error installing agent: {e}")
-        return False
+    counts = {"installed": 0, "updated": 0, "unchanged": 0, "skipped": 0, "missing": 0, "failed": 0}
+
+    for agent_name in agent_names:
+        source_path = available.get(agent_name)
+        if source_path is None:
+            print(f"Error: Agent '{agent_name}' not found.")
+            counts["missing"] += 1
+            continue
+        target_path = os.path.join(target_dir, f"{agent_name}.md")
+        try:
+            target_size = os.path.getsize(target_path)
+        except OSError:
+            target_size = None
+        if target_size is None and update_only:
+            counts["skipped"] += 1
+            continue
+        try:
+            data = _read(source_path)
+            if target_size == len(data) and content_hash(_read(target_path) or b'') == content_hash(data):
+                print(f"Unchanged '{agent_name}' ({target_path})")
+                counts["unchanged"] += 1
+                continue
+            atomic_write(target_path, data)
+        except Exception as e:
+            print(f"Error installing agent '{agent_name}': {e}")
+            counts["failed"] += 1
+            continue
+        if target_size is None:
+            print(f"Successfully installed '{agent_name}' to {target_path}")
+            counts["installed"] += 1
+        else:
+            print(f"Successfully updated '{agent_name}' in {target_path}")
+            counts["updated"] += 1
+
+    if counts["missing"]:
+        list_builtin_agents(available)
+    if len(agent_names) > 1 or update_only:
+        print(f"{counts['installed']} installed, {counts['updated']} updated, {counts['unchanged']} unchanged"
+              + "".join(f", {counts[k]} {k}" for k in ("skipped", "missing", "failed") if counts[k]))
+    return counts
+
+def install_agent(agent_name, target_vault_root=None):
+    counts = install_agents([agent_name], target_vault_root)
+    return not (counts["missing"] or counts["failed"])
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Install built-in Antigravity agents to your Obsidian Vault.")
-    parser.add_argument("agent_name", nargs="?", help="Name of the agent to install (without .md extension)")
+    parser.add_argument("agent_names", nargs="*", metavar="agent_name", help="Name(s) of the agent(s) to install (without .md extension)")
     parser.add_argument("--list", action="store_true", help="List available built-in agents")
+    parser.add_argument("--all", action="store_true", help="Install or update every built-in agent")
+    parser.add_argument("--update", action="store_true", help="Update the built-in agents already installed in the vault (or only the named ones)")
     parser.add_argument("--vault", help="Path to the Vault root (default: current directory)")
 
     args = parser.parse_args()
 
-    if args.list or not args.agent_name:
+    if args.list or not (args.agent_names or args.all or args.update):
         list_builtin_agents()
     else:
-        install_agent(args.agent_name, args.vault)
+        names = args.agent_names or list(builtin_agents())
+        counts = install_agents(names, args.vault, update_only=args.update and not args.all)
+        if counts["missing"] or counts["failed"]:
+            sys.exit(1)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+from array import array
+from itertools import accumulate
+from operator import itemgetter, mul, sub
+
+try:
+    import numpy
+except ImportError:  # optional: PageRank/HITS fall back to pure Python
+    numpy = None
+
+
+def _row_sums(values, links, bounds):
+    """For every CSR row, the sum of `values` over the columns in it.
+
+    Gathers per-link values and differences their running total at the row
+    offsets (`bounds`, an itemgetter of them), so the loops run in C rather
+    than once per note.
+    """
+    totals = bounds(list(accumulate(map(values.__getitem__, links), initial=0.0)))
+    return list(map(sub, totals[1:], totals[:-1]))
+
+
+def _distance(a, b):
+    return sum(map(abs, map(sub, a, b)))
+
+
+class LinkGraph:
+    """Resolved note-to-note links as integer arrays, for whole-graph analytics.
+
+    Notes are numbered in path order; links are stored twice in CSR form
+    (`out_offsets`/`out_links` and `in_offsets`/`in_links`), so the links of
+    note i are `out_links[out_offsets[i]:out_offsets[i + 1]]`. Duplicate
+    links and links from a note to itself count once and not at all.
+    Attachments are not nodes.
+    """
+
+    def __init__(self, notes, targets):
+        """`targets[i]` holds the ids of the notes that note i links to."""
+        self.notes = list(notes)
+        self.ids = {note: i for i, note in enumerate(self.notes)}
+        self.out_offsets = array('I', [0])
+        self.out_links = array('I')
+        for i, row in enumerate(targets):
+            self.out_links.extend(sorted(set(row) - {i}))
+            self.out_offsets.append(len(self.out_links))
+
+        count = len(self.notes)
+        in_degree = [0] * count
+        for target in self.out_links:
+            in_degree[target] += 1
+        self.in_offsets = array('I', accumulate(in_degree, initial=0))
+        self.in_links = array('I', bytes(4 * len(self.out_links)))
+        fill = self.in_offsets[:-1]
+        for source in range(count):
+            for target in self.out_links[self.out_offsets[source]:self.out_offsets[source + 1]]:
+                self.in_links[fill[target]] = source
+                fill[target] += 1
+        # Row offsets as itemgetters, for _row_sums (tuples once there is a note)
+        self._out_bounds = itemgetter(*self.out_offsets)
+        self._in_bounds = itemgetter(*self.in_offsets)
+
+    @classmethod
+    def from_auditor(cls, auditor):
+        """Graph of an auditor's resolved links (resolve_links must have run)."""
+        notes = sorted(p for p in auditor.all_files if p.endswith('.md'))
+        ids = {note: i for i, note in enumerate(notes)}
+        targets = [[] for _ in notes]
+        for target, sources in auditor.incoming.items():
+            t = ids.get(target)
+            if t is None:
+                continue
+            for source in sources:
+                s = ids.get(source)
+                if s is not None:
+                    targets[s].append(t)
+        return cls(notes, targets)
+
+    def __len__(self):
+        return len(self.notes)
+
+    def edge_count(self):
+        return len(self.out_links)
+
+    def _neighbors(self, node, direction):
+        if direction != "in":
+            yield from self.out_links[self.out_offsets[node]:self.out_offsets[node + 1]]
+        if direction != "out":
+            yield from self.in_links[self.in_offsets[node]:self.in_offsets[node + 1]]
+
+    def _id(self, note):
+        try:
+            return self.ids[note]
+        except KeyError:
+            raise FileNotFoundError(f"Not a note: {note}") from None
+
+    def components(self):
+        """Weakly connected components as lists of notes, largest first."""
+        seen = bytearray(len(self.notes))
+        components = []
+        for start in range(len(self.notes)):
+            if seen[start]:
+                continue
+            seen[start] = 1
+            members = [start]
+            for node in members:  # grows while iterating: breadth-first
+                for other in self._neighbors(node, "both"):
+                    if not seen[other]:
+                        seen[other] = 1
+                        members.append(other)
+            components.append(members)
+        components.sort(key=lambda c: (-len(c), c[0]))
+        return [[self.notes[i] for i in sorted(c)] for c in components]
+
+    def neighborhood(self, note, hops=1, direction="both"):
+        """Notes within `hops` links of `note`, mapped to their distance."""
+        start = self._id(note)
+        distance = {start: 0}
+        frontier = [start]
+        for hop in range(1, hops + 1):
+            next_frontier = []
+            for node in frontier:
+                for other in self._neighbors(node, direction):
+                    if other not in distance:
+                        distance[other] = hop
+                        next_frontier.append(other)
+            frontier = next_frontier
+        del distance[start]
+        return {self.notes[i]: d for i, d in sorted(distance.items(), key=lambda item: (item[1], item[0]))}
+
+    def shortest_path(self, source, target, direction="out"):
+        """Fewest-links path from `source` to `target` as a list of notes, or None."""
+        start, goal = self._id(source), self._id(target)
+        parent = {start: start}
+        frontier = [start]
+        while frontier and goal not in parent:
+            next_frontier = []
+            for node in frontier:
+                for other in self._neighbors(node, direction):
+                    if other not in parent:
+                        parent[other] = node
+                        next_frontier.append(other)
+            frontier = next_frontier
+        if goal not in parent:
+            return None
+        path = [goal]
+        while path[-1] != start:
+            path.append(parent[path[-1]])
+        return [self.notes[i] for i in reversed(path)]
+
+    def pagerank(self, damping=0.85, tol=1e-6, max_iter=100):
+        """PageRank of every note ({note: score}, scores sum to 1).
+
+        Rank of notes without outgoing links is spread over all notes.
+        """
+        n = len(self.notes)
+        if not n:
+            return {}
+        out_degree = [self.out_offsets[i + 1] - self.out_offsets[i] for i in range(n)]
+        if numpy is not None:
+            src = numpy.repeat(numpy.arange(n), out_degree)
+            dst = numpy.frombuffer(self.out_links, dtype=numpy.uint32)
+            degree = numpy.array(out_degree, dtype=float)
+            dangling = degree == 0
+            rank = numpy.full(n, 1.0 / n)
+            for _ in range(max_iter):
+                share = numpy.divide(rank, degree, out=numpy.zeros(n), where=~dangling)
+                new = numpy.bincount(dst, weights=share[src], minlength=n) * damping
+                new += (1 - damping + damping * rank[dangling].sum()) / n
+                delta = numpy.abs(new - rank).sum()
+                rank = new
+                if delta < tol:
+                    break
+            return dict(zip(self.notes, rank.tolist()))
+
+        inverse = [1.0 / d if d else 0.0 for d in out_degree]
+        dangling = [i for i, d in enumerate(out_degree) if not d]
+        rank = [1.0 / n] * n
+        for _ in range(max_iter):
+            base = (1 - damping + damping * sum(map(rank.__getitem__, dangling))) / n
+            shares = _row_sums(list(map(mul, rank, inverse)), self.in_links, self._in_bounds)
+            new = [base + damping * s for s in shares]
+            delta = _distance(new, rank)
+            rank = new
+            if delta < tol:
+                break
+        return dict(zip(self.notes, rank))
+
+    def hits(self, tol=1e-6, max_iter=100):
+        """HITS hub and authority scores: ({note: hub}, {note: authority}), each summing to 1."""
+        n = len(self.notes)
+        if not n:
+            return {}, {}
+        if numpy is not None:
+            degree = numpy.diff(numpy.frombuffer(self.out_offsets, dtype=numpy.uint32))
+            src = numpy.repeat(numpy.arange(n), degree)
+            dst = numpy.frombuffer(self.out_links, dtype=numpy.uint32)
+            hub = numpy.full(n, 1.0 / n)
+            for _ in range(max_iter):
+                auth = numpy.bincount(dst, weights=hub[src], minlength=n)
+                auth /= auth.sum() or 1
+                new = numpy.bincount(src, weights=auth[dst], minlength=n)
+                new /= new.sum() or 1
+                delta = numpy.abs(new - hub).sum()
+                hub = new
+                if delta < tol:
+                    break
+            return dict(zip(self.notes, hub.tolist())), dict(zip(self.notes, auth.tolist()))
+
+        hub = [1.0 / n] * n
+        for _ in range(max_iter):
+            auth = _row_sums(hub, self.in_links, self._in_bounds)
+            total = sum(auth) or 1
+            auth = [a / total for a in auth]
+            new = _row_sums(auth, self.out_links, self._out_bounds)
+            total = sum(new) or 1
+            new = [h / total for h in new]
+            delta = _distance(new, hub)
+            hub = new
+            if delta < tol:
+                break
+        return dict(zip(self.notes, hub)), dict(zip(self.notes, auth))
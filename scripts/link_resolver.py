@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+import os
+import posixpath
+
+
+def link_key(path):
+    """Lookup key of a vault path or link target: casefolded, no `.md` suffix."""
+    path = path.replace('\\', '/').strip('/')
+    if path.lower().endswith('.md'):
+        path = path[:-3]
+    return path.casefold()
+
+
+class LinkResolver:
+    """Resolves wikilink targets to vault files the way Obsidian does.
+
+    Every file is indexed under its name, casefolded and without the `.md`
+    extension; a link with folders (`folder/Note`) matches the files of its
+    last part whose path ends with it. Resolving a link is thus a single
+    dictionary lookup followed by a choice among the (usually one)
+    candidates:
+
+    1. candidates whose case matches the link exactly win over casefolded ones
+    2. a full vault-relative path match wins over a suffix match
+    3. a file in the linking note's folder wins over one elsewhere
+    4. otherwise the shortest path wins (fewest folders, then alphabetical)
+    """
+
+    def __init__(self, paths=()):
+        # name key -> path, or (paths) when several share the name; buckets
+        # are replaced, never changed in place, so copies can share them.
+        # Almost every name has a single file, stored without a tuple around
+        # it. Only names are keys, so no folder part is stored again per
+        # file, and the buckets are the only record of the files
+        self._by_name = {}
+        for path in paths:
+            self.add(path)
+
+    @classmethod
+    def from_vault(cls, vault_root):
+        """Build a resolver from a walk of the vault (hidden entries skipped)."""
+        resolver = cls()
+        vault_root = os.path.abspath(vault_root)
+        for root, dirs, files in os.walk(vault_root):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            rel_root = os.path.relpath(root, vault_root)
+            for file in files:
+                if file.startswith('.'):
+                    continue
+                rel_path = file if rel_root == '.' else os.path.join(rel_root, file)
+                resolver.add(rel_path.replace(os.sep, '/'))
+        return resolver
+
+    def copy(self):
+        """An independent resolver over the same files, much cheaper than re-adding them."""
+        other = LinkResolver()
+        other._by_name = dict(self._by_name)
+        return other
+
+    def suffix_keys(self, path):
+        """Every key a link to `path` can have (one per path suffix)."""
+        parts = link_key(path).split('/')
+        return ['/'.join(parts[i:]) for i in range(len(parts))]
+
+    def _named(self, name):
+        bucket = self._by_name.get(name, ())
+        return (bucket,) if isinstance(bucket, str) else bucket
+
+    def _bucket(self, key):
+        """Files `key` is a suffix of."""
+        name = key.rpartition('/')[2]
+        if name == key:
+            return self._named(name)
+        return tuple(p for p in self._named(name) if ('/' + link_key(p)).endswith('/' + key))
+
+    def __contains__(self, path):
+        return path in self._named(link_key(path).rpartition('/')[2])
+
+    def add(self, path):
+        name = link_key(path).rpartition('/')[2]
+        bucket = self._named(name)
+        if path not in bucket:
+            self._by_name[name] = bucket + (path,) if bucket else path
+
+    def remove(self, path):
+        name = link_key(path).rpartition('/')[2]
+        bucket = self._named(name)
+        if path not in bucket:
+            return
+        bucket = tuple(p for p in bucket if p != path)
+        if len(bucket) > 1:
+            self._by_name[name] = bucket
+        elif bucket:
+            self._by_name[name] = bucket[0]
+        else:
+            del self._by_name[name]
+
+    def candidates(self, target):
+        """All files a link target could refer to, before disambiguation."""
+        return list(self._bucket(link_key(target)))
+
+    def resolve(self, target, source=None):
+        """Return the vault path `target` points to, or None if it is broken.
+
+        `source` is the path of the linking note; it is needed for relative
+        links (`./x`, `../x`) and to break ties between same-named files.
+        """
+        target = target.replace('\\', '/')
+        source_dir = posixpath.dirname(source.replace('\\', '/')) if source else ''
+
+        if target.startswith('./') or target.startswith('../'):
+            target = posixpath.normpath(posixpath.join(source_dir, target))
+            if target.startswith('../'):
+                return None
+            key = link_key(target)
+            matches = [p for p in self._bucket(key) if link_key(p) == key]
+        else:
+            key = link_key(target)
+            matches = self._by_name.get(key) if '/' not in key else self._bucket(key)
+            if isinstance(matches, str):
+                return matches
+        if not matches:
+            return None
+        if len(matches) == 1:
+            return matches[0]
+
+        wanted = target.strip('/')
+        if wanted.lower().endswith('.md'):
+            wanted = wanted[:-3]
+        exact_key = link_key(wanted)
+
+        def rank(path):
+            stem = path[:-3] if path.lower().endswith('.md') else path
+            return (
+                not (stem == wanted or stem.endswith('/' + wanted)),
+                link_key(path) != exact_key,
+                posixpath.dirname(path) != source_dir,
+                path.count('/'),
+                path,
+            )
+
+        return min(matches, key=rank)
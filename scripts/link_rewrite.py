@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+import os
+import re
+import json
+import sqlite3
+import posixpath
+
+import md_tokens
+from link_resolver import link_key
+from vault_index import VaultIndex, stat_key
+
+# With more moved file names than this, cached link rows are parsed
+# instead of being searched for each name
+MAX_NAME_FILTER = 64
+
+# Start of the anchor or alias in the inside of a wikilink ('\|' is an escaped pipe in tables)
+WIKI_TARGET_END_RE = re.compile(r'\\?[#|]')
+
+
+def _strip_md(path):
+    return path[:-3] if path.lower().endswith('.md') else path
+
+
+def link_text(old_target, new_path, source, resolver):
+    """Target text for a link to `new_path` from `source`, in the style of `old_target`.
+
+    Relative links stay relative; links to a bare name get the shortest
+    path suffix that still resolves to the file (usually the new name);
+    links spelling out a path get the full vault path. A `.md` extension
+    is kept only if the old link had one.
+    """
+    stem = new_path if old_target.lower().endswith('.md') else _strip_md(new_path)
+    if old_target.startswith('./') or old_target.startswith('../'):
+        relative = posixpath.relpath(stem, posixpath.dirname(source) or '.')
+        return './' + relative if old_target.startswith('./') and not relative.startswith('../') else relative
+    if old_target.startswith('/'):
+        return '/' + stem
+    if '/' not in old_target:
+        parts = stem.split('/')
+        for i in range(len(parts) - 1, 0, -1):
+            candidate = '/'.join(parts[i:])
+            if resolver.resolve(candidate, source) == new_path:
+                return candidate
+    return stem
+
+
+def _replace_target(raw, kind_wiki, new_target):
+    """Link markup `raw` with its target replaced; anchor, alias and spacing kept."""
+    if kind_wiki:
+        open_len = raw.index('[[') + 2
+        inner = raw[open_len:-2]
+        end = WIKI_TARGET_END_RE.search(inner)
+        part = inner[:end.start()] if end else inner
+        lead = len(part) - len(part.lstrip())
+        trail = len(part.rstrip())
+        return raw[:open_len] + part[:lead] + new_target + part[trail:] + inner[len(part):] + raw[-2:]
+    url_start = raw.index('](') + 2
+    rest = raw[url_start:-1]
+    if rest.startswith('<'):
+        url, tail = rest[1:rest.index('>')], rest[rest.index('>'):]
+        prefix, encoded = '<', new_target
+    else:
+        split = re.search(r'\s', rest)
+        url, tail = (rest[:split.start()], rest[split.start():]) if split else (rest, '')
+        prefix, encoded = '', new_target.replace('%', '%25').replace(' ', '%20')
+    anchor = url[url.index('#'):] if '#' in url else ''
+    return raw[:url_start] + prefix + encoded + anchor + tail + raw[-1:]
+
+
+def _mentions(raw, names):
+    raw = raw.casefold()
+    return any(name in raw for name in names)
+
+
+def scan_links(vault_root, moves):
+    """(all vault files, {note: link targets}) for moving files as in `moves` ({old: new}).
+
+    Link targets come from the audit's link index (notes that changed
+    since are parsed and stored back). Only notes that may refer to a
+    moved file are returned: the moved notes themselves and those whose
+    cached row mentions the name of a moved file, old or new, so most rows
+    are never even parsed.
+    """
+    vault_root = os.path.abspath(vault_root)
+    names = {json.dumps(link_key(posixpath.basename(p)), ensure_ascii=False)[1:-1]
+             for pair in moves.items() for p in pair}
+    try:
+        index = VaultIndex(vault_root)
+    except (OSError, sqlite3.Error):
+        index = None
+    files, notes, outgoing = set(), {}, {}
+    try:
+        for root, dirs, filenames in os.walk(vault_root):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            rel_root = os.path.relpath(root, vault_root).replace(os.sep, '/')
+            for name in filenames:
+                if name.startswith('.'):
+                    continue
+                rel_path = name if rel_root == '.' else f"{rel_root}/{name}"
+                files.add(rel_path)
+                if not name.endswith('.md'):
+                    continue
+                full_path = os.path.join(root, name)
+                try:
+                    notes[rel_path] = (full_path, os.stat(full_path))
+                except OSError:
+                    continue
+        # Fresh rows come in one query; those not mentioning a moved name are dropped unparsed (None)
+        cached = {}
+        if index:
+            for rel_path, raw in index.fresh_rows({rel_path: stat_key(st) for rel_path, (_, st) in notes.items()}):
+                if rel_path in moves or len(names) > MAX_NAME_FILTER or _mentions(raw, names):
+                    cached[rel_path] = json.loads(raw)["links"]
+                else:
+                    cached[rel_path] = None
+        for rel_path, (full_path, st) in notes.items():
+            if rel_path in cached:
+                if cached[rel_path] is not None:
+                    outgoing[rel_path] = cached[rel_path]
+                continue
+            data, error = md_tokens.read_note(full_path, st)
+            if error is not None:
+                continue
+            if index:
+                index.store(rel_path, st, data)
+            outgoing[rel_path] = data["links"]
+        if index:
+            index.save()
+    finally:
+        if index:
+            index.close()
+    return files, outgoing
+
+
+def _needs_rewrite(target, source, new_source, old_resolver, new_resolver, moves):
+    """True if a link would stop pointing to its file (or the file's new path) after the moves."""
+    old = old_resolver.resolve(target, source)
+    return old is not None and new_resolver.resolve(target, new_source) != moves.get(old, old)
+
+
+def affected_sources(outgoing, old_resolver, new_resolver, moves):
+    """Notes with a link that must be rewritten when files move as in `moves` ({old: new}).
+
+    Decided from the link targets alone, so notes are not read: only
+    links in moved notes, relative links and links whose name matches a
+    moved file (any path suffix, old or new) are resolved before and after
+    the move.
+    """
+    keys = set()
+    for old, new in moves.items():
+        keys.update(old_resolver.suffix_keys(old))
+        keys.update(old_resolver.suffix_keys(new))
+    affected = []
+    for source, targets in outgoing.items():
+        new_source = moves.get(source, source)
+        moved = source in moves
+        if any(_needs_rewrite(t, source, new_source, old_resolver, new_resolver, moves)
+               for t in targets if moved or t.startswith('.') or link_key(t) in keys):
+            affected.append(source)
+    return affected
+
+
+def rewrite_links(data, old_source, new_source, old_resolver, new_resolver, moves):
+    """Note content (bytes) with its links updated for the moves, and the number of links changed.
+
+    A link is rewritten when, after the move, its text would no longer
+    resolve to the file it pointed to (followed to its new path); broken
+    links and links that still resolve correctly are left alone.
+    """
+    pieces, pos, count = [], 0, 0
+    for token in md_tokens.tokenize(data):
+        if token.kind not in (md_tokens.LINK, md_tokens.EMBED) or not token.value:
+            continue
+        if not _needs_rewrite(token.value, old_source, new_source, old_resolver, new_resolver, moves):
+            continue
+        old = old_resolver.resolve(token.value, old_source)
+        wanted = moves.get(old, old)
+        raw = data[token.start:token.end].decode('utf-8')
+        new_target = link_text(token.value, wanted, new_source, new_resolver)
+        pieces.append(data[pos:token.start])
+        pieces.append(_replace_target(raw, raw.endswith(']]'), new_target).encode('utf-8'))
+        pos = token.end
+        count += 1
+    if not count:
+        return data, 0
+    pieces.append(data[pos:])
+    return b''.join(pieces), count
@@ -2,76 +2,132 @@
 import os
 import sys
 import json
-import glob
+import sqlite3
+
+import vaultd_client
+from frontmatter import read_frontmatter
+from vault_index import VaultIndex
 
 def get_frontmatter(file_path):
-    fm = {}
+    """Frontmatter properties of an agent file (cached by mtime; see frontmatter.py)."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            if not lines or not lines[0].strip() == '---':
-                return {}
-            # Start parsing from line 1
-            for line in lines[1:]:
-                line = line.strip()
-                if line == '---':
-                    break
-                if ':' in line:
-                    key, val = line.split(':', 1)
-                    key = key.strip()
-                    val = val.strip().strip('"').strip("'")
-                    fm[key] = val
+        return read_frontmatter(file_path)
     except Exception as e:
         sys.stderr.write(f"Error reading {file_path}: {e}\n")
-    return fm
+    return {}
+
+# Agents shipped with this skill
+BUILTIN_AGENTS_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'agents'))
 
-def scan_dir(directory):
+def agent_dirs(vault_root):
+    """(source, directory) pairs in precedence order: an agent file shadows
+    same-named files in the directories after it."""
+    return [
+        ("antigravity", os.path.join(vault_root, '.antigravity', 'agents')),
+        ("claude", os.path.join(vault_root, '.claude', 'agents')),  # legacy Claudian path
+        ("builtin", BUILTIN_AGENTS_DIR),
+    ]
+
+def _agent_files(directory, index=None):
+    """Sorted *.md file names of an agent directory, listed again only when
+    the directory's mtime changes (files were added, removed or renamed)."""
+    try:
+        st = os.stat(directory)
+    except OSError:
+        return []
+    key = "dir:" + os.path.abspath(directory)
+    names = index.lookup(key, st) if index else None
+    if names is None:
+        with os.scandir(directory) as entries:
+            names = sorted(e.name for e in entries
+                           if e.name.endswith('.md') and not e.name.startswith('.') and e.is_file())
+        if index:
+            index.store(key, st, names)
+    return names
+
+def scan_dir(directory, source=None, index=None):
+    """Agents defined in one directory, as {"name", "description", "path", "source"}.
+
+    With an `index` (see agents_payload), names and descriptions of files
+    whose stat is unchanged come from it without opening the file.
+    """
+    if source is None:
+        source = "builtin" if os.path.abspath(directory) == BUILTIN_AGENTS_DIR else "vault"
     agents = []
-    if not os.path.exists(directory):
-        return agents
-        
-    for file_path in glob.glob(os.path.join(directory, "*.md")):
-        fm = get_frontmatter(file_path)
-        agent_name = fm.get('name', os.path.basename(file_path).replace('.md', ''))
-        agent_desc = fm.get('description', '')
-        
-        # If built-in agent, prepend (Built-in) to name for clarity
-        if "obsidian-knowledge-adapter/agents" in file_path:
-             agent_name = f"{agent_name} (Built-in)"
+    for file_name in _agent_files(directory, index):
+        file_path = os.path.join(directory, file_name)
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            continue
+        info = index.lookup(file_path, st) if index else None
+        if info is None:
+            fm = get_frontmatter(file_path)
+            info = {"name": fm.get('name', file_name[:-3]), "description": fm.get('description', '')}
+            if index:
+                index.store(file_path, st, info)
 
-        agent_info = {
+        agent_name = info["name"]
+        # If built-in agent, append (Built-in) to name for clarity
+        if source == "builtin":
+            agent_name = f"{agent_name} (Built-in)"
+        agents.append({
             "name": agent_name,
-            "description": agent_desc,
-            "path": file_path
-        }
-        agents.append(agent_info)
+            "description": info["description"],
+            "path": file_path,
+            "source": source,
+        })
     return agents
 
-def list_agents(vault_root):
-    all_agents = []
-
-    # 1. Scan Vault Agents (.claude/agents)
-    # 1. Scan Vault Agents (.antigravity/agents or .claude/agents)
-    # Check Antigravity first
-    antigravity_agents_dir = os.path.join(vault_root, '.antigravity', 'agents')
-    if os.path.exists(antigravity_agents_dir):
-        all_agents.extend(scan_dir(antigravity_agents_dir))
-    
-    # Check Legacy Claudian path
-    legacy_agents_dir = os.path.join(vault_root, '.claude', 'agents')
-    if os.path.exists(legacy_agents_dir):
-        all_agents.extend(scan_dir(legacy_agents_dir))
+def agents_payload(vault_root, use_cache=True):
+    """Collect vault and built-in agents into the structure printed by list_agents.
 
-    # 2. Scan Built-in Agents (relative to script location)
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    builtin_agents_dir = os.path.join(script_dir, '../agents')
-    all_agents.extend(scan_dir(builtin_agents_dir))
+    Agents are identified by file name: a copy in .antigravity/agents hides
+    a same-named one in .claude/agents, which hides a built-in; the hidden
+    paths are listed under "shadows". Parsed agents are cached in the
+    vault's agents.sqlite keyed by stat, so unchanged files are not reopened.
+    """
+    index = None
+    if use_cache:
+        try:
+            index = VaultIndex(vault_root, filename="agents.sqlite")
+        except (OSError, sqlite3.Error):
+            pass  # e.g. a read-only vault: scan without the cache
+    all_agents, by_name = [], {}
+    try:
+        for source, directory in agent_dirs(vault_root):
+            for agent in scan_dir(directory, source, index):
+                key = os.path.basename(agent["path"])[:-3].casefold()
+                if key in by_name:
+                    by_name[key].setdefault("shadows", []).append(agent["path"])
+                    continue
+                by_name[key] = agent
+                all_agents.append(agent)
+        if index:
+            index.save()
+    except sqlite3.Error as e:
+        sys.stderr.write(f"Warning: agent cache not saved: {e}\n")
+    finally:
+        if index:
+            index.close()
 
     if not all_agents:
-        print(json.dumps({"agents": [], "message": f"No agents found in {antigravity_agents_dir} or {legacy_agents_dir} or built-in directory."}))
+        dirs = [directory for _, directory in agent_dirs(vault_root)]
+        return {"agents": [], "message": f"No agents found in {dirs[0]} or {dirs[1]} or built-in directory."}
+    return {"agents": all_agents}
+
+def list_agents(vault_root):
+    try:
+        payload = vaultd_client.call(vault_root, "agents")
+    except (vaultd_client.DaemonUnavailable, vaultd_client.DaemonTimeout):
+        # Listing only reads, so it may also run alongside a busy daemon
+        payload = agents_payload(vault_root)
+
+    if "message" in payload:
+        print(json.dumps(payload))
         return
 
-    print(json.dumps({"agents": all_agents}, indent=2))
+    print(json.dumps(payload, indent=2))
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
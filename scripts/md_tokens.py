@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+import os
+import re
+import time
+import threading
+from collections import OrderedDict, namedtuple
+from urllib.parse import unquote
+
+import perf_trace
+from frontmatter import FRONTMATTER_RE, note_tags, parse_yaml
+from vault_index import stat_key
+
+# Token kinds
+FRONTMATTER = "frontmatter"
+HEADING = "heading"
+BLOCK = "block"
+TAG = "tag"
+LINK = "link"
+EMBED = "embed"
+
+# `start`/`end` are byte offsets into the UTF-8 file. `value` is the link
+# target (file part), heading text, block id, tag or frontmatter body;
+# links also carry `anchor` ('Heading' or '^block') and `alias` (display
+# text), headings their `level`.
+Token = namedtuple("Token", "kind start end value anchor alias level", defaults=(None, None, 0))
+
+# Parsed file as returned by scan_file: raw bytes plus their tokens
+Scan = namedtuple("Scan", "data tokens")
+
+# One pass over the body. Code regions are matched (and dropped) as a whole
+# so nothing inside them is tokenized; headings only consume their `#`
+# prefix so links and tags in the heading text are still found. Every token
+# starts at one of the bytes in the leading lookahead, which lets the scan
+# skip ordinary text without trying each alternative (about 10x faster).
+SCAN_RE = re.compile(rb'''
+  (?=[`~#!\[^])(?:
+    (?P<FENCE>(?:(?<![^\n])|(?<=\n[ ])|(?<=\n[ ]{2})|(?<=\n[ ]{3})|(?<=\A[ ])|(?<=\A[ ]{2})|(?<=\A[ ]{3}))
+              (?P<fence>`{3,}|~{3,})(?s:.*?)(?:^[ ]{0,3}(?P=fence)[`~]*[ \t]*\r?$|\Z))
+  | (?P<CODE>(?P<ticks>`+)[^`\n](?:[^\n]*?[^`\n])??(?P=ticks)(?!`))
+  | (?P<HEADING>^(?P<hashes>[#]{1,6})[ \t]+(?=(?P<heading>[^\n]*)))
+  | (?P<WIKI>(?P<bang>!?)\[\[(?P<wiki>[^\]\n]+)\]\])
+  | (?P<MD>(?P<mdbang>!?)\[(?P<mdtext>[^\]\n]*)\]\((?P<mdurl><[^>\n]*>|[^)\s]+)(?:[ \t]+"[^"\n]*")?\))
+  | (?P<BLOCK>(?<!\S)\^(?P<block>[A-Za-z0-9-]+)[ \t]*\r?$)
+  | (?P<TAG>(?<!\S)[#](?P<tag>[^\s#!-,.:-@\[-^`{-~]+))
+  )''', re.M | re.X)
+
+# Tags stop at the first character that is not a letter, digit, '_', '-' or '/'
+TAG_TEXT_RE = re.compile(r'[\w/-]+')
+# Markdown link destinations with a scheme (https:, mailto:, obsidian:) are not vault links
+URL_SCHEME_RE = re.compile(r'^[A-Za-z][A-Za-z0-9+.-]*:')
+
+
+def _split_target(text):
+    """'Note#Heading' -> ('Note', 'Heading'); the anchor is None without '#'."""
+    target, sep, anchor = text.partition('#')
+    return target.strip(), (anchor.strip() if sep else None)
+
+
+ANCHOR_STRIP_RE = re.compile(r'[#|^:%\[\]\\]')
+
+
+def anchor_key(anchor):
+    """Comparable form of a heading or block anchor, used on both sides of a link.
+
+    Headings match the way Obsidian links them: case-insensitive, with the
+    characters it cannot put in a link (`# | ^ : % [ ] \\`) treated as spaces
+    and runs of whitespace collapsed. `^block` ids keep their caret. For a
+    subheading path (`H1#H2`) only the last heading is compared.
+    """
+    anchor = anchor.rsplit('#', 1)[-1].strip()
+    if anchor.startswith('^'):
+        return '^' + anchor[1:].strip().casefold()
+    return ' '.join(ANCHOR_STRIP_RE.sub(' ', anchor).split()).casefold()
+
+
+def tokenize(data):
+    """Return the tokens of a note given as bytes, in document order.
+
+    Fenced code blocks and inline code spans are skipped. Frontmatter tags
+    are reported as TAG tokens spanning the frontmatter block.
+    """
+    tokens = []
+    pos = 0
+    match = FRONTMATTER_RE.match(data)
+    if match:
+        body = match.group('body').decode('utf-8', 'replace')
+        tokens.append(Token(FRONTMATTER, 0, match.end(), body))
+        tokens.extend(Token(TAG, 0, match.end(), tag) for tag in note_tags(parse_yaml(body)))
+        pos = match.end()
+
+    for m in SCAN_RE.finditer(data, pos):
+        kind = m.lastgroup
+        if kind == 'WIKI':
+            inner = m.group('wiki').decode('utf-8', 'replace')
+            target, _, alias = inner.partition('|')
+            # Inside tables the alias pipe is escaped as '\|'
+            target, anchor = _split_target(target.rstrip('\\'))
+            tokens.append(Token(EMBED if m.group('bang') else LINK, m.start(), m.end(),
+                                target, anchor, alias.strip() or None))
+        elif kind == 'TAG':
+            text = TAG_TEXT_RE.match(m.group('tag').decode('utf-8', 'replace'))
+            # A tag needs at least one non-numeric character (#2024 is not a tag)
+            if text and not text.group().isdigit():
+                tag = text.group()
+                tokens.append(Token(TAG, m.start(), m.start() + 1 + len(tag.encode('utf-8')), tag))
+        elif kind == 'HEADING':
+            text = m.group('heading').decode('utf-8', 'replace').strip()
+            tokens.append(Token(HEADING, m.start(), m.end('heading'), text,
+                                level=len(m.group('hashes'))))
+        elif kind == 'BLOCK':
+            tokens.append(Token(BLOCK, m.start(), m.end(), m.group('block').decode('ascii')))
+        elif kind == 'MD':
+            url = m.group('mdurl').decode('utf-8', 'replace').strip('<>')
+            if URL_SCHEME_RE.match(url):
+                continue
+            target, anchor = _split_target(unquote(url))
+            tokens.append(Token(EMBED if m.group('mdbang') else LINK, m.start(), m.end(),
+                                target, anchor, m.group('mdtext').decode('utf-8', 'replace') or None))
+        # FENCE and CODE produce no tokens
+    return tokens
+
+
+# Recently scanned files, so the audit, search and backlink code running in
+# one process (vaultd) tokenize a changed note only once. Bounded by entries
+# and by (approximate) bytes held; bigger files are never kept. Off unless
+# enabled by a long-lived process: a one-shot run would only hold scans
+# nothing reads again.
+CACHE_SIZE = 256
+CACHE_BYTES = 16 * 1024 * 1024
+TOKEN_BYTES = 160  # rough size of one Token with its strings
+_cache = OrderedDict()  # path -> (stat key, Scan, size)
+_cache_bytes = 0
+_cache_enabled = False
+_cache_lock = threading.Lock()
+
+
+def enable_cache(enabled=True):
+    """Turn the scan cache on (long-lived processes) or off, dropping what it holds."""
+    global _cache_bytes, _cache_enabled
+    with _cache_lock:
+        _cache_enabled = enabled
+        if not enabled:
+            _cache.clear()
+            _cache_bytes = 0
+
+
+def scan_file(path, st=None):
+    """Read and tokenize a note, reusing the result while its stat key is unchanged."""
+    global _cache_bytes
+    path = os.path.abspath(path)
+    key = stat_key(st or os.stat(path))
+    with _cache_lock:
+        entry = _cache.get(path)
+        if entry is not None and entry[0] == key:
+            _cache.move_to_end(path)
+            return entry[1]
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        data = f.read()
+    perf_trace.record_read(path, len(data), time.perf_counter() - start)
+    scan = Scan(data, tokenize(data))
+    size = len(data) + TOKEN_BYTES * len(scan.tokens)
+    with _cache_lock:
+        old = _cache.pop(path, None)
+        if old is not None:
+            _cache_bytes -= old[2]
+        if _cache_enabled and size <= CACHE_BYTES // 4:
+            _cache[path] = (key, scan, size)
+            _cache_bytes += size
+            while len(_cache) > CACHE_SIZE or _cache_bytes > CACHE_BYTES:
+                _cache_bytes -= _cache.popitem(last=False)[1][2]
+    return scan
+
+
+def parse_note(tokens):
+    """Per-note data kept in the link index, from the note's tokens.
+
+    `links` are the targets of wikilinks, embeds and markdown links (file
+    part only, same-note anchors dropped); `tags` are distinct; `anchors`
+    are the [target, anchor] pairs of links pointing into a note, with ''
+    as the target of same-note links.
+    """
+    links = [t for t in tokens if t.kind in (LINK, EMBED)]
+    return {
+        "links": [t.value for t in links if t.value],
+        "anchors": [[t.value, t.anchor] for t in links if t.anchor],
+        "tags": list(dict.fromkeys(t.value for t in tokens if t.kind == TAG)),
+        "headings": [t.value for t in tokens if t.kind == HEADING],
+        "blocks": [t.value for t in tokens if t.kind == BLOCK],
+    }
+
+
+def read_note(file_path, st=None):
+    """Read one note and return (data, error); safe to run in a worker process."""
+    try:
+        scan = scan_file(file_path, st)
+    except OSError as e:
+        return None, str(e)
+    return parse_note(scan.tokens), None
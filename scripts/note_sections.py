@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+import os
+import mmap
+import contextlib
+
+import md_tokens
+from md_tokens import anchor_key
+from vault_index import VaultIndex
+
+# Row of a section table: heading level and text, then byte offsets of the
+# heading line, of the body (after the heading line) and of the section end
+# (next heading of the same or a higher level, or end of file)
+LEVEL, TEXT, START, BODY, END = range(5)
+
+
+def section_table(data):
+    """Sections of a note given as bytes or an mmap, in document order."""
+    table, open_rows = [], []
+    size = len(data)
+    for token in md_tokens.tokenize(data):
+        if token.kind != md_tokens.HEADING:
+            continue
+        while open_rows and open_rows[-1][LEVEL] >= token.level:
+            open_rows.pop()[END] = token.start
+        newline = data.find(b'\n', token.end)
+        row = [token.level, token.value, token.start, size if newline < 0 else newline + 1, size]
+        table.append(row)
+        open_rows.append(row)
+    return table
+
+
+@contextlib.contextmanager
+def mapped(path):
+    """Read-only mmap of a file (bytes for an empty one, which cannot be mapped)."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+class SectionIndex:
+    """Heading offset tables of notes, cached on disk by stat key.
+
+    A note is tokenized (through an mmap) only when it changed since its
+    table was stored; patches store the shifted table of the new file.
+    Only the rows of the notes asked for are read and written.
+    """
+
+    def __init__(self, vault_root):
+        self.index = VaultIndex(vault_root, filename="sections.sqlite")
+
+    def table(self, rel_path, full_path, st=None):
+        st = st or os.stat(full_path)
+        table = self.index.lookup(rel_path, st)
+        if table is None:
+            with mapped(full_path) as data:
+                table = section_table(data)
+            self.store(rel_path, st, table)
+        return table
+
+    def store(self, rel_path, st, table):
+        self.index.store(rel_path, st, table)
+        self.index.save(prune=False)
+
+    def close(self):
+        self.index.close()
+
+
+def find_section(table, heading):
+    """Row of the section named `heading` ('Heading' or 'Parent#Heading'), or None.
+
+    Headings compare the way Obsidian links them (see anchor_key); with a
+    parent path, the parents must enclose the section in that order.
+    """
+    parts = [anchor_key(part) for part in heading.split('#') if part.strip()]
+    if not parts:
+        return None
+    for i, row in enumerate(table):
+        if anchor_key(row[TEXT]) != parts[-1]:
+            continue
+        ancestors = [r for r in table[:i] if r[LEVEL] < row[LEVEL] and r[END] >= row[END]]
+        wanted = iter(parts[:-1])
+        pending = next(wanted, None)
+        for ancestor in ancestors:
+            if pending is not None and anchor_key(ancestor[TEXT]) == pending:
+                pending = next(wanted, None)
+        if pending is None:
+            return row
+    return None
+
+
+def splice_table(table, row, body):
+    """Table of the note after replacing the body of `row` with `body` (bytes).
+
+    Later sections shift by the size difference and subheadings inside the
+    new body are added. Returns None when the body could change how the
+    rest of the note parses (a code fence, or a heading that would end the
+    section), so the table is rebuilt from the file next time.
+    """
+    inserted = section_table(body)
+    if b'```' in body or b'~~~' in body or any(r[LEVEL] <= row[LEVEL] for r in inserted):
+        return None
+    delta = len(body) - (row[END] - row[BODY])
+    new_table = []
+    for other in table:
+        if row[START] < other[START] < row[END]:
+            continue  # a subsection of the replaced body
+        other = list(other)
+        if other[START] >= row[END]:
+            other[START] += delta
+            other[BODY] += delta
+        if other[END] >= row[END]:
+            other[END] += delta
+        new_table.append(other)
+        if other[START] == row[START]:
+            for level, text, start, body_start, end in inserted:
+                # A subheading running to the end of the body ends with the section
+                end = other[END] if end == len(body) else end + row[BODY]
+                new_table.append([level, text, start + row[BODY], body_start + row[BODY], end])
+    return new_table
@@ -2,14 +2,26 @@
 import subprocess
 import argparse
 import sys
+import json
+import time
 import shutil
-import os
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import perf_trace
+import vaultd_client
+from vault_graph import ANALYSES, QUERIES, VaultGraph, format_result
 
 OBSIDIAN_BIN = "obsidian"
 # User Configuration
 DEFAULT_VAULT_PATH = "."
+# Answer link/tag queries from the vault files even if Obsidian is installed
+FORCE_NATIVE = False
 
+@functools.lru_cache(maxsize=None)
 def check_cli():
+    # Resolved once per process: the lookup may shell out to mdfind
     # Use global to modify the variable
     global OBSIDIAN_BIN
     
@@ -35,27 +47,93 @@ def check_cli():
             return True
     return False
 
-def run_command(args, timeout=10, vault_path=None):
+def execute(args, timeout=10, vault_path=None):
+    """Run one Obsidian CLI call and return a result dict instead of printing."""
     if not check_cli():
-        print("Error: Obsidian CLI not found.")
-        return
+        return {"ok": False, "error": "Error: Obsidian CLI not found.", "elapsed_ms": 0.0}
 
     cmd = [OBSIDIAN_BIN] + args
     
     # Determine the working directory for the command
-    cwd = vault_path if vault_path else os.getcwd()
+    cwd = vault_path if vault_path else DEFAULT_VAULT_PATH
     
+    start = time.perf_counter()
     try:
         # Execute command in the context of the default vault if possible
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout, cwd=cwd)
-        if result.returncode == 0:
-            print(result.stdout)
-        else:
-            print(f"Error executing command: {result.stderr}")
+        with perf_trace.span("subprocess", command=args[0] if args else ""):
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout, cwd=cwd)
+        outcome = {"ok": result.returncode == 0, "returncode": result.returncode,
+                   "stdout": result.stdout, "stderr": result.stderr}
     except subprocess.TimeoutExpired:
-        print("Error: Command timed out.")
+        outcome = {"ok": False, "error": "Error: Command timed out."}
     except Exception as e:
-        print(f"Exception: {e}")
+        outcome = {"ok": False, "error": f"Exception: {e}"}
+    outcome["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return outcome
+
+def run_command(args, timeout=10, vault_path=None):
+    outcome = execute(args, timeout, vault_path)
+    if outcome.get("error"):
+        print(outcome["error"])
+    elif outcome["ok"]:
+        print(outcome["stdout"])
+    else:
+        print(f"Error executing command: {outcome['stderr']}")
+
+# Native engine: link and tag queries read straight from the vault files,
+# used when the Obsidian binary is missing (e.g. headless machines)
+
+_graph = None
+_graph_lock = threading.Lock()
+
+def use_native(command):
+    return command in QUERIES and (FORCE_NATIVE or not check_cli())
+
+def native_query(command, file=None):
+    """Answer a query through a running vaultd, or from a scan of the vault."""
+    global _graph
+    try:
+        return vaultd_client.call(DEFAULT_VAULT_PATH, "graph", command=command, file=file)
+    except vaultd_client.DaemonUnavailable:
+        pass
+    with _graph_lock:
+        if _graph is None:
+            _graph = VaultGraph(DEFAULT_VAULT_PATH)
+    return _graph.query(command, file)
+
+def execute_native(command, file=None):
+    """Native counterpart of `execute`, with the structured result attached."""
+    start = time.perf_counter()
+    try:
+        result = native_query(command, file)
+        outcome = {"ok": True, "returncode": 0, "stdout": format_result(command, result),
+                   "stderr": "", "result": result}
+    except (FileNotFoundError, ValueError, vaultd_client.DaemonError) as e:
+        outcome = {"ok": False, "error": f"Error: {e}"}
+    outcome["engine"] = "native"
+    outcome["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    perf_trace.add_span("native", start, command=command)
+    return outcome
+
+def run_native(command, file=None):
+    outcome = execute_native(command, file)
+    print(outcome["error"] if outcome.get("error") else outcome["stdout"])
+
+def analyze_graph(command, as_json=False, **params):
+    """Graph analytics over the vault links; always native, Obsidian has no equivalent."""
+    global _graph
+    try:
+        try:
+            result = vaultd_client.call(DEFAULT_VAULT_PATH, "analyze", command=command, **params)
+        except vaultd_client.DaemonUnavailable:
+            with _graph_lock:
+                if _graph is None:
+                    _graph = VaultGraph(DEFAULT_VAULT_PATH)
+            result = _graph.analyze(command, **params)
+    except (FileNotFoundError, ValueError, vaultd_client.DaemonError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(json.dumps(result, ensure_ascii=False, indent=2) if as_json else format_result(command, result))
 
 # Command Handlers
 
@@ -66,17 +144,25 @@ def eval_js(code):
     run_command(["dev:eval", f"code={code}"])
 
 def get_backlinks(file_path):
+    if use_native("backlinks"):
+        return run_native("backlinks", file_path)
     # Use CLI native command instead of JS eval if possible, but keep JS for custom/raw data
     # Docs say: obsidian backlinks file=...
     run_command(["backlinks", f"file={file_path}"])
 
 def get_links(file_path):
+    if use_native("links"):
+        return run_native("links", file_path)
     run_command(["links", f"file={file_path}"])
 
 def get_orphans():
+    if use_native("orphans"):
+        return run_native("orphans")
     run_command(["orphans"])
 
 def get_unresolved():
+    if use_native("unresolved"):
+        return run_native("unresolved")
     run_command(["unresolved"])
 
 def handle_daily(mode, content=None):
@@ -102,13 +188,83 @@ def search_vault(query):
     run_command(["search", f"query={query}"])
 
 def list_tags():
+    if use_native("tags"):
+        return run_native("tags")
     run_command(["tags"])
     
 def open_note(file_path):
     run_command(["open", f"file={file_path}"])
 
+# Batch operations: JSON objects such as {"command": "backlinks", "file": "a.md"},
+# or {"args": [...]} to pass raw Obsidian CLI arguments
+OPERATIONS = {
+    "read": lambda op: ["read", f"file={op['file']}"],
+    "eval": lambda op: ["dev:eval", f"code={op['code']}"],
+    "backlinks": lambda op: ["backlinks", f"file={op['file']}"],
+    "links": lambda op: ["links", f"file={op['file']}"],
+    "orphans": lambda op: ["orphans"],
+    "unresolved": lambda op: ["unresolved"],
+    "daily": lambda op: {"read": ["daily:read"], "open": ["daily"],
+                         "append": ["daily:append", f"content={op.get('content', '')}"]}[op["mode"]],
+    "create": lambda op: ["create", f"name={op['name']}"] + ([f"content={op['content']}"] if op.get("content") else []),
+    "search": lambda op: ["search", f"query={op['query']}"],
+    "tags": lambda op: ["tags"],
+    "open": lambda op: ["open", f"file={op['file']}"],
+}
+
+def operation_args(op):
+    if "args" in op:
+        return [str(a) for a in op["args"]]
+    builder = OPERATIONS.get(op.get("command"))
+    if builder is None:
+        raise ValueError(f"Unknown command: {op.get('command')}")
+    try:
+        return builder(op)
+    except KeyError as e:
+        raise ValueError(f"Missing field {e} for command '{op.get('command')}'")
+
+def run_batch(stream, concurrency=4, timeout=10):
+    """Execute JSONL operations with bounded concurrency, printing one JSON result per line.
+
+    Results are printed in input order and carry the operation's index and
+    latency; a final {"summary": ...} line reports totals.
+    """
+    ops = [line for line in stream if line.strip()]
+
+    def run_one(item):
+        index, line = item
+        try:
+            op = json.loads(line)
+            if not isinstance(op, dict):
+                raise ValueError("Operation must be a JSON object")
+            args = operation_args(op)
+        except json.JSONDecodeError as e:
+            return {"ok": False, "error": f"Invalid JSON: {e}", "elapsed_ms": 0.0, "index": index}
+        except ValueError as e:
+            return {"ok": False, "error": str(e), "elapsed_ms": 0.0, "index": index}
+        if "args" not in op and use_native(op["command"]):
+            result = execute_native(op["command"], op.get("file"))
+        else:
+            result = execute(args, timeout=op.get("timeout", timeout))
+        result["index"] = index
+        if "id" in op:
+            result["id"] = op["id"]
+        return result
+
+    start = time.perf_counter()
+    failed = 0
+    check_cli()  # resolve the binary once, before the worker threads start
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        for result in pool.map(run_one, enumerate(ops)):
+            failed += not result["ok"]
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+    print(json.dumps({"summary": {"calls": len(ops), "failed": failed,
+                                  "wall_ms": round((time.perf_counter() - start) * 1000, 3)}}))
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Obsidian CLI Wrapper")
+    parser.add_argument("--vault", default=DEFAULT_VAULT_PATH, help="Vault root (default: current directory)")
+    parser.add_argument("--native", action="store_true", help="Answer backlinks/links/orphans/unresolved/tags from the vault files without Obsidian")
     subparsers = parser.add_subparsers(dest="command")
 
     # READ
@@ -154,7 +310,27 @@ if __name__ == "__main__":
     open_parser = subparsers.add_parser("open")
     open_parser.add_argument("file", help="File path to open")
 
+    # GRAPH (analytics over the link graph)
+    graph_parser = subparsers.add_parser("graph", help="Link graph analytics: components, pagerank, hits, neighbors, path")
+    graph_parser.add_argument("analysis", choices=ANALYSES)
+    graph_parser.add_argument("file", nargs="?", help="Note to start from (neighbors, path)")
+    graph_parser.add_argument("to", nargs="?", help="Note to reach (path)")
+    graph_parser.add_argument("--hops", type=int, default=1, help="Neighborhood radius (default: 1)")
+    graph_parser.add_argument("--direction", choices=["out", "in", "both"], help="Follow links forward, backward or both (default: both for neighbors, out for path)")
+    graph_parser.add_argument("--limit", type=int, default=20, help="Components/scores to list (default: 20)")
+    graph_parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+
+    # BATCH
+    batch_parser = subparsers.add_parser("batch", help="Run JSONL operations from a file or stdin")
+    batch_parser.add_argument("input", nargs="?", default="-", help="JSONL file of operations (default: stdin)")
+    batch_parser.add_argument("--concurrency", type=int, default=4, help="Maximum parallel Obsidian calls (default: 4)")
+    batch_parser.add_argument("--timeout", type=float, default=10, help="Per-call timeout in seconds (default: 10)")
+
+    perf_trace.add_arguments(parser)
     args = parser.parse_args()
+    perf_trace.start_from_args(args, f"obsidian_cli {args.command}")
+    DEFAULT_VAULT_PATH = args.vault
+    FORCE_NATIVE = args.native
 
     if args.command == "read":
         read_file(args.file)
@@ -178,5 +354,16 @@ if __name__ == "__main__":
         list_tags()
     elif args.command == "open":
         open_note(args.file)
+    elif args.command == "graph":
+        if args.analysis in ("neighbors", "path") and not args.file or args.analysis == "path" and not args.to:
+            graph_parser.error(f"{args.analysis} needs {'FILE TO' if args.analysis == 'path' else 'FILE'}")
+        analyze_graph(args.analysis, args.json, file=args.file, to=args.to, hops=args.hops,
+                      direction=args.direction, limit=args.limit)
+    elif args.command == "batch":
+        if args.input == "-":
+            run_batch(sys.stdin, args.concurrency, args.timeout)
+        else:
+            with open(args.input, 'r', encoding='utf-8') as f:
+                run_batch(f, args.concurrency, args.timeout)
     else:
         parser.print_help()
@@ -1,7 +1,24 @@
 #!/usr/bin/env python3
 import argparse
+import fnmatch
+import itertools
+import json
 import os
+import re
 import sys
+import time
+from collections import deque
+
+import perf_trace
+import vaultd_client
+from link_resolver import LinkResolver
+from link_rewrite import affected_sources, rewrite_links, scan_links
+from note_sections import BODY, END, START, TEXT, SectionIndex, find_section, mapped, section_table, splice_table
+from property_query import query_notes
+from search_index import SearchIndex
+from vault_ignore import IgnoreRules
+from vault_write import (ConflictError, append_file, atomic_splice, atomic_write, check_preconditions,
+                         content_hash, file_state, fsync_dir, path_lock, path_locks)
 
 def secure_path(vault_root, file_path):
     """Ensures the file path is within the vault root."""
@@ -11,42 +28,479 @@ def secure_path(vault_root, file_path):
         raise ValueError(f"Security Error: Path '{file_path}' attempts to access outside vault '{vault_root}'")
     return abs_file
 
-def read_file(vault_root, file_path):
+def read_file(vault_root, file_path, section=None, lines=None):
+    """Print a note, or only one section of it (`section`) or a line range ('a:b')."""
+    if section is None and lines is None:
+        try:
+            print(vaultd_client.call(vault_root, "read", file=file_path)["content"])
+            return
+        except vaultd_client.DaemonUnavailable:
+            pass
+
     full_path = secure_path(vault_root, file_path)
     if not os.path.exists(full_path):
         print(f"Error: File not found: {file_path}")
         sys.exit(1)
-    with open(full_path, 'r', encoding='utf-8') as f:
-        print(f.read())
+    if section is not None:
+        sections = SectionIndex(vault_root)
+        try:
+            row = find_section(sections.table(vault_rel_path(vault_root, full_path), full_path), section)
+        finally:
+            sections.close()
+        if row is None:
+            raise ValueError(f"Section not found: {section}")
+        with mapped(full_path) as data:
+            text = data[row[START]:row[END]].decode('utf-8', 'replace')
+        print(text, end='' if text.endswith('\n') else '\n')
+    elif lines is not None:
+        first, _, last = lines.partition(':')
+        first = int(first) if first else 1
+        last = int(last) if last else None
+        for line_no, line in enumerate(iter_lines(full_path), 1):
+            if last is not None and line_no > last:
+                break
+            if line_no >= first:
+                print(line)
+    else:
+        with open(full_path, 'r', encoding='utf-8') as f:
+            print(f.read())
+
+def vault_rel_path(vault_root, full_path):
+    return os.path.relpath(full_path, os.path.abspath(vault_root)).replace(os.sep, '/')
+
+def _append_data(content):
+    """Bytes an append adds to a note: the content, on a new line."""
+    return ("\n" + content).encode('utf-8')
 
-def write_file(vault_root, file_path, content, mode='w'):
+def write_file(vault_root, file_path, content, mode='w', if_mtime=None, if_hash=None):
+    """Write (atomically) or append to a note, optionally only if it is unchanged.
+
+    `if_mtime`/`if_hash` are the mtime_ns/sha256 printed by an earlier
+    write or `stat`; a mismatch raises ConflictError and nothing is written.
+    """
     full_path = secure_path(vault_root, file_path)
-    os.makedirs(os.path.dirname(full_path), exist_ok=True)
-    with open(full_path, mode, encoding='utf-8') as f:
-        f.write(content)
-    print(f"Successfully wrote to {file_path}")
+    data = _append_data(content) if mode == 'a' else content.encode('utf-8')
+    with path_lock(vault_root, vault_rel_path(vault_root, full_path)):
+        check_preconditions(full_path, if_mtime, if_hash)
+        if mode == 'a':
+            append_file(full_path, data, root=vault_root)
+            print(f"Successfully wrote to {file_path} (mtime_ns: {os.stat(full_path).st_mtime_ns})")
+        else:
+            atomic_write(full_path, data, root=vault_root)
+            print(f"Successfully wrote to {file_path} (mtime_ns: {os.stat(full_path).st_mtime_ns}, "
+                  f"sha256: {content_hash(data)})")
 
-def list_files(vault_root, path="."):
-    full_path = secure_path(vault_root, path)
+def _section_body(content):
+    body = content.encode('utf-8')
+    return body if not body or body.endswith(b'\n') else body + b'\n'
+
+def patch_section(vault_root, file_path, section, content, if_mtime=None, if_hash=None):
+    """Replace the body of one section (everything under its heading, subsections included).
+
+    Only the new body passes through Python: the section is located in the
+    cached heading table and the rest of the file is copied around it.
+    Prints the new offsets of the section, which stay valid for the next
+    edit of this note.
+    """
+    full_path = secure_path(vault_root, file_path)
     if not os.path.exists(full_path):
-        print(f"Error: Path not found: {path}")
+        raise FileNotFoundError(f"File not found: {file_path}")
+    rel_path = vault_rel_path(vault_root, full_path)
+    body = _section_body(content)
+    with path_lock(vault_root, rel_path):
+        check_preconditions(full_path, if_mtime, if_hash)
+        sections = SectionIndex(vault_root)
+        try:
+            table = sections.table(rel_path, full_path)
+            row = find_section(table, section)
+            if row is None:
+                raise ValueError(f"Section not found: {section}")
+            atomic_splice(full_path, row[BODY], row[END], body, root=vault_root)
+            st = os.stat(full_path)
+            new_table = splice_table(table, row, body)
+            if new_table is not None:
+                sections.store(rel_path, st, new_table)
+        finally:
+            sections.close()
+    print(json.dumps({"file": file_path, "section": row[TEXT], "start": row[START], "body": row[BODY],
+                      "end": row[BODY] + len(body), "size": st.st_size, "mtime_ns": st.st_mtime_ns},
+                     ensure_ascii=False))
+
+def stat_file(vault_root, file_path):
+    state = file_state(secure_path(vault_root, file_path))
+    if state is None:
+        raise FileNotFoundError(f"File not found: {file_path}")
+    print(json.dumps({"path": file_path, **state}))
+
+def _apply_op(op, data):
+    """New content of a file after one batch operation (data is None if missing)."""
+    kind = op["op"]
+    if kind == "write":
+        return op["content"].encode('utf-8')
+    if kind == "append":
+        return (data or b'') + _append_data(op["content"])
+    if data is None:
+        raise FileNotFoundError(f"File not found: {op['file']}")
+    if "section" in op:
+        row = find_section(section_table(data), op["section"])
+        if row is None:
+            raise ValueError(f"Section not found in {op['file']}: {op['section']}")
+        return data[:row[BODY]] + _section_body(op["content"]) + data[row[END]:]
+    text = data.decode('utf-8')
+    count = text.count(op["old"]) if op["old"] else 0
+    if count != 1:
+        raise ValueError(f"'old' text found {count} times in {op['file']}, expected exactly once")
+    return text.replace(op["old"], op["new"], 1).encode('utf-8')
+
+def apply_batch(vault_root, stream):
+    """Apply JSONL write/append/patch operations as one all-or-nothing batch.
+
+    Each line is {"op": "write"|"append", "file", "content"} or
+    {"op": "patch", "file", "old", "new"} (replace text found exactly once)
+    or {"op": "patch", "file", "section", "content"} (replace a section body),
+    with optional "if_mtime"/"if_hash" preconditions and an "id" echoed
+    back. All touched files are locked, every operation is checked, and
+    only if all succeed are the files replaced atomically, followed by one
+    fsync per folder. Prints one JSON result per operation and a summary.
+    """
+    start = time.perf_counter()
+    ops, errors = [], {}
+    for index, line in enumerate(l for l in stream if l.strip()):
+        op = {}
+        try:
+            op = json.loads(line)
+            if not isinstance(op, dict):
+                raise ValueError("Operation must be a JSON object")
+            required = {"write": ("file", "content"), "append": ("file", "content"),
+                        "patch": ("file", "section", "content") if "section" in op else ("file", "old", "new"),
+                        }.get(op.get("op"))
+            if required is None:
+                raise ValueError(f"Unknown op: {op.get('op')}")
+            missing = [field for field in required if not isinstance(op.get(field), str)]
+            if missing:
+                raise ValueError(f"Missing field(s) {', '.join(missing)} for op '{op['op']}'")
+            op["full_path"] = secure_path(vault_root, op["file"])
+            op["rel_path"] = vault_rel_path(vault_root, op["full_path"])
+        except ValueError as e:
+            op = op if isinstance(op, dict) else {}
+            errors[index] = f"Invalid operation: {e}"
+        ops.append(op)
+
+    contents = {}  # rel path -> new bytes
+    with path_locks(vault_root, [] if errors else [op["rel_path"] for op in ops]):
+        if not errors:
+            current = {}
+            for index, op in enumerate(ops):
+                rel_path = op["rel_path"]
+                try:
+                    if rel_path not in current:
+                        try:
+                            with open(op["full_path"], 'rb') as f:
+                                current[rel_path] = f.read()
+                        except FileNotFoundError:
+                            current[rel_path] = None
+                    # Preconditions refer to the file as it was before the batch
+                    if current[rel_path] is not None:
+                        check_preconditions(op["full_path"], op.get("if_mtime"), op.get("if_hash"),
+                                            current[rel_path])
+                    elif op.get("if_mtime") is not None or op.get("if_hash") is not None:
+                        raise ConflictError(f"{op['file']} does not exist")
+                    contents[rel_path] = _apply_op(op, contents.get(rel_path, current[rel_path]))
+                    op["sha256"] = content_hash(contents[rel_path])
+                except (ConflictError, FileNotFoundError, ValueError, UnicodeDecodeError) as e:
+                    errors[index] = str(e)
+
+        folders = set()
+        if not errors:
+            paths = {op["rel_path"]: op["full_path"] for op in ops}
+            for rel_path, data in contents.items():
+                written = atomic_write(paths[rel_path], data, sync_dir=False, root=vault_root)
+                folders.add(os.path.dirname(written))
+            for folder in sorted(folders):
+                fsync_dir(folder)
+
+    for index, op in enumerate(ops):
+        result = {"index": index, "ok": not errors, "file": op.get("file")}
+        if errors:
+            result["error"] = errors.get(index, "Not applied: another operation in the batch failed")
+        else:
+            result["op"] = op["op"]
+            result["mtime_ns"] = os.stat(op["full_path"]).st_mtime_ns
+            result["sha256"] = op["sha256"]
+        if "id" in op:
+            result["id"] = op["id"]
+        print(json.dumps(result, ensure_ascii=False))
+    print(json.dumps({"summary": {"ops": len(ops), "applied": 0 if errors else len(ops),
+                                  "failed": len(errors), "files": 0 if errors else len(contents),
+                                  "folders_synced": len(folders) if not errors else 0,
+                                  "wall_ms": round((time.perf_counter() - start) * 1000, 3)}}))
+    if errors:
         sys.exit(1)
-    
-    for root, dirs, files in os.walk(full_path):
-        # Calculate relative path for display
-        rel_root = os.path.relpath(root, full_path)
-        if rel_root == ".":
-            rel_root = ""
-        
-        for d in dirs:
-             if not d.startswith('.'):
-                print(f"[DIR]  {os.path.join(rel_root, d)}")
-        for f in files:
-            if not f.startswith('.'):
-                print(f"[FILE] {os.path.join(rel_root, f)}")
-        # Only list top level if path is specified, unless recursive flag meant (simplified for now)
-        if path != ".":
-             break 
+
+def _move_plan(vault_root, sources, dest):
+    """[(source, destination)] full paths for `move`, checked before anything moves.
+
+    Like mv: several sources, or a destination that is an existing folder
+    or ends with '/', move into that folder; otherwise the one source is
+    renamed to the destination.
+    """
+    abs_vault = os.path.abspath(vault_root)
+    dest_full = secure_path(vault_root, dest)
+    into = len(sources) > 1 or os.path.isdir(dest_full) or dest.endswith(('/', os.sep))
+    plan = []
+    for source in sources:
+        src_full = secure_path(vault_root, source)
+        if src_full == abs_vault:
+            raise ValueError("Cannot move the vault root")
+        if not os.path.exists(src_full):
+            raise FileNotFoundError(f"Path not found: {source}")
+        dst_full = os.path.join(dest_full, os.path.basename(src_full)) if into else dest_full
+        if os.path.exists(dst_full):
+            raise FileExistsError(f"Destination already exists: {vault_rel_path(vault_root, dst_full)}")
+        if (dst_full + os.sep).startswith(src_full + os.sep):
+            raise ValueError(f"Cannot move {source} into itself")
+        plan.append((src_full, dst_full))
+    if len({dst for _, dst in plan}) < len(plan):
+        raise FileExistsError("Two sources would move to the same destination")
+    return plan
+
+def move_paths(vault_root, sources, dest, dry_run=False):
+    """Move or rename notes, attachments or folders and update every link to them.
+
+    The notes with links that would break are found from the link index
+    (by resolving their cached link targets before and after the move),
+    and only those are read and rewritten: links keep their anchor, alias
+    and style (bare name, path or relative). Links inside moved notes that
+    would resolve differently from the new folder are fixed too. The moved
+    paths and rewritten notes are locked; the renames and rewrites are
+    applied together and rolled back if any of them fails. Prints one JSON
+    line per moved path and per rewritten note, then a summary.
+    """
+    start = time.perf_counter()
+    plan = _move_plan(vault_root, sources, dest)
+    moves = {}  # old vault path -> new vault path, for every file moved
+    counts = []
+    for src_full, dst_full in plan:
+        src_rel, dst_rel = vault_rel_path(vault_root, src_full), vault_rel_path(vault_root, dst_full)
+        before = len(moves)
+        if os.path.isdir(src_full):
+            for entry in iter_entries(vault_root, src_rel, None, use_ignore=False):
+                if entry["type"] == "file":
+                    moves[entry["path"]] = dst_rel + entry["path"][len(src_rel):]
+        else:
+            moves[src_rel] = dst_rel
+        counts.append((src_rel, dst_rel, len(moves) - before))
+    perf_trace.add_span("plan", start, files=len(moves))
+    phase = time.perf_counter()
+    files, outgoing = scan_links(vault_root, moves)
+    perf_trace.add_span("scan", phase, notes=len(outgoing))
+    phase = time.perf_counter()
+    old_resolver = LinkResolver(files)
+    new_resolver = old_resolver.copy()
+    for old, new in moves.items():
+        new_resolver.remove(old)
+        new_resolver.add(new)
+    affected = affected_sources(outgoing, old_resolver, new_resolver, moves)
+    perf_trace.add_span("resolve", phase, affected=len(affected))
+
+    def rewrite(source):
+        try:
+            read_start = time.perf_counter()
+            with open(os.path.join(os.path.abspath(vault_root), source), 'rb') as f:
+                data = f.read()
+            perf_trace.record_read(source, len(data), time.perf_counter() - read_start)
+            return (data,) + rewrite_links(data, source, moves.get(source, source),
+                                           old_resolver, new_resolver, moves)
+        except (OSError, UnicodeDecodeError) as e:
+            raise ValueError(f"Cannot rewrite links in {source}: {e}") from None
+
+    # Most affected notes need no change, so they are read without locks;
+    # only the notes that get rewritten are locked, and re-read in case
+    # they changed meanwhile
+    phase = time.perf_counter()
+    rewrites = {}  # old vault path of a note -> (old bytes, new bytes, links changed)
+    for source in affected:
+        result = rewrite(source)
+        if result[2]:
+            rewrites[source] = result
+    perf_trace.add_span("rewrite", phase, notes=len(rewrites))
+    locked = {vault_rel_path(vault_root, p) for pair in plan for p in pair} | set(rewrites)
+    with path_locks(vault_root, locked):
+        for source, (data, _, _) in list(rewrites.items()):
+            result = rewrite(source)
+            if result[0] != data:
+                rewrites[source] = result
+        rewrites = {source: result for source, result in rewrites.items() if result[2]}
+
+        if not dry_run:
+            phase = time.perf_counter()
+            moved, written, folders = [], [], set()
+            try:
+                for src_full, dst_full in plan:
+                    os.makedirs(os.path.dirname(dst_full), exist_ok=True)
+                    os.rename(src_full, dst_full)
+                    moved.append((src_full, dst_full))
+                    folders.update((os.path.dirname(src_full), os.path.dirname(dst_full)))
+                for source, (data, new_data, count) in sorted(rewrites.items()):
+                    full_path = secure_path(vault_root, moves.get(source, source))
+                    folders.add(os.path.dirname(atomic_write(full_path, new_data, sync_dir=False, root=vault_root)))
+                    written.append((full_path, data))
+            except BaseException:
+                # Put everything back: old contents first, then the renames in reverse
+                for full_path, data in reversed(written):
+                    atomic_write(full_path, data, sync_dir=False, root=vault_root)
+                for src_full, dst_full in reversed(moved):
+                    os.rename(dst_full, src_full)
+                raise
+            for folder in sorted(folders):
+                fsync_dir(folder)
+            perf_trace.add_span("apply", phase, renames=len(moved), writes=len(written))
+
+    for src_rel, dst_rel, count in counts:
+        print(json.dumps({"moved": src_rel, "to": dst_rel, "files": count}, ensure_ascii=False))
+    for source, (_, _, count) in sorted(rewrites.items()):
+        print(json.dumps({"file": moves.get(source, source), "links": count}, ensure_ascii=False))
+    print(json.dumps({"summary": {"moved": len(moves), "notes_checked": len(affected), "rewritten_notes": len(rewrites),
+                                  "rewritten_links": sum(r[2] for r in rewrites.values()), "dry_run": dry_run,
+                                  "wall_ms": round((time.perf_counter() - start) * 1000, 3)}}))
+
+def _matches(patterns, name, rel_path):
+    """True if a glob matches the entry name, or its vault path for patterns with a '/'."""
+    return any(fnmatch.fnmatchcase(rel_path if '/' in pattern else name, pattern) for pattern in patterns)
+
+def iter_entries(vault_root, path=".", max_depth=1, include=(), exclude=(), use_ignore=True):
+    """Yield {"type", "path", "size", "mtime_ns"} for entries under `path`, depth first in name order.
+
+    `max_depth` None walks the whole tree. Hidden entries are never listed;
+    `exclude` globs prune files and folders, `include` globs keep only
+    matching files (folders are then walked but not listed). With
+    use_ignore, .gitignore rules and Obsidian's excluded files apply too.
+    Sizes and times come from the scandir entries, so listing a folder
+    costs one directory read plus at most one stat per entry.
+    """
+    abs_vault = os.path.abspath(vault_root)
+    full_path = secure_path(vault_root, path)
+    if not os.path.isdir(full_path):
+        raise FileNotFoundError(f"{'Not a folder' if os.path.exists(full_path) else 'Path not found'}: {path}")
+    rules = IgnoreRules(abs_vault) if use_ignore else None
+
+    def walk(folder, rel_dir, depth):
+        try:
+            with os.scandir(folder) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            return
+        if rules:
+            rules.enter(rel_dir)
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir()
+                if (rules and rules.ignored(rel_path, is_dir)) or _matches(exclude, entry.name, rel_path):
+                    continue
+                if is_dir:
+                    if not include:
+                        yield {"type": "dir", "path": rel_path, "mtime_ns": entry.stat().st_mtime_ns}
+                    # Symlinked folders are listed but not followed, as with os.walk
+                    if (max_depth is None or depth < max_depth) and not entry.is_symlink():
+                        yield from walk(entry.path, rel_path, depth + 1)
+                elif not include or _matches(include, entry.name, rel_path):
+                    st = entry.stat()
+                    yield {"type": "file", "path": rel_path, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            except OSError:  # removed while listing, or a dangling symlink
+                continue
+
+    rel_start = os.path.relpath(full_path, abs_vault).replace(os.sep, '/')
+    yield from walk(full_path, "" if rel_start == "." else rel_start, 1)
+
+def list_entries(vault_root, path=".", recursive=False, max_depth=None, include=(), exclude=(),
+                 use_ignore=True, offset=0, limit=None):
+    """One page of `list`: {"entries": [...], "offset", "next_offset"} (next_offset None on the last page).
+
+    Only one level is listed unless `recursive` or `max_depth` is given.
+    The walk stops as soon as the page is full.
+    """
+    depth = max_depth if max_depth is not None else (None if recursive else 1)
+    entries = iter_entries(vault_root, path, depth, include or (), exclude or (), use_ignore)
+    stop = None if limit is None else offset + limit + 1
+    with perf_trace.span("walk"):
+        page = list(itertools.islice(entries, offset, stop))
+    perf_trace.count("entries", len(page))
+    more = limit is not None and len(page) > limit
+    if more:
+        page.pop()
+    return {"entries": page, "offset": offset, "next_offset": offset + len(page) if more else None}
+
+def list_files(vault_root, path=".", as_json=False, **options):
+    try:
+        result = vaultd_client.call(vault_root, "list", path=path, **options)
+    except vaultd_client.DaemonUnavailable:
+        result = list_entries(vault_root, path, **options)
+    if as_json:
+        print(json.dumps(result, ensure_ascii=False))
+        return
+    for entry in result["entries"]:
+        print(f"{'[' + entry['type'].upper() + ']':<6} {entry['path']}")
+    if result["next_offset"] is not None:
+        print(f"... more entries, continue with --offset {result['next_offset']}")
+
+def build_index(vault_root, rebuild=False):
+    index = SearchIndex(vault_root, rebuild=rebuild)
+    try:
+        added, updated, removed = index.update()
+    finally:
+        index.close()
+    print(f"Index updated: {added} added, {updated} updated, {removed} removed")
+
+def ranked_search(index, query, limit=20):
+    """Run an index query and attach line snippets to each hit."""
+    return [{"path": rel_path, "score": score, "snippets": index.snippets(rel_path, query)}
+            for rel_path, score in index.search(query, limit=limit)]
+
+def search_index(vault_root, query, limit=20):
+    """Ranked search through the inverted index (refreshed for changed notes first)."""
+    try:
+        results = vaultd_client.call(vault_root, "search", query=query, limit=limit)["results"]
+    except vaultd_client.DaemonUnavailable:
+        index = SearchIndex(vault_root)
+        try:
+            with perf_trace.span("index update"):
+                index.update()
+            with perf_trace.span("query"):
+                results = ranked_search(index, query, limit)
+        finally:
+            index.close()
+    for result in results:
+        print(f"[MATCH] {result['path']} (score {result['score']:.2f})")
+        for line_no, text in result["snippets"]:
+            print(f"  {line_no}: {text}")
+    if not results:
+        print(f"No matches for '{query}'")
+
+# Longest line held in memory at once; longer lines are scanned in pieces
+MAX_LINE_CHARS = 1 << 20
+
+def iter_lines(file_path):
+    """Yield the lines of a file without newlines, never buffering the whole file."""
+    timed = perf_trace.enabled()
+    elapsed = 0.0
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        try:
+            while True:
+                if timed:
+                    start = time.perf_counter()
+                line = f.readline(MAX_LINE_CHARS)
+                if timed:
+                    elapsed += time.perf_counter() - start
+                if not line:
+                    return
+                yield line.rstrip('\r\n')
+        finally:
+            if timed:
+                # Time spent reading only, not matching; the size is the whole file's
+                perf_trace.record_read(file_path, os.fstat(f.fileno()).st_size, elapsed)
 
 def search_files(vault_root, query):
     abs_vault = os.path.abspath(vault_root)
@@ -56,14 +510,108 @@ def search_files(vault_root, query):
             if file.endswith(".md"):
                 file_path = os.path.join(root, file)
                 try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        if query in content:
-                            rel_path = os.path.relpath(file_path, abs_vault)
-                            print(f"[MATCH] {rel_path}")
+                    if any(query in line for line in iter_lines(file_path)):
+                        rel_path = os.path.relpath(file_path, abs_vault)
+                        print(f"[MATCH] {rel_path}")
                 except Exception as e:
                     pass # Ignore read errors
 
+def _match_lines(file_path, matches, context):
+    """Yield match records for one file, each with up to `context` lines around it."""
+    before = deque(maxlen=context)
+    pending = []  # matches still collecting their trailing context
+    for line_no, line in enumerate(iter_lines(file_path), 1):
+        for record in pending:
+            record["after"].append(line)
+        while pending and len(pending[0]["after"]) >= context:
+            yield pending.pop(0)
+        count = matches(line)
+        if count:
+            record = {"line": line_no, "text": line, "count": count}
+            if context:
+                record["before"] = list(before)
+                record["after"] = []
+                pending.append(record)
+            else:
+                yield record
+        before.append(line)
+    yield from pending
+
+def stream_search(vault_root, query, regex=False, ignore_case=False, context=0, max_results=None):
+    """Line-by-line search emitting JSON lines as soon as each match is found.
+
+    Every match is one object (`path`, `line`, `text`, occurrence `count`, and
+    `before`/`after` context lines); each file with matches is closed by a
+    `{"path", "matches"}` record and the run by a `{"summary": ...}` record.
+    """
+    abs_vault = os.path.abspath(vault_root)
+    if regex:
+        pattern = re.compile(query, re.IGNORECASE if ignore_case else 0)
+        matches = lambda line: len(pattern.findall(line))
+    elif ignore_case:
+        needle = query.casefold()
+        matches = lambda line: line.casefold().count(needle)
+    else:
+        matches = lambda line: line.count(query)
+
+    def emit(obj):
+        sys.stdout.write(json.dumps(obj, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+    scanned = matched_files = total = 0
+    truncated = False
+    for root, dirs, files in os.walk(abs_vault):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for file in sorted(files):
+            if not file.endswith(".md") or file.startswith('.'):
+                continue
+            file_path = os.path.join(root, file)
+            rel_path = os.path.relpath(file_path, abs_vault)
+            scanned += 1
+            found = 0
+            try:
+                for record in _match_lines(file_path, matches, context):
+                    emit({"path": rel_path, **record})
+                    found += 1
+                    total += 1
+                    if max_results and total >= max_results:
+                        truncated = True
+                        break
+            except OSError:
+                continue
+            if found:
+                matched_files += 1
+                emit({"path": rel_path, "matches": found})
+            if truncated:
+                break
+        if truncated:
+            break
+    emit({"summary": {"files_scanned": scanned, "files_matched": matched_files,
+                      "matches": total, "truncated": truncated}})
+
+def resolve_link(vault_root, link, source=None):
+    try:
+        resolved = vaultd_client.call(vault_root, "resolve", link=link, source=source)["path"]
+    except vaultd_client.DaemonUnavailable:
+        resolved = LinkResolver.from_vault(vault_root).resolve(link, source)
+    if resolved is None:
+        print(f"[UNRESOLVED] {link}")
+        sys.exit(1)
+    print(resolved)
+
+def query_properties(vault_root, query, path=".", as_json=False, limit=None):
+    """Print the notes whose frontmatter properties match `query`."""
+    secure_path(vault_root, path)
+    matches = query_notes(vault_root, query, path)[:limit]
+    if as_json:
+        print(json.dumps([{"path": p, "properties": props} for p, props in matches],
+                         ensure_ascii=False, indent=2, default=str))
+        return
+    for rel_path, _ in matches:
+        print(rel_path)
+    if not matches:
+        print(f"No notes match '{query}'")
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Obsidian File System Tool")
     parser.add_argument("--vault", required=True, help="Absolute path to the Obsidian Vault root")
@@ -72,38 +620,127 @@ if __name__ == "__main__":
     # Read
     read_parser = subparsers.add_parser("read")
     read_parser.add_argument("file", help="File path relative to vault root")
+    read_group = read_parser.add_mutually_exclusive_group()
+    read_group.add_argument("--section", help="Only the section under this heading ('Heading' or 'Parent#Heading')")
+    read_group.add_argument("--lines", help="Only lines a:b (1-based, inclusive; 'a:' or ':b' for open ranges)")
 
     # Write
     write_parser = subparsers.add_parser("write")
     write_parser.add_argument("file", help="File path relative to vault root")
     write_parser.add_argument("--content", required=True, help="Content to write")
+    write_parser.add_argument("--if-mtime", type=int, help="Only write if the file's mtime_ns is still this (from a previous write or stat)")
+    write_parser.add_argument("--if-hash", help="Only write if the file's sha256 is still this")
 
     # Append
     append_parser = subparsers.add_parser("append")
     append_parser.add_argument("file", help="File path relative to vault root")
     append_parser.add_argument("--content", required=True, help="Content to append")
+    append_parser.add_argument("--if-mtime", type=int, help="Only append if the file's mtime_ns is still this")
+    append_parser.add_argument("--if-hash", help="Only append if the file's sha256 is still this")
+
+    # Patch
+    patch_parser = subparsers.add_parser("patch", help="Replace the content under one heading")
+    patch_parser.add_argument("file", help="File path relative to vault root")
+    patch_parser.add_argument("--section", required=True, help="Heading of the section ('Heading' or 'Parent#Heading')")
+    patch_parser.add_argument("--content", required=True, help="New section body (the heading line is kept)")
+    patch_parser.add_argument("--if-mtime", type=int, help="Only patch if the file's mtime_ns is still this")
+    patch_parser.add_argument("--if-hash", help="Only patch if the file's sha256 is still this")
+
+    # Stat
+    stat_parser = subparsers.add_parser("stat", help="Print size, mtime_ns and sha256 of a file (for --if-mtime/--if-hash)")
+    stat_parser.add_argument("file", help="File path relative to vault root")
+
+    # Apply
+    apply_parser = subparsers.add_parser("apply", help="Apply JSONL write/append/patch operations atomically as one batch")
+    apply_parser.add_argument("input", nargs="?", default="-", help="JSONL file of operations (default: stdin)")
+
+    # Move
+    move_parser = subparsers.add_parser("move", help="Move or rename notes, attachments or folders and update links to them")
+    move_parser.add_argument("paths", nargs="+", metavar="PATH", help="Source path(s) followed by the destination (relative to vault)")
+    move_parser.add_argument("--dry-run", action="store_true", help="Report what would move and which notes would be rewritten, without changing anything")
 
     # List
     list_parser = subparsers.add_parser("list")
     list_parser.add_argument("path", nargs="?", default=".", help="Directory to list (relative to vault)")
+    list_parser.add_argument("-r", "--recursive", action="store_true", help="List the whole tree, not just one level")
+    list_parser.add_argument("--max-depth", type=int, help="Descend at most N levels (1 = direct children; implies --recursive)")
+    list_parser.add_argument("--include", action="append", default=[], help="Only list files matching this glob (repeatable; matched against the path if it contains '/')")
+    list_parser.add_argument("--exclude", action="append", default=[], help="Skip files and folders matching this glob (repeatable)")
+    list_parser.add_argument("--no-ignore", action="store_true", help="Also list paths hidden by .gitignore or Obsidian's excluded files")
+    list_parser.add_argument("--offset", type=int, default=0, help="Skip the first N entries")
+    list_parser.add_argument("--limit", type=int, help="List at most N entries")
+    list_parser.add_argument("--json", action="store_true", help="Print entries with size and mtime_ns as JSON")
 
     # Search
     search_parser = subparsers.add_parser("search")
-    search_parser.add_argument("query", help="String to search for")
+    search_parser.add_argument("query", help="Search terms; quote phrases, join alternatives with OR")
+    search_parser.add_argument("--limit", type=int, default=20, help="Maximum number of ranked results (default: 20)")
+    search_parser.add_argument("--no-index", action="store_true", help="Brute-force substring scan even if an index exists")
+    search_parser.add_argument("--stream", action="store_true", help="Scan notes line by line and emit matches as JSON lines (implied by the options below)")
+    search_parser.add_argument("--regex", action="store_true", help="Treat the query as a regular expression")
+    search_parser.add_argument("-i", "--ignore-case", action="store_true", help="Case-insensitive matching")
+    search_parser.add_argument("-C", "--context", type=int, default=0, help="Lines of context around each match")
+    search_parser.add_argument("--max-results", type=int, help="Stop after N matching lines")
+
+    # Index
+    index_parser = subparsers.add_parser("index")
+    index_parser.add_argument("--rebuild", action="store_true", help="Discard the existing index and rebuild it")
+
+    # Resolve
+    resolve_parser = subparsers.add_parser("resolve")
+    resolve_parser.add_argument("link", help="Wikilink target, e.g. 'Note' or 'folder/Note#Heading'")
+    resolve_parser.add_argument("--source", help="Note containing the link (breaks ties between same-named files)")
+
+    # Query
+    query_parser = subparsers.add_parser("query", help="Find notes by frontmatter properties")
+    query_parser.add_argument("query", help="e.g. 'tags contains project and status = draft'; operators = != < > <= >= contains exists, joined with and/or/not")
+    query_parser.add_argument("--path", default=".", help="Only notes under this folder (relative to vault)")
+    query_parser.add_argument("--limit", type=int, help="Print at most N notes")
+    query_parser.add_argument("--json", action="store_true", help="Print matching notes with their properties as JSON")
 
+    perf_trace.add_arguments(parser)
     args = parser.parse_args()
+    perf_trace.start_from_args(args, f"obsidian_fs {args.command}")
 
     try:
         if args.command == "read":
-            read_file(args.vault, args.file)
+            read_file(args.vault, args.file, args.section, args.lines)
         elif args.command == "write":
-            write_file(args.vault, args.file, args.content, mode='w')
+            write_file(args.vault, args.file, args.content, 'w', args.if_mtime, args.if_hash)
         elif args.command == "append":
-            write_file(args.vault, args.file, "\n" + args.content, mode='a')
+            write_file(args.vault, args.file, args.content, 'a', args.if_mtime, args.if_hash)
+        elif args.command == "patch":
+            patch_section(args.vault, args.file, args.section, args.content, args.if_mtime, args.if_hash)
+        elif args.command == "stat":
+            stat_file(args.vault, args.file)
+        elif args.command == "apply":
+            if args.input == "-":
+                apply_batch(args.vault, sys.stdin)
+            else:
+                with open(args.input, 'r', encoding='utf-8') as f:
+                    apply_batch(args.vault, f)
+        elif args.command == "move":
+            if len(args.paths) < 2:
+                raise ValueError("move needs a source and a destination")
+            move_paths(args.vault, args.paths[:-1], args.paths[-1], args.dry_run)
         elif args.command == "list":
-            list_files(args.vault, args.path)
+            list_files(args.vault, args.path, args.json, recursive=args.recursive, max_depth=args.max_depth,
+                       include=args.include, exclude=args.exclude, use_ignore=not args.no_ignore,
+                       offset=args.offset, limit=args.limit)
         elif args.command == "search":
-            search_files(args.vault, args.query)
+            if args.stream or args.regex or args.ignore_case or args.context or args.max_results:
+                stream_search(args.vault, args.query, args.regex, args.ignore_case,
+                              args.context, args.max_results)
+            elif SearchIndex.exists(args.vault) and not args.no_index:
+                search_index(args.vault, args.query, args.limit)
+            else:
+                search_files(args.vault, args.query)
+        elif args.command == "index":
+            build_index(args.vault, args.rebuild)
+        elif args.command == "resolve":
+            resolve_link(args.vault, args.link.split('|')[0].split('#')[0].strip(), args.source)
+        elif args.command == "query":
+            query_properties(args.vault, args.query, args.path, args.json, args.limit)
     except Exception as e:
         print(f"Error: {str(e)}")
         sys.exit(1)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+from array import array
+from collections.abc import Mapping
+
+
+class PathTable:
+    """Interned strings (vault paths or link targets), numbered 0, 1, 2... by first use.
+
+    Each distinct string is stored once; adjacency lists hold its id in an
+    array('I') (4 bytes per link) instead of a separate string per link.
+    Ids are never reused, so a table only grows (by the churn of a
+    long-running watch).
+    """
+
+    __slots__ = ("strings", "ids")
+
+    def __init__(self):
+        self.strings = []  # id -> string
+        self.ids = {}  # string -> id
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __getitem__(self, i):
+        return self.strings[i]
+
+    def intern(self, string):
+        """Id of `string`, adding it if new."""
+        i = self.ids.get(string)
+        if i is None:
+            i = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+        return i
+
+    def get(self, string):
+        """Id of `string`, or None if it was never added."""
+        return self.ids.get(string)
+
+    def canonical(self, string):
+        """The table's copy of `string` (added if new), so equal paths share one object."""
+        return self.strings[self.intern(string)]
+
+    def encode(self, strings):
+        return array('I', map(self.intern, strings))
+
+    def decode(self, ids):
+        return list(map(self.strings.__getitem__, ids))
+
+
+class PackedLists(Mapping):
+    """{row id: array of ids} with all rows back to back in one array (CSR).
+
+    Row i is `values[offsets[i]:offsets[i + 1]]`, so a row costs one
+    4-byte offset rather than an array object of its own. The rows are
+    built at once by `pack`; a row changed afterwards is copied out into
+    `changed` ({row id: array}), which incremental updates keep small.
+    Like a dict of non-empty lists, the mapping only has the rows that
+    hold ids.
+    """
+
+    __slots__ = ("offsets", "values", "changed")
+
+    def __init__(self):
+        self.offsets = array('I', [0])
+        self.values = array('I')
+        self.changed = {}
+
+    @classmethod
+    def pack(cls, size, rows, values):
+        """Rows 0..size-1 from aligned arrays: values[k] is appended to row rows[k], in order."""
+        packed = cls()
+        offsets = array('I', bytes(4 * (size + 1)))
+        for row in rows:
+            offsets[row + 1] += 1
+        for i in range(size):
+            offsets[i + 1] += offsets[i]
+        fill = offsets[:-1]
+        packed_values = array('I', bytes(4 * len(values)))
+        for row, value in zip(rows, values):
+            packed_values[fill[row]] = value
+            fill[row] += 1
+        packed.offsets = offsets
+        packed.values = packed_values
+        return packed
+
+    def get(self, row, default=None):
+        ids = self.changed.get(row)
+        if ids is None:
+            if row is None or not 0 <= row < len(self.offsets) - 1:
+                return default
+            ids = self.values[self.offsets[row]:self.offsets[row + 1]]
+        return ids if ids else default
+
+    def __getitem__(self, row):
+        ids = self.get(row)
+        if ids is None:
+            raise KeyError(row)
+        return ids
+
+    def __contains__(self, row):
+        return self.get(row) is not None
+
+    def __iter__(self):
+        offsets, changed = self.offsets, self.changed
+        size = len(offsets) - 1
+        for row in range(size):
+            ids = changed.get(row)
+            if (offsets[row] != offsets[row + 1]) if ids is None else ids:
+                yield row
+        yield from sorted(row for row, ids in changed.items() if row >= size and ids)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def _row(self, row):
+        ids = self.changed.get(row)
+        if ids is None:
+            ids = self.changed[row] = array('I', self.get(row, ()))
+        return ids
+
+    def append(self, row, value):
+        self._row(row).append(value)
+
+    def remove(self, row, value):
+        self._row(row).remove(value)
+
+
+class IdListView(Mapping):
+    """Read-only {key: [strings]} view of a {key: array of ids} mapping, decoded through a table.
+
+    With a `keys` table the mapping is keyed by that table's ids, and the
+    view by its strings.
+    """
+
+    __slots__ = ("_data", "_table", "_keys")
+
+    def __init__(self, data, table, keys=None):
+        self._data = data
+        self._table = table
+        self._keys = keys
+
+    def __getitem__(self, key):
+        if self._keys is not None:
+            key = self._keys.get(key)
+        return self._table.decode(self._data[key])
+
+    def __contains__(self, key):
+        if self._keys is not None:
+            key = self._keys.get(key)
+        return key in self._data
+
+    def __iter__(self):
+        if self._keys is not None:
+            return map(self._keys.__getitem__, self._data)
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class FieldView(Mapping):
+    """Read-only {key: value} view of one field of __slots__ records, hiding empty values."""
+
+    __slots__ = ("_records", "_field")
+
+    def __init__(self, records, field):
+        self._records = records
+        self._field = field
+
+    def __getitem__(self, key):
+        value = getattr(self._records[key], self._field)
+        if not value:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        record = self._records.get(key)
+        return record is not None and bool(getattr(record, self._field))
+
+    def __iter__(self):
+        field = self._field
+        return (key for key, record in self._records.items() if getattr(record, field))
+
+    def __len__(self):
+        return sum(1 for _ in self)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import time
+import heapq
+import atexit
+import threading
+import contextlib
+from collections import defaultdict
+
+# Reads kept for the "slowest reads" list, and the shortest read that also
+# becomes its own event in the trace (faster ones are only counted)
+SLOWEST_READS = 20
+READ_EVENT_SECONDS = 0.001
+# Events kept for the trace file; later spans still count in the summary
+MAX_EVENTS = 500000
+
+_tracer = None  # the active Tracer, or None when tracing is off (the default)
+_NULL = contextlib.nullcontext()
+
+
+class Tracer:
+    """Spans, file reads and counters of one run, as Chrome trace events and a summary.
+
+    Spans are complete ("X") events timed with perf_counter; per span name
+    the calls, total and longest time are kept (nested spans count in their
+    parents too). Safe to use from several threads.
+    """
+
+    def __init__(self, slowest=SLOWEST_READS):
+        self.origin = time.perf_counter()
+        self.wall = None  # seconds, once finished
+        self.events = []
+        self.dropped = 0
+        self.phases = {}  # span name -> [calls, seconds, max seconds]
+        self.counters = defaultdict(int)
+        self.reads = []  # min-heap of the slowest reads: (seconds, path, bytes)
+        self.slowest = slowest
+        self._tids = {}
+        self._lock = threading.Lock()
+
+    def _event(self, name, cat, start, seconds, args):
+        if len(self.events) >= MAX_EVENTS:
+            self.dropped += 1
+            return
+        tid = self._tids.setdefault(threading.get_ident(), len(self._tids) + 1)
+        event = {"name": name, "cat": cat, "ph": "X", "pid": os.getpid(), "tid": tid,
+                 "ts": round((start - self.origin) * 1e6, 3), "dur": round(seconds * 1e6, 3)}
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def _phase(self, name, seconds):
+        phase = self.phases.get(name)
+        if phase is None:
+            self.phases[name] = [1, seconds, seconds]
+        else:
+            phase[0] += 1
+            phase[1] += seconds
+            phase[2] = max(phase[2], seconds)
+
+    def add_span(self, name, start, seconds, args=None):
+        with self._lock:
+            self._phase(name, seconds)
+            self._event(name, "phase", start, seconds, args)
+
+    @contextlib.contextmanager
+    def span(self, name, args=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, time.perf_counter() - start, args)
+
+    def read(self, path, size, seconds):
+        """Count one file read of `size` bytes that took `seconds`."""
+        with self._lock:
+            self.counters["files_read"] += 1
+            self.counters["bytes_read"] += size
+            self._phase("read", seconds)
+            item = (seconds, str(path), size)
+            if len(self.reads) < self.slowest:
+                heapq.heappush(self.reads, item)
+            elif item > self.reads[0]:
+                heapq.heapreplace(self.reads, item)
+            if seconds >= READ_EVENT_SECONDS:
+                self._event("read", "read", time.perf_counter() - seconds, seconds,
+                            {"path": str(path), "bytes": size})
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def finish(self, name):
+        """Stop the clock and record the whole run as span `name`."""
+        self.wall = time.perf_counter() - self.origin
+        with self._lock:
+            self._event(name, "run", self.origin, self.wall, {"argv": sys.argv[1:]})
+
+    def summary(self):
+        wall = self.wall if self.wall is not None else time.perf_counter() - self.origin
+        return {
+            "wall_ms": round(wall * 1000, 3),
+            "phases": {name: {"calls": calls, "total_ms": round(total * 1000, 3), "max_ms": round(longest * 1000, 3)}
+                       for name, (calls, total, longest) in self.phases.items()},
+            "counters": dict(self.counters),
+            "slowest_reads": [{"path": path, "ms": round(seconds * 1000, 3), "bytes": size}
+                              for seconds, path, size in sorted(self.reads, reverse=True)],
+            "dropped_events": self.dropped,
+        }
+
+    def trace_json(self):
+        """The run in Chrome's trace-event format (chrome://tracing, Perfetto)."""
+        meta = [{"name": "process_name", "ph": "M", "pid": os.getpid(), "tid": 0,
+                 "args": {"name": os.path.basename(sys.argv[0]) or "python"}}]
+        return {"traceEvents": meta + sorted(self.events, key=lambda e: e["ts"]),
+                "displayTimeUnit": "ms", "otherData": self.summary()}
+
+    def write_table(self, stream):
+        summary = self.summary()
+        stream.write(f"Profile: {summary['wall_ms']:.1f} ms wall\n")
+        if summary["phases"]:
+            stream.write(f"{'span':<24}{'calls':>9}{'total ms':>12}{'max ms':>11}\n")
+        for name, phase in sorted(summary["phases"].items(), key=lambda item: -item[1]["total_ms"]):
+            stream.write(f"{name:<24}{phase['calls']:>9}{phase['total_ms']:>12.1f}{phase['max_ms']:>11.1f}\n")
+        counters = dict(summary["counters"])
+        if counters.get("files_read"):
+            stream.write(f"Read: {counters.pop('files_read')} files, {counters.pop('bytes_read', 0) / 1e6:.1f} MB\n")
+        if counters:
+            stream.write("Counts: " + ", ".join(f"{name} {n}" for name, n in sorted(counters.items())) + "\n")
+        if summary["slowest_reads"]:
+            stream.write("Slowest reads:\n")
+            for read in summary["slowest_reads"]:
+                stream.write(f"{read['ms']:>10.1f} ms {read['bytes'] / 1e3:>10.1f} KB  {read['path']}\n")
+        if self.dropped:
+            stream.write(f"({self.dropped} events beyond {MAX_EVENTS} left out of the trace)\n")
+
+
+def enabled():
+    return _tracer is not None
+
+
+def span(name, **args):
+    """Context manager timing its body as span `name` (does nothing when tracing is off)."""
+    return _tracer.span(name, args or None) if _tracer is not None else _NULL
+
+
+def add_span(name, start, **args):
+    """Record span `name` from perf_counter() value `start` until now."""
+    if _tracer is not None:
+        _tracer.add_span(name, start, time.perf_counter() - start, args or None)
+
+
+def record_read(path, size, seconds):
+    if _tracer is not None:
+        _tracer.read(path, size, seconds)
+
+
+def count(name, n=1):
+    if _tracer is not None:
+        _tracer.count(name, n)
+
+
+def add_arguments(parser):
+    parser.add_argument("--profile", action="store_true",
+                        help="When done, print time per phase, files and bytes read and the slowest reads to stderr")
+    parser.add_argument("--trace-out", metavar="FILE",
+                        help="Write a Chrome trace-event JSON of the run (open in chrome://tracing or ui.perfetto.dev)")
+
+
+def start_from_args(args, name):
+    """Start tracing if --profile or --trace-out was given; the report is written at exit.
+
+    Reads done in worker processes are not recorded.
+    """
+    global _tracer
+    if not (args.profile or args.trace_out):
+        return None
+    _tracer = Tracer()
+    atexit.register(_finish, _tracer, name, args.profile, args.trace_out)
+    return _tracer
+
+
+def _finish(tracer, name, profile, trace_out):
+    global _tracer
+    _tracer = None
+    tracer.finish(name)
+    if trace_out:
+        try:
+            with open(trace_out, 'w', encoding='utf-8') as f:
+                json.dump(tracer.trace_json(), f, ensure_ascii=False)
+        except OSError as e:
+            print(f"Error: cannot write trace: {e}", file=sys.stderr)
+    if profile:
+        tracer.write_table(sys.stderr)
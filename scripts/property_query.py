@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+import os
+import re
+import json
+
+from frontmatter import note_tags, read_frontmatter
+from vault_index import VaultIndex, stat_key
+
+# Query tokens: quoted strings, comparison operators, parentheses and words
+TOKEN_RE = re.compile(r'''\s*(?:(?P<string>"(?:[^"\\]|\\.)*"|'[^']*')|(?P<op><=|>=|!=|=|<|>)|(?P<paren>[()])|(?P<word>[^\s()<>=!"']+))''')
+WORD_OPERATORS = ("contains", "exists")
+
+
+def _tokenize(text):
+    tokens, pos = [], 0
+    text = text.strip()
+    while pos < len(text):
+        match = TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise ValueError(f"Invalid query near: {text[pos:]}")
+        pos = match.end()
+        if match.group('string'):
+            tokens.append(('value', match.group('string')[1:-1].replace('\\"', '"')))
+        elif match.group('op'):
+            tokens.append(('op', match.group('op')))
+        elif match.group('paren'):
+            tokens.append((match.group('paren'), match.group('paren')))
+        else:
+            word = match.group('word')
+            lowered = word.lower()
+            if lowered in ('and', 'or', 'not'):
+                tokens.append((lowered, lowered))
+            elif lowered in WORD_OPERATORS:
+                tokens.append(('op', lowered))
+            else:
+                tokens.append(('value', word))
+    return tokens
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _text(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return '' if value is None else str(value).casefold()
+
+
+def _equals(value, wanted):
+    number, wanted_number = _number(value), _number(wanted)
+    if number is not None and wanted_number is not None:
+        return number == wanted_number
+    return _text(value) == _text(wanted)
+
+
+def _compare(value, op, wanted):
+    number, wanted_number = _number(value), _number(wanted)
+    if number is not None and wanted_number is not None:
+        a, b = number, wanted_number
+    elif value is None:
+        return False
+    else:
+        a, b = _text(value), _text(wanted)  # ISO dates compare as text
+    return {'<': a < b, '>': a > b, '<=': a <= b, '>=': a >= b}[op]
+
+
+def _values(properties, key):
+    """Values of a property as a list ([] when absent), tags without '#'."""
+    if key in ('tags', 'tag'):
+        return note_tags(properties) or ([None] if key in properties else [])
+    if key not in properties:
+        return []
+    value = properties[key]
+    return value if isinstance(value, list) else [value]
+
+
+def _condition(key, op, wanted):
+    """Predicate over a note's casefolded-key properties for `key op wanted`."""
+    if op == 'exists':
+        return lambda props: bool(_values(props, key))
+    if op == 'contains':
+        wanted_text = _text(wanted).lstrip('#') if key in ('tags', 'tag') else _text(wanted)
+
+        def contains(props):
+            if key in ('tags', 'tag'):  # a parent tag also matches its nested tags
+                return any(_text(v) == wanted_text or _text(v).startswith(wanted_text + '/')
+                           for v in _values(props, key))
+            value = props.get(key)
+            if isinstance(value, str):
+                return wanted_text in value.casefold()
+            return any(_text(v) == wanted_text for v in _values(props, key))
+        return contains
+    if op == '=':
+        return lambda props: any(_equals(v, wanted) for v in _values(props, key))
+    if op == '!=':
+        return lambda props: not any(_equals(v, wanted) for v in _values(props, key))
+    return lambda props: any(_compare(v, op, wanted) for v in _values(props, key))
+
+
+class _QueryParser:
+    """Recursive descent over: or > and > not > (group) | key [op value]."""
+
+    def __init__(self, text):
+        self.tokens = _tokenize(text)
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def take(self, kind):
+        if self.peek() != kind:
+            found = self.tokens[self.pos][1] if self.pos < len(self.tokens) else "end of query"
+            raise ValueError(f"Invalid query: expected {kind}, found '{found}'")
+        self.pos += 1
+        return self.tokens[self.pos - 1][1]
+
+    def parse(self):
+        if not self.tokens:
+            raise ValueError("Empty query")
+        predicate = self.disjunction()
+        if self.pos < len(self.tokens):
+            raise ValueError(f"Invalid query: unexpected '{self.tokens[self.pos][1]}'")
+        return predicate
+
+    def disjunction(self):
+        terms = [self.conjunction()]
+        while self.peek() == 'or':
+            self.pos += 1
+            terms.append(self.conjunction())
+        return terms[0] if len(terms) == 1 else lambda props: any(t(props) for t in terms)
+
+    def conjunction(self):
+        factors = [self.factor()]
+        while self.peek() == 'and':
+            self.pos += 1
+            factors.append(self.factor())
+        return factors[0] if len(factors) == 1 else lambda props: all(f(props) for f in factors)
+
+    def factor(self):
+        if self.peek() == 'not':
+            self.pos += 1
+            inner = self.factor()
+            return lambda props: not inner(props)
+        if self.peek() == '(':
+            self.pos += 1
+            inner = self.disjunction()
+            self.take(')')
+            return inner
+        key = self.take('value').casefold()
+        if self.peek() != 'op':
+            return _condition(key, 'exists', None)
+        op = self.take('op')
+        if op == 'exists':
+            return _condition(key, op, None)
+        return _condition(key, op, self.take('value'))
+
+
+def compile_query(text):
+    """Turn a property query into a predicate over a note's properties.
+
+    `key = value`, `!=`, `<`, `>`, `<=`, `>=` (numeric when both sides are
+    numbers, otherwise case-insensitive text), `key contains value` (list
+    element, or substring of a text property), `key exists` or a bare
+    `key`; combined with `and`, `or`, `not` and parentheses. Property names
+    are case-insensitive and `tags` also matches inline-list and `#tag`
+    spellings (`tags contains area` matches `area/work` too). List
+    properties match when any element does.
+    """
+    predicate = _QueryParser(text).parse()
+    return lambda properties: predicate({str(k).casefold(): v for k, v in properties.items()})
+
+
+def vault_properties(vault_root, path=".", use_index=True):
+    """Frontmatter of every note under `path` as {vault path: properties}.
+
+    Properties are cached in the vault's property index keyed by stat, so
+    only new or changed notes are opened; a full-vault walk also drops
+    rows of deleted notes.
+    """
+    vault_root = os.path.abspath(vault_root)
+    start = os.path.abspath(os.path.join(vault_root, path))
+    index = VaultIndex(vault_root, filename="properties.sqlite") if use_index else None
+    notes = {}  # rel_path -> (full path, stat), in walk order
+    properties = {}
+    try:
+        for root, dirs, files in os.walk(start):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+            for file in sorted(files):
+                if not file.endswith('.md') or file.startswith('.'):
+                    continue
+                full_path = os.path.join(root, file)
+                rel_path = os.path.relpath(full_path, vault_root).replace(os.sep, '/')
+                try:
+                    notes[rel_path] = (full_path, os.stat(full_path))
+                except OSError:
+                    continue
+        # Fresh rows come in one query rather than one per note
+        cached = {}
+        if index:
+            cached = {rel_path: json.loads(raw) for rel_path, raw in
+                      index.fresh_rows({rel_path: stat_key(st) for rel_path, (_, st) in notes.items()})}
+        for rel_path, (full_path, st) in notes.items():
+            props = cached.pop(rel_path, None)
+            if props is None:
+                try:
+                    props = read_frontmatter(full_path, st)
+                except OSError:
+                    continue
+                if index:
+                    index.store(rel_path, st, props)
+            properties[rel_path] = props
+        if index:
+            index.save(prune=start == vault_root)
+    finally:
+        if index:
+            index.close()
+    return properties
+
+
+def query_notes(vault_root, query, path=".", use_index=True):
+    """[(vault path, properties)] of the notes whose frontmatter matches `query`."""
+    predicate = compile_query(query)
+    return [(rel_path, props) for rel_path, props in vault_properties(vault_root, path, use_index).items()
+            if predicate(props)]
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+import os
+import re
+import math
+import operator
+import sqlite3
+from collections import Counter
+
+import md_tokens
+from vault_index import INDEX_DIRNAME, index_dir, stat_key
+
+SCHEMA_VERSION = 3
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Kana, CJK ideographs (incl. extension A and compatibility) and Hangul
+_CJK = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af'
+# A token is either a run of CJK characters or a run of other word characters
+TOKEN_RE = re.compile(f'([{_CJK}]+)|([^\\W{_CJK}]+)')
+# CJK runs whose characters are not already unigram tokens
+CJK_RUN_RE = re.compile(f'[{_CJK}]{{2,}}')
+QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def tokenize(text):
+    """Split text into index terms.
+
+    Latin words become one casefolded term each; CJK runs, which have no
+    word boundaries, become overlapping character bigrams (a lone CJK
+    character is kept as a unigram).
+    """
+    tokens = []
+    for cjk, word in TOKEN_RE.findall(text.casefold()):
+        if word:
+            tokens.append(word)
+        elif len(cjk) == 1:
+            tokens.append(cjk)
+        else:
+            tokens.extend(map(operator.add, cjk, cjk[1:]))
+    return tokens
+
+
+def tag_term(tag):
+    """Index term of a tag; '#' keeps it apart from the word terms."""
+    return '#' + tag.casefold()
+
+
+class QueryTerm:
+    """One query word or quoted phrase, with the index terms it implies.
+
+    An unquoted `#tag` matches notes carrying that tag (inline or in the
+    frontmatter) rather than the word.
+    """
+
+    def __init__(self, text, quoted=False):
+        self.text = text.casefold()
+        if not quoted and len(text) > 1 and text.startswith('#'):
+            self.tokens = [tag_term(text[1:])]
+            self.needs_verify = False
+            return
+        self.tokens = tokenize(text)
+        # Several tokens (phrase, hyphenated word, CJK run longer than a
+        # bigram) only match where the text appears contiguously
+        self.needs_verify = quoted or len(self.tokens) > 1
+
+
+def parse_query(query):
+    """Parse a query into OR-ed clauses of AND-ed terms.
+
+    `a b` matches notes containing both, `a OR b` either, `"a b"` the exact
+    phrase. AND may be written explicitly.
+    """
+    clauses = [[]]
+    for quoted, word in QUERY_RE.findall(query):
+        if word == 'OR':
+            clauses.append([])
+            continue
+        if word == 'AND':
+            continue
+        term = QueryTerm(quoted or word, quoted=bool(quoted))
+        if term.tokens:
+            clauses[-1].append(term)
+    return [c for c in clauses if c]
+
+
+def _read_text(full_path):
+    with open(full_path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+class SearchIndex:
+    """Persistent inverted index over the markdown notes of a vault."""
+
+    FILENAME = "search_index.sqlite"
+
+    def __init__(self, vault_root, rebuild=False):
+        self.vault_root = os.path.abspath(vault_root)
+        self.path = os.path.join(index_dir(self.vault_root), self.FILENAME)
+        if rebuild and os.path.exists(self.path):
+            os.remove(self.path)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._ensure_schema()
+        self._term_cache = {}
+
+    @classmethod
+    def exists(cls, vault_root):
+        return os.path.exists(os.path.join(os.path.abspath(vault_root), INDEX_DIRNAME, cls.FILENAME))
+
+    def _ensure_schema(self):
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            for table in ("docs", "terms", "postings"):
+                self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS docs (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                ino INTEGER NOT NULL,
+                length INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS terms (
+                id INTEGER PRIMARY KEY,
+                term TEXT UNIQUE NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term_id INTEGER NOT NULL,
+                doc_id INTEGER NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term_id, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+        """)
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    # Indexing
+
+    def _walk_notes(self):
+        for root, dirs, files in os.walk(self.vault_root):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for file in files:
+                if file.endswith('.md') and not file.startswith('.'):
+                    full_path = os.path.join(root, file)
+                    yield os.path.relpath(full_path, self.vault_root), full_path
+
+    def update(self):
+        """Bring the index in line with the vault; only changed notes are read.
+
+        Returns (added, updated, removed) counts.
+        """
+        known = {path: ((mtime, size, ino), doc_id) for doc_id, path, mtime, size, ino
+                 in self.conn.execute("SELECT id, path, mtime_ns, size, ino FROM docs")}
+        added = updated = 0
+        with self.conn:
+            for rel_path, full_path in self._walk_notes():
+                entry = known.pop(rel_path, None)
+                try:
+                    st = os.stat(full_path)
+                    if entry is not None and entry[0] == stat_key(st):
+                        continue
+                    scan = md_tokens.scan_file(full_path, st)
+                except OSError:
+                    if entry is not None:
+                        # Unreadable now: dropped below like a deleted note
+                        known[rel_path] = entry
+                    continue
+                if entry is not None:
+                    self._delete_doc(entry[1])
+                    updated += 1
+                else:
+                    added += 1
+                self._add_doc(rel_path, st, scan)
+            for _, doc_id in known.values():
+                self._delete_doc(doc_id)
+        return added, updated, len(known)
+
+    def update_paths(self, paths):
+        """Re-index only the given notes; paths that no longer exist are dropped."""
+        with self.conn:
+            for rel_path in paths:
+                if not rel_path.endswith('.md'):
+                    continue
+                full_path = os.path.join(self.vault_root, rel_path)
+                row = self.conn.execute(
+                    "SELECT id, mtime_ns, size, ino FROM docs WHERE path = ?", (rel_path,)).fetchone()
+                try:
+                    st = os.stat(full_path)
+                    if row is not None and row[1:] == stat_key(st):
+                        continue
+                    scan = md_tokens.scan_file(full_path, st)
+                except OSError:
+                    st = None
+                if row is not None:
+                    self._delete_doc(row[0])
+                if st is not None:
+                    self._add_doc(rel_path, st, scan)
+
+    def _add_doc(self, rel_path, st, scan):
+        """Index one note from its md_tokens scan (shared with the link audit)."""
+        text = scan.data.decode('utf-8', 'replace')
+        counts = Counter(tokenize(text))
+        counts.update(tag_term(t.value) for t in scan.tokens if t.kind == md_tokens.TAG)
+        length = sum(counts.values())
+        # Characters of CJK runs are terms too, so a one-character query is
+        # a point lookup; they do not count towards the BM25 length
+        counts.update(char for run in CJK_RUN_RE.findall(text.casefold()) for char in run)
+        mtime, size, ino = stat_key(st)
+        doc_id = self.conn.execute(
+            "INSERT INTO docs (path, mtime_ns, size, ino, length) VALUES (?, ?, ?, ?, ?)",
+            (rel_path, mtime, size, ino, length),
+        ).lastrowid
+        term_ids = self._term_ids(counts)
+        self.conn.executemany(
+            "INSERT INTO postings (term_id, doc_id, tf) VALUES (?, ?, ?)",
+            [(term_ids[t], doc_id, tf) for t, tf in counts.items()],
+        )
+
+    def _delete_doc(self, doc_id):
+        self.conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        self.conn.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+
+    def _term_ids(self, terms):
+        """Map terms to ids, creating missing ones; ids are cached per instance."""
+        missing = [t for t in terms if t not in self._term_cache]
+        if missing:
+            self.conn.executemany("INSERT OR IGNORE INTO terms (term) VALUES (?)",
+                                  [(t,) for t in missing])
+            # Stay below SQLite's host parameter limit
+            for i in range(0, len(missing), 500):
+                batch = missing[i:i + 500]
+                marks = ",".join("?" * len(batch))
+                self._term_cache.update(self.conn.execute(
+                    f"SELECT term, id FROM terms WHERE term IN ({marks})", batch))
+        return self._term_cache
+
+    # Querying
+
+    def _postings(self, token):
+        """doc_id -> tf for one token (empty dict if never seen)."""
+        rows = self.conn.execute(
+            "SELECT p.doc_id, p.tf FROM terms t JOIN postings p ON p.term_id = t.id "
+            "WHERE t.term = ?", (token,))
+        return dict(rows)
+
+    def search(self, query, limit=20):
+        """Return [(rel_path, score)] for a query, best BM25 score first."""
+        clauses = parse_query(query)
+        if not clauses:
+            return []
+        n_docs, total_len = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs").fetchone()
+        if not n_docs:
+            return []
+        avg_len = total_len / n_docs
+
+        postings = {}
+        for clause in clauses:
+            for term in clause:
+                for token in term.tokens:
+                    if token not in postings:
+                        postings[token] = self._postings(token)
+
+        # Candidate docs: any clause whose tokens all occur
+        candidates = {}
+        for clause in clauses:
+            tokens = [t for term in clause for t in term.tokens]
+            docs = set(postings[tokens[0]])
+            for token in tokens[1:]:
+                docs &= postings[token].keys()
+            for doc_id in docs:
+                candidates.setdefault(doc_id, []).append(clause)
+        if not candidates:
+            return []
+
+        meta = self._doc_meta(candidates)
+
+        def score(doc_id, matched):
+            length = meta[doc_id][1]
+            total = 0.0
+            for token in {t for clause in matched for term in clause for t in term.tokens}:
+                tf = postings[token][doc_id]
+                df = len(postings[token])
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                total += idf * tf * (BM25_K1 + 1) / (
+                    tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len))
+            return total
+
+        # Rank on the candidate clauses first: verifying a phrase can only
+        # drop clauses (and lower the score), so notes are read in that order
+        # and only until no remaining candidate can reach the top `limit`
+        ranked = sorted(((-score(doc_id, matched), meta[doc_id][0], doc_id, matched)
+                         for doc_id, matched in candidates.items()), key=lambda r: r[:2])
+        results = []
+        for bound, rel_path, doc_id, matched in ranked:
+            if limit and len(results) >= limit:
+                results.sort()
+                if results[limit - 1] < (bound, rel_path):
+                    break
+                del results[limit:]
+            verified = self._verify(rel_path, matched)
+            if not verified:
+                continue
+            results.append((-score(doc_id, verified) if verified is not matched else bound, rel_path))
+
+        results.sort()
+        results = [(rel_path, -neg) for neg, rel_path in results]
+        return results[:limit] if limit else results
+
+    def _doc_meta(self, doc_ids):
+        meta = {}
+        doc_ids = list(doc_ids)
+        for i in range(0, len(doc_ids), 500):
+            batch = doc_ids[i:i + 500]
+            marks = ",".join("?" * len(batch))
+            for doc_id, path, length in self.conn.execute(
+                    f"SELECT id, path, length FROM docs WHERE id IN ({marks})", batch):
+                meta[doc_id] = (path, length)
+        return meta
+
+    def _verify(self, rel_path, clauses):
+        """Drop clauses whose phrases do not appear contiguously in the note."""
+        if not any(term.needs_verify for clause in clauses for term in clause):
+            return clauses
+        try:
+            text = _read_text(os.path.join(self.vault_root, rel_path)).casefold()
+        except OSError:
+            return []
+        return [c for c in clauses
+                if all(not term.needs_verify or term.text in text for term in c)]
+
+    def snippets(self, rel_path, query, max_lines=3, width=120):
+        """Return [(line_no, text)] of the first lines matching any query term."""
+        words = [term.text for clause in parse_query(query) for term in clause]
+        found = []
+        try:
+            with open(os.path.join(self.vault_root, rel_path), 'r',
+                      encoding='utf-8', errors='replace') as f:
+                for line_no, line in enumerate(f, 1):
+                    folded = line.casefold()
+                    hits = [folded.find(w) for w in words if w in folded]
+                    if not hits:
+                        continue
+                    line = line.strip()
+                    start = max(0, min(hits) - width // 3)
+                    found.append((line_no, line[start:start + width]))
+                    if len(found) >= max_lines:
+                        break
+        except OSError:
+            pass
+        return found
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+from collections import Counter
+
+from audit_vault import VaultAuditor
+from link_graph import LinkGraph
+
+# Queries answered by VaultGraph.query, named like the Obsidian CLI commands
+QUERIES = ("backlinks", "links", "orphans", "unresolved", "tags")
+# Whole-graph analyses answered by VaultGraph.analyze (no Obsidian equivalent)
+ANALYSES = ("components", "pagerank", "hits", "neighbors", "path")
+
+
+class VaultGraph:
+    """Link and tag queries answered from the vault files, without Obsidian.
+
+    Built on a VaultAuditor scan, so notes come from the incremental link
+    index: `incoming` is the reverse adjacency (backlinks of a note cost
+    O(degree)), `outgoing` the forward one. An auditor kept up to date
+    elsewhere (vaultd) can be passed in and is queried as it changes.
+    """
+
+    def __init__(self, vault_root=None, auditor=None):
+        if auditor is None:
+            auditor = VaultAuditor(vault_root)
+            auditor.scan_vault(quiet=True)
+            auditor.identify_orphans()
+        auditor.resolve_links()
+        self.auditor = auditor
+        self._link_graph = None
+
+    @property
+    def link_graph(self):
+        """LinkGraph of the resolved links, built on first use."""
+        if self._link_graph is None:
+            self._link_graph = LinkGraph.from_auditor(self.auditor)
+        return self._link_graph
+
+    def note(self, file):
+        """Vault path of `file`, given as a path or as a link target ('Note')."""
+        file = file.replace('\\', '/')
+        if file in self.auditor.all_files:
+            return file
+        resolved = self.auditor.resolver.resolve(file)
+        if resolved is None:
+            raise FileNotFoundError(f"File not found: {file}")
+        return resolved
+
+    def backlinks(self, file):
+        return sorted(set(self.auditor.incoming.get(self.note(file), ())))
+
+    def links(self, file):
+        """Outgoing links of a note as [(target, resolved path or None)], in link order.
+
+        A file linked several times (under different spellings) is listed
+        once, with the first target used for it.
+        """
+        source = self.note(file)
+        resolve = self.auditor.resolver.resolve
+        links = {}
+        for target in self.auditor.outgoing.get(source, ()):
+            path = resolve(target, source)
+            links.setdefault(path or (None, target), (target, path))
+        return list(links.values())
+
+    def orphans(self):
+        return sorted(self.auditor.orphans)
+
+    def unresolved(self):
+        """Unresolved link targets mapped to the notes containing them."""
+        missing = {}
+        for source, targets in self.auditor.unresolved.items():
+            for target in targets:
+                missing.setdefault(target, set()).add(source)
+        return {target: sorted(sources) for target, sources in sorted(missing.items())}
+
+    def tags(self):
+        """Tags mapped to the number of notes using them, most used first."""
+        counts = Counter(tag for tags in self.auditor.tags.values() for tag in tags)
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+    def query(self, command, file=None):
+        """Run one query by name and return a JSON-serializable result."""
+        if command == "backlinks":
+            return {"file": self.note(file), "backlinks": self.backlinks(file)}
+        if command == "links":
+            return {"file": self.note(file),
+                    "links": [{"target": t, "path": p} for t, p in self.links(file)]}
+        if command == "orphans":
+            return {"orphans": self.orphans()}
+        if command == "unresolved":
+            return {"unresolved": self.unresolved()}
+        if command == "tags":
+            return {"tags": self.tags()}
+        raise ValueError(f"Unknown query: {command}")
+
+    def analyze(self, command, file=None, to=None, hops=1, direction=None, limit=20):
+        """Run one graph analysis by name and return a JSON-serializable result.
+
+        `limit` caps the listed components and scores (counts stay
+        complete); `direction` is out/in/both, following links forward
+        for `path` and either way for `neighbors` by default.
+        """
+        graph = self.link_graph
+        if command == "components":
+            components = graph.components()
+            return {"count": len(components),
+                    "components": [{"size": len(c), "notes": c} for c in components[:limit]]}
+        if command == "pagerank":
+            return {"pagerank": _top(graph.pagerank(), limit)}
+        if command == "hits":
+            hubs, authorities = graph.hits()
+            return {"hubs": _top(hubs, limit), "authorities": _top(authorities, limit)}
+        if command == "neighbors":
+            note = self.note(file)
+            found = graph.neighborhood(note, hops, direction or "both")
+            return {"file": note, "neighbors": [{"path": p, "hops": h} for p, h in found.items()]}
+        if command == "path":
+            source, target = self.note(file), self.note(to)
+            return {"from": source, "to": target,
+                    "path": graph.shortest_path(source, target, direction or "out")}
+        raise ValueError(f"Unknown analysis: {command}")
+
+
+def _top(scores, limit):
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    return [{"path": path, "score": round(score, 6)} for path, score in ranked]
+
+
+def format_result(command, result):
+    """Plain-text rendering of a query result, one item per line."""
+    if command == "backlinks":
+        return "\n".join(result["backlinks"]) or "No backlinks found."
+    if command == "links":
+        return "\n".join(link["path"] or f"{link['target']} (unresolved)"
+                         for link in result["links"]) or "No links found."
+    if command == "orphans":
+        return "\n".join(result["orphans"]) or "No orphans found."
+    if command == "unresolved":
+        return "\n".join(f"{target} (in: {', '.join(sources)})"
+                         for target, sources in result["unresolved"].items()) or "No unresolved links found."
+    if command == "tags":
+        return "\n".join(f"#{tag}\t{count}" for tag, count in result["tags"].items()) or "No tags found."
+    if command == "components":
+        lines = [f"{result['count']} components"]
+        for c in result["components"]:
+            lines.append(f"{c['size']}\t{', '.join(c['notes'][:5])}{' ...' if c['size'] > 5 else ''}")
+        return "\n".join(lines)
+    if command == "pagerank":
+        return "\n".join(f"{r['score']:.6f}\t{r['path']}" for r in result["pagerank"]) or "No notes found."
+    if command == "hits":
+        return "\n".join(["Hubs:"] + [f"{r['score']:.6f}\t{r['path']}" for r in result["hubs"]]
+                         + ["", "Authorities:"] + [f"{r['score']:.6f}\t{r['path']}" for r in result["authorities"]])
+    if command == "neighbors":
+        return "\n".join(f"{n['hops']}\t{n['path']}" for n in result["neighbors"]) or "No neighbors found."
+    if command == "path":
+        return " -> ".join(result["path"]) if result["path"] else f"No path from {result['from']} to {result['to']}."
+    raise ValueError(f"Unknown query: {command}")
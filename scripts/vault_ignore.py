@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+import os
+import re
+import json
+
+
+def _glob_regex(pattern):
+    """Regex body for a gitignore glob: `*`/`?` stay within one path segment, `**` spans them."""
+    out, i = [], 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('/**', i) and i + 3 == len(pattern):
+            out.append('/.*')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+            continue
+        ch = pattern[i]
+        if ch == '*':
+            out.append('[^/]*')
+        elif ch == '?':
+            out.append('[^/]')
+        elif ch == '[':
+            close = pattern.find(']', i + 2)
+            if close < 0:
+                out.append(re.escape(ch))
+            else:
+                body = pattern[i + 1:close]
+                if body[:1] == '!':
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = close
+        elif ch == '\\' and i + 1 < len(pattern):
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(ch))
+        i += 1
+    return ''.join(out)
+
+
+def parse_gitignore(text):
+    """Rules of a .gitignore as [(regex, negated, dirs only)].
+
+    A pattern containing a slash (other than a trailing one) is anchored to
+    the folder of the .gitignore; otherwise it matches at any depth.
+    """
+    rules = []
+    for line in text.splitlines():
+        line = line.rstrip('\r')
+        if not line.startswith('\\ '):
+            line = line.rstrip(' ')
+        if not line or line.startswith('#'):
+            continue
+        negated = line.startswith('!')
+        if negated:
+            line = line[1:]
+        elif line.startswith('\\!') or line.startswith('\\#'):
+            line = line[1:]
+        dirs_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            continue
+        anchored = '/' in line
+        body = _glob_regex(line.lstrip('/'))
+        rules.append((re.compile(('' if anchored else '(?:.*/)?') + body + r'\Z', re.S), negated, dirs_only))
+    return rules
+
+
+def obsidian_filters(vault_root):
+    """Obsidian's "Excluded files" (userIgnoreFilters in .obsidian/app.json).
+
+    Returns [(regex or None, prefix)]: `/.../` entries are regular
+    expressions, anything else matches paths starting with it, as in Obsidian.
+    """
+    try:
+        with open(os.path.join(vault_root, '.obsidian', 'app.json'), 'r', encoding='utf-8') as f:
+            filters = json.load(f).get('userIgnoreFilters') or []
+    except (OSError, ValueError, AttributeError):
+        return []
+    result = []
+    for item in filters:
+        if not isinstance(item, str) or not item:
+            continue
+        if len(item) > 2 and item.startswith('/') and item.endswith('/'):
+            try:
+                result.append((re.compile(item[1:-1]), None))
+            except re.error:
+                continue
+        else:
+            result.append((None, item))
+    return result
+
+
+class IgnoreRules:
+    """Decides which vault paths a listing hides: .gitignore files and Obsidian's excluded files.
+
+    .gitignore files are read lazily as the walk enters each folder
+    (`enter`), so rules of folders never visited cost nothing. Paths are
+    vault-relative with forward slashes.
+    """
+
+    def __init__(self, vault_root):
+        self.vault_root = os.path.abspath(vault_root)
+        self.filters = obsidian_filters(self.vault_root)
+        self._rules = {}  # folder -> rules of its .gitignore
+
+    def enter(self, rel_dir):
+        """Load the .gitignore of `rel_dir` and of its parents, if not done yet."""
+        parts = rel_dir.split('/') if rel_dir else []
+        for depth in range(len(parts) + 1):
+            folder = '/'.join(parts[:depth])
+            if folder in self._rules:
+                continue
+            try:
+                with open(os.path.join(self.vault_root, folder, '.gitignore'), 'r', encoding='utf-8') as f:
+                    self._rules[folder] = parse_gitignore(f.read())
+            except (OSError, UnicodeDecodeError):
+                self._rules[folder] = []
+
+    def ignored(self, rel_path, is_dir):
+        # Folders are tested with their trailing slash, so a filter "Archive/" hides the folder itself
+        filter_path = rel_path + '/' if is_dir else rel_path
+        for regex, prefix in self.filters:
+            if regex.search(filter_path) if regex is not None else filter_path.startswith(prefix):
+                return True
+        parent = rel_path.rpartition('/')[0]
+        parts = parent.split('/') if parent else []
+        result = False
+        # Deeper .gitignore files come later and win, as does the last matching line
+        for depth in range(len(parts) + 1):
+            folder = '/'.join(parts[:depth])
+            rules = self._rules.get(folder)
+            if not rules:
+                continue
+            relative = rel_path[len(folder) + 1:] if folder else rel_path
+            for regex, negated, dirs_only in rules:
+                if (is_dir or not dirs_only) and regex.match(relative):
+                    result = not negated
+        return result
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+import os
+import json
+import sqlite3
+
+# Hidden directory inside the vault holding all caches (skipped by every walker)
+INDEX_DIRNAME = ".knowledge-adapter"
+SCHEMA_VERSION = 4
+
+
+def index_dir(vault_root):
+    """Return (and create) the hidden cache directory of a vault."""
+    path = os.path.join(os.path.abspath(vault_root), INDEX_DIRNAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def stat_key(st):
+    """Signature used to decide whether a cached entry is still valid."""
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class VaultIndex:
+    """On-disk cache of per-file parse results, keyed by mtime/size/inode.
+
+    Nothing is loaded up front: rows are read one path at a time (`lookup`)
+    or, for a whole scan, streamed in one query (`fresh_rows`), so cached
+    data is never all held in memory. New or changed entries are buffered
+    and written back in a single transaction by `save`.
+    """
+
+    def __init__(self, vault_root, filename="audit_index.sqlite", rebuild=False):
+        self.path = os.path.join(index_dir(vault_root), filename)
+        if rebuild and os.path.exists(self.path):
+            os.remove(self.path)
+        # Long-lived owners (vaultd) use the index from worker threads under a lock
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._ensure_schema()
+
+        self.pending = {}
+        self.forgotten = set()
+        self.begin_scan()
+
+    def begin_scan(self):
+        """Reset the per-scan bookkeeping so an open index can serve another scan."""
+        self.seen = set()
+        self.hits = 0
+        self.misses = 0
+        self.removed = 0
+
+    def _ensure_schema(self):
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            # Cached data from another format is useless; start over
+            self.conn.execute("DROP TABLE IF EXISTS files")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY,"
+            " mtime_ns INTEGER NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " ino INTEGER NOT NULL,"
+            " data TEXT NOT NULL)"
+        )
+        self.conn.commit()
+
+    def lookup(self, rel_path, st):
+        """Return the cached data for a file, or None if missing or stale."""
+        raw = self.lookup_raw(rel_path, st)
+        return None if raw is None else json.loads(raw)
+
+    def lookup_raw(self, rel_path, st):
+        """Like lookup, but return the cached JSON text, for callers that can skip most rows unparsed."""
+        self.seen.add(rel_path)
+        row = self.conn.execute("SELECT mtime_ns, size, ino, data FROM files WHERE path = ?",
+                                (rel_path,)).fetchone()
+        if row is not None and row[:3] == stat_key(st):
+            self.hits += 1
+            return row[3]
+        self.misses += 1
+        return None
+
+    def fresh_rows(self, keys):
+        """Yield (rel_path, cached JSON text) for the files of `keys` ({rel_path: stat key}) whose row is fresh.
+
+        One pass over the table (in table order, not the order of `keys`),
+        holding a single row at a time; the files not yielded count as
+        misses once it is done.
+        """
+        self.seen.update(keys)
+        hits = 0
+        for rel_path, mtime, size, ino, data in self.conn.execute(
+                "SELECT path, mtime_ns, size, ino, data FROM files"):
+            if keys.get(rel_path) == (mtime, size, ino):
+                hits += 1
+                yield rel_path, data
+        self.hits += hits
+        self.misses += len(keys) - hits
+
+    def paths(self):
+        """Paths of all rows on disk."""
+        return [rel_path for rel_path, in self.conn.execute("SELECT path FROM files")]
+
+    def store(self, rel_path, st, data):
+        self.seen.add(rel_path)
+        self.pending[rel_path] = (stat_key(st), json.dumps(data, ensure_ascii=False))
+
+    def forget(self, rel_path):
+        """Drop a file that is known to be gone (used by incremental updates)."""
+        self.pending.pop(rel_path, None)
+        self.forgotten.add(rel_path)
+
+    def save(self, prune=True):
+        """Write buffered entries and drop rows for files no longer present.
+
+        With prune=False only explicitly forgotten rows are dropped, for
+        updates that did not look at the whole vault.
+        """
+        deleted = set(self.forgotten)
+        if prune:
+            deleted.update(p for p in self.paths() if p not in self.seen)
+        with self.conn:
+            self.removed = self.conn.executemany("DELETE FROM files WHERE path = ?",
+                                                 [(p,) for p in deleted]).rowcount
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files (path, mtime_ns, size, ino, data) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(p, key[0], key[1], key[2], data)
+                 for p, (key, data) in self.pending.items()],
+            )
+        self.pending = {}
+        self.forgotten = set()
+
+    def close(self):
+        self.conn.close()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "removed": self.removed}
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+import os
+import sys
+import time
+import errno
+import struct
+import select
+import ctypes
+import ctypes.util
+
+from vault_index import stat_key
+
+# inotify(7) event bits
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM
+              | IN_MOVED_TO | IN_CREATE | IN_DELETE)
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class PollingWatcher:
+    """Portable watcher: re-stats the vault every `interval` seconds.
+
+    Reports individual file paths whose mtime/size/inode changed, appeared
+    or disappeared since the previous poll.
+    """
+
+    def __init__(self, vault_root, interval=1.0):
+        self.vault_root = os.path.abspath(vault_root)
+        self.interval = interval
+        self.snapshot = self._snapshot()
+
+    def _snapshot(self):
+        snapshot = {}
+        for root, dirs, files in os.walk(self.vault_root):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for file in files:
+                if file.startswith('.'):
+                    continue
+                full_path = os.path.join(root, file)
+                try:
+                    snapshot[os.path.relpath(full_path, self.vault_root)] = stat_key(os.stat(full_path))
+                except OSError:
+                    pass
+        return snapshot
+
+    def poll(self):
+        """Return the paths changed since the previous poll, without waiting."""
+        current = self._snapshot()
+        previous, self.snapshot = self.snapshot, current
+        return {p for p in current.keys() | previous.keys() if current.get(p) != previous.get(p)}
+
+    def ready(self, timeout=None):
+        """Wait until the next poll is due (at most `timeout`); changes are only found by `poll`."""
+        time.sleep(self.interval if timeout is None else min(self.interval, timeout))
+        return True
+
+    def wait(self, timeout=None):
+        """Block until something changes (or `timeout` expires); return changed paths."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = self.poll()
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval if deadline is None
+                       else max(0, min(self.interval, deadline - time.monotonic())))
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Linux watcher using inotify through ctypes, one watch per directory.
+
+    Reports changed file paths; a created, deleted or moved directory is
+    reported as the directory path itself, and a queue overflow as '' (the
+    vault root), leaving it to the consumer to reconcile that subtree.
+    """
+
+    def __init__(self, vault_root, debounce=0.2):
+        self.vault_root = os.path.abspath(vault_root)
+        self.debounce = debounce
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        # IN_NONBLOCK / IN_CLOEXEC share their values with O_NONBLOCK / O_CLOEXEC
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+        self.dirs = {}  # watch descriptor -> vault-relative directory ('' is the root)
+        try:
+            self._watch_tree('')
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def _watch_tree(self, rel_dir):
+        top = os.path.join(self.vault_root, rel_dir)
+        for root, dirs, _ in os.walk(top):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            rel_root = os.path.relpath(root, self.vault_root)
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(root), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == errno.ENOENT:
+                    continue  # removed while we were walking
+                # ENOSPC means fs.inotify.max_user_watches is exhausted
+                raise OSError(err, f"inotify_add_watch({root}) failed: {os.strerror(err)}")
+            self.dirs[wd] = '' if rel_root == '.' else rel_root
+
+    def _unwatch_tree(self, rel_dir):
+        prefix = rel_dir + os.sep
+        for wd, path in list(self.dirs.items()):
+            if path == rel_dir or path.startswith(prefix):
+                self.libc.inotify_rm_watch(self.fd, wd)
+                del self.dirs[wd]
+
+    def wait(self, timeout=None):
+        """Block until something changes (or `timeout` expires); return changed paths.
+
+        Events arriving within `debounce` seconds of each other are coalesced
+        into one batch, so a burst of writes is applied once.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        while True:
+            changed |= self._drain()
+            ready, _, _ = select.select([self.fd], [], [], self.debounce)
+            if not ready:
+                return changed
+
+    def ready(self, timeout=None):
+        """Block until events are pending (or `timeout` expires) without consuming them.
+
+        Returns True once a burst of events has had `debounce` seconds to settle.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if ready:
+            time.sleep(self.debounce)
+        return bool(ready)
+
+    def poll(self):
+        """Return the paths of the events pending now, without waiting."""
+        return self._drain()
+
+    def _drain(self):
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length]
+                offset += EVENT_HEADER.size + length
+                self._handle_event(wd, mask, os.fsdecode(name.split(b'\0', 1)[0]), changed)
+
+    def _handle_event(self, wd, mask, name, changed):
+        if mask & IN_Q_OVERFLOW:
+            changed.add('')  # events were lost: reconcile the whole vault
+            return
+        if mask & IN_IGNORED:
+            self.dirs.pop(wd, None)
+            return
+        rel_dir = self.dirs.get(wd)
+        if rel_dir is None or not name or name.startswith('.'):
+            return
+        rel_path = os.path.join(rel_dir, name) if rel_dir else name
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                self._watch_tree(rel_path)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self._unwatch_tree(rel_path)
+            else:
+                return
+        changed.add(rel_path)
+
+    def close(self):
+        os.close(self.fd)
+
+
+def make_watcher(vault_root, interval=1.0):
+    """inotify on Linux, falling back to polling elsewhere or if inotify fails."""
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(vault_root)
+        except (OSError, AttributeError) as e:
+            print(f"Warning: inotify unavailable ({e}), polling every {interval}s")
+    return PollingWatcher(vault_root, interval)
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+import os
+import hashlib
+import tempfile
+import contextlib
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, writes are still atomic
+    fcntl = None
+from vault_index import index_dir
+
+# Mode for newly created notes (mkstemp creates 0600): 0666 minus the umask
+_umask = os.umask(0)
+os.umask(_umask)
+NEW_FILE_MODE = 0o666 & ~_umask
+# Paths hash into this many lock files, so the lock folder stays small
+LOCK_BUCKETS = 256
+
+
+class ConflictError(Exception):
+    """A write precondition (expected mtime or content hash) did not hold."""
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_state(path):
+    """{"mtime_ns", "size", "sha256"} of a file, or None if it does not exist."""
+    try:
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": content_hash(data)}
+
+
+def check_preconditions(path, if_mtime=None, if_hash=None, data=None):
+    """Raise ConflictError unless the file still has the expected mtime/hash.
+
+    `if_mtime` is the st_mtime_ns reported by an earlier read or write;
+    `data` may pass the already-read content to avoid reading it again.
+    """
+    if if_mtime is None and if_hash is None:
+        return
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        raise ConflictError(f"{os.path.basename(path)} no longer exists") from None
+    if if_mtime is not None and st.st_mtime_ns != int(if_mtime):
+        raise ConflictError(f"{os.path.basename(path)} was modified (mtime_ns {st.st_mtime_ns}, expected {if_mtime})")
+    if if_hash is not None:
+        if data is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+        actual = content_hash(data)
+        if actual != if_hash.lower():
+            raise ConflictError(f"{os.path.basename(path)} was modified (sha256 {actual[:12]}..., expected {if_hash[:12]}...)")
+
+
+def _lock_bucket(rel_path):
+    digest = hashlib.sha1(rel_path.replace(os.sep, '/').encode('utf-8')).digest()
+    return int.from_bytes(digest[:4], 'big') % LOCK_BUCKETS
+
+
+@contextlib.contextmanager
+def _bucket_locks(vault_root, buckets):
+    if fcntl is None:
+        yield
+        return
+    lock_dir = os.path.join(index_dir(vault_root), "locks")
+    os.makedirs(lock_dir, exist_ok=True)
+    with contextlib.ExitStack() as stack:
+        for bucket in sorted(set(buckets)):
+            lock_file = stack.enter_context(open(os.path.join(lock_dir, f"{bucket:02x}.lock"), 'a'))
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            stack.callback(fcntl.flock, lock_file.fileno(), fcntl.LOCK_UN)
+        yield
+
+
+def path_lock(vault_root, rel_path):
+    """Exclusive advisory lock on one vault path, shared by every writer.
+
+    The lock lives on a file under the cache directory rather than the note
+    itself, because atomic writes replace the note's inode. Paths share a
+    fixed set of LOCK_BUCKETS lock files (unrelated paths may wait for each
+    other, briefly), so the folder does not grow with every path written.
+    Not reentrant: a process must not lock a second path while holding one
+    (use path_locks).
+    """
+    return _bucket_locks(vault_root, [_lock_bucket(rel_path)])
+
+
+def path_locks(vault_root, rel_paths):
+    """path_lock on many paths at once; the lock files are taken in sorted
+    order so that concurrent batches cannot deadlock."""
+    return _bucket_locks(vault_root, map(_lock_bucket, rel_paths))
+
+
+def resolve_target(path, root=None):
+    """The file a write to `path` lands in, with symlinks followed.
+
+    Writing there keeps a symlinked note a symlink (the rename of an atomic
+    write would otherwise replace the link with a regular file). With
+    `root`, raises ValueError if that file lies outside it.
+    """
+    real = os.path.realpath(path)
+    if root is not None:
+        real_root = os.path.realpath(root)
+        if os.path.commonpath([real, real_root]) != real_root:
+            raise ValueError(f"Security Error: '{path}' links outside '{root}'")
+    return real
+
+
+def fsync_dir(path):
+    """Flush a directory entry change (rename, create) to disk."""
+    if os.name != 'posix':
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, data, sync_dir=True, root=None):
+    """Replace `path` with `data` so readers see the old or the new file, never a mix.
+
+    The bytes go to a hidden temp file in the same folder, are fsynced and
+    renamed over the target (keeping its permissions); if `path` is a
+    symlink, the file it points to is replaced (see resolve_target for
+    `root`). With sync_dir=False the caller fsyncs the folder itself, e.g.
+    once for a batch. Returns the path written.
+    """
+    path = resolve_target(path, root)
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=folder)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+        except FileNotFoundError:
+            os.chmod(tmp_path, NEW_FILE_MODE)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+    if sync_dir:
+        fsync_dir(folder)
+    return path
+
+
+def _copy_range(src_fd, dst_fd, offset, count):
+    """Copy `count` bytes at `offset` of src to dst's position, in the kernel when possible."""
+    copy_file_range = getattr(os, 'copy_file_range', None)
+    while count > 0:
+        if copy_file_range is not None:
+            try:
+                copied = copy_file_range(src_fd, dst_fd, count, offset)
+            except OSError:  # e.g. unsupported by the file system
+                copy_file_range = None
+                continue
+        else:
+            os.lseek(src_fd, offset, os.SEEK_SET)
+            chunk = os.read(src_fd, min(count, 1 << 20))
+            copied = len(chunk)
+            view = memoryview(chunk)
+            while view:
+                view = view[os.write(dst_fd, view):]
+        if not copied:
+            break
+        offset += copied
+        count -= copied
+
+
+def atomic_splice(path, start, end, data, sync_dir=True, root=None):
+    """Atomically replace bytes [start, end) of `path` with `data`.
+
+    Like atomic_write, but the unchanged head and tail are copied file to
+    file (copy_file_range where available) instead of passing through
+    Python, so the cost is dominated by the size of `data`.
+    """
+    path = resolve_target(path, root)
+    folder = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=folder)
+    try:
+        src_fd = os.open(path, os.O_RDONLY)
+        try:
+            size = os.fstat(src_fd).st_size
+            _copy_range(src_fd, fd, 0, start)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            _copy_range(src_fd, fd, end, size - end)
+            mode = os.fstat(src_fd).st_mode & 0o7777
+        finally:
+            os.close(src_fd)
+        os.fsync(fd)
+        os.close(fd)
+        fd = None
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if fd is not None:
+            os.close(fd)
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+        raise
+    if sync_dir:
+        fsync_dir(folder)
+    return path
+
+
+def append_file(path, data, root=None):
+    """Append and fsync in place; the caller holds the path lock."""
+    path = resolve_target(path, root)
+    created = not os.path.exists(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'ab') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    if created:
+        fsync_dir(os.path.dirname(path))
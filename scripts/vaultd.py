@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+import subprocess
+import socketserver
+
+import md_tokens
+import vaultd_client
+from audit_vault import VaultAuditor
+from list_agents import agents_payload
+from obsidian_fs import list_entries, ranked_search, secure_path
+from search_index import SearchIndex
+from vault_graph import VaultGraph
+from vault_index import VaultIndex, index_dir
+from vault_watch import make_watcher
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+METHOD_NOT_FOUND = -32601
+SERVER_ERROR = -32000
+
+
+class VaultService:
+    """Vault state kept in memory between requests, and the RPC methods on it.
+
+    `refresh` rebuilds the link graph from the incremental link index and
+    brings the search index up to date; only changed notes are re-read.
+    `apply_changes` folds watcher events into that state without a rescan,
+    and `sync` applies the events the watcher holds before each query, so
+    a query sees a write that returned just before it. Request handlers,
+    the watcher loop and refreshes share `lock`.
+    """
+
+    def __init__(self, vault_root, workers=1, watcher=None):
+        self.vault_root = os.path.abspath(vault_root)
+        self.workers = workers
+        self.watcher = watcher
+        self.lock = threading.RLock()
+        self.link_index = VaultIndex(self.vault_root)
+        self.search_index = SearchIndex(self.vault_root)
+        self.auditor = None
+        self.graph = None  # VaultGraph kept for analyses until the vault changes
+        self.agents = None
+        self.refreshed_at = None
+        self.stopping = False
+        self.refresh()
+
+    def refresh(self):
+        # Under the lock throughout: the scan uses link_index, which apply_changes also writes
+        with self.lock:
+            auditor = VaultAuditor(self.vault_root, index=self.link_index)
+            auditor.scan_vault(workers=self.workers, quiet=True)
+            auditor.verify_links()
+            auditor.identify_orphans()
+            agents = agents_payload(self.vault_root)
+            self.search_index.update()
+            self.auditor = auditor
+            self.graph = None
+            self.agents = agents
+            self.refreshed_at = time.time()
+
+    def apply_changes(self, paths):
+        agents = agents_payload(self.vault_root)
+        with self.lock:
+            changes = self.auditor.apply_changes(paths) if paths else {}
+            if changes:
+                self.graph = None
+                self.search_index.update_paths(
+                    changes["created"] + changes["modified"] + changes["deleted"])
+            self.agents = agents
+            self.refreshed_at = time.time()
+
+    def sync(self):
+        """Apply the changes the watcher has seen but not delivered yet."""
+        if self.watcher is None:
+            return
+        with self.lock:
+            try:
+                paths = self.watcher.poll()
+                if paths:
+                    self.apply_changes(paths)
+            except Exception as e:
+                print(f"Applying changes failed ({e}), rescanning")
+                self.refresh()
+
+    def close(self):
+        with self.lock:
+            self.link_index.close()
+            self.search_index.close()
+
+    def handle_request(self, line):
+        """Execute one JSON-RPC request line and return the response object."""
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return {"jsonrpc": "2.0", "id": None,
+                    "error": {"code": PARSE_ERROR, "message": f"Invalid JSON: {e}"}}
+        request_id = request.get("id")
+        handler = getattr(self, "rpc_" + str(request.get("method")), None)
+        if handler is None:
+            return {"jsonrpc": "2.0", "id": request_id,
+                    "error": {"code": METHOD_NOT_FOUND,
+                              "message": f"Unknown method: {request.get('method')}"}}
+        try:
+            result = handler(**(request.get("params") or {}))
+        except Exception as e:
+            return {"jsonrpc": "2.0", "id": request_id,
+                    "error": {"code": SERVER_ERROR, "message": str(e)}}
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    # RPC methods
+
+    def rpc_ping(self):
+        with self.lock:
+            self.sync()
+            return {"vault": self.vault_root, "pid": os.getpid(),
+                    "files": len(self.auditor.all_files), "refreshed_at": self.refreshed_at}
+
+    def rpc_refresh(self):
+        """Full rescan, e.g. after changes the watcher cannot see (network mounts)."""
+        self.refresh()
+        return self.rpc_ping()
+
+    def rpc_read(self, file):
+        full_path = secure_path(self.vault_root, file)
+        if not os.path.exists(full_path):
+            raise FileNotFoundError(f"File not found: {file}")
+        with open(full_path, 'r', encoding='utf-8') as f:
+            return {"content": f.read()}
+
+    def rpc_list(self, path=".", **options):
+        return list_entries(self.vault_root, path, **options)
+
+    def rpc_search(self, query, limit=20):
+        with self.lock:
+            self.sync()
+            return {"results": ranked_search(self.search_index, query, limit)}
+
+    def rpc_resolve(self, link, source=None):
+        with self.lock:
+            self.sync()
+            return {"path": self.auditor.resolver.resolve(link, source)}
+
+    def rpc_backlinks(self, file):
+        with self.lock:
+            self.sync()
+            return {"backlinks": sorted(set(self.auditor.incoming.get(file, ())))}
+
+    def rpc_graph(self, command, file=None):
+        """Native backlinks/links/orphans/unresolved/tags queries (see vault_graph)."""
+        with self.lock:
+            self.sync()
+            return VaultGraph(auditor=self.auditor).query(command, file)
+
+    def rpc_analyze(self, command, **params):
+        """Components/PageRank/HITS/neighbors/path over the link graph (see vault_graph)."""
+        with self.lock:
+            self.sync()
+            if self.graph is None:
+                self.graph = VaultGraph(auditor=self.auditor)
+            return self.graph.analyze(command, **params)
+
+    def rpc_orphans(self):
+        with self.lock:
+            self.sync()
+            return {"orphans": sorted(self.auditor.orphans)}
+
+    def rpc_audit(self, output, format="markdown", max_findings=None):
+        with self.lock:
+            self.sync()
+            auditor = self.auditor
+            auditor.write_report(format, output, max_findings)
+            return {"output": output, "files": len(auditor.all_files),
+                    "broken_sources": len(auditor.broken_links),
+                    "broken_anchor_sources": len(auditor.broken_anchors),
+                    "orphans": len(auditor.orphans), "empty_files": len(auditor.empty_files)}
+
+    def rpc_agents(self):
+        with self.lock:
+            self.sync()
+            return self.agents
+
+    def rpc_stop(self):
+        self.stopping = True
+        return {"stopping": True}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            response = self.server.service.handle_request(line)
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b"\n")
+            self.wfile.flush()
+            if self.server.service.stopping:
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(vault_root, interval=2.0, workers=1):
+    try:
+        path = vaultd_client.socket_path(vault_root, create=True)
+    except vaultd_client.DaemonUnavailable as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if vaultd_client.is_running(vault_root):
+        print(f"Error: vaultd already running for {vault_root}")
+        sys.exit(1)
+    if os.path.lexists(path):
+        os.unlink(path)  # stale socket left by a crashed daemon
+
+    print(f"Loading vault: {os.path.abspath(vault_root)}")
+    md_tokens.enable_cache()
+    # Watching starts before the first scan, so no change made during it is missed
+    watcher = make_watcher(vault_root, interval)
+    service = VaultService(vault_root, workers=workers, watcher=watcher)
+    old_umask = os.umask(0o077)
+    try:
+        server = _Server(path, _Handler)
+    finally:
+        os.umask(old_umask)
+    server.service = service
+
+    stop = threading.Event()
+
+    def watch_loop():
+        while not stop.is_set():
+            # Waiting consumes no events; they are taken (here or by a query) under the lock
+            if watcher.ready(timeout=interval):
+                service.sync()
+
+    threading.Thread(target=watch_loop, daemon=True).start()
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    print(f"vaultd serving {len(service.auditor.all_files)} files on {path}")
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        watcher.close()
+        server.server_close()
+        service.close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def start(vault_root, interval=2.0, workers=1, wait=60):
+    """Launch `serve` in a detached background process and wait until it answers."""
+    if vaultd_client.is_running(vault_root):
+        print(f"vaultd already running for {vault_root}")
+        return
+    log_path = os.path.join(index_dir(vault_root), "vaultd.log")
+    with open(log_path, 'a') as log:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--vault", vault_root, "serve",
+             "--interval", str(interval), "--workers", str(workers)],
+            stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    deadline = time.time() + wait
+    while time.time() < deadline:
+        if vaultd_client.is_running(vault_root):
+            print(f"vaultd started for {vault_root} (log: {log_path})")
+            return
+        time.sleep(0.1)
+    print(f"Error: vaultd did not come up within {wait}s, see {log_path}")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Long-lived vault daemon serving the scripts over a Unix socket")
+    parser.add_argument("--vault", required=True, help="Path to the Obsidian vault root")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Run in the foreground")
+    start_parser = subparsers.add_parser("start", help="Run in the background")
+    for p in (serve_parser, start_parser):
+        p.add_argument("--interval", type=float, default=2.0, help="Polling interval when inotify is unavailable (default: 2)")
+        p.add_argument("--workers", type=int, default=1, help="Worker processes for re-parsing notes")
+    subparsers.add_parser("stop", help="Stop the running daemon")
+    subparsers.add_parser("status", help="Show whether a daemon is serving the vault")
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.vault, args.interval, args.workers)
+    elif args.command == "start":
+        start(args.vault, args.interval, args.workers)
+    elif args.command == "stop":
+        try:
+            vaultd_client.call(args.vault, "stop")
+            print("vaultd stopped")
+        except vaultd_client.DaemonUnavailable:
+            print("vaultd is not running")
+        except vaultd_client.DaemonError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+    elif args.command == "status":
+        try:
+            info = vaultd_client.call(args.vault, "ping")
+            print(json.dumps(info, indent=2))
+        except vaultd_client.DaemonUnavailable:
+            print("vaultd is not running")
+            sys.exit(1)
+        except vaultd_client.DaemonError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+import os
+import json
+import stat
+import socket
+import hashlib
+import tempfile
+
+import perf_trace
+
+# Set to any non-empty value to make every CLI ignore a running daemon
+DISABLE_ENV = "VAULTD_DISABLE"
+CONNECT_TIMEOUT = 0.5
+
+
+class DaemonUnavailable(Exception):
+    """No daemon is serving this vault; the caller should run directly."""
+
+
+class DaemonError(Exception):
+    """The daemon received the request but failed to execute it."""
+
+
+class DaemonTimeout(DaemonError):
+    """The daemon took the request but did not answer in time; it may still be working on it."""
+
+
+def _uid():
+    return os.getuid() if hasattr(os, 'getuid') else 0
+
+
+def _check_private(path, kind):
+    """Raise DaemonUnavailable unless `path` is a `kind` (stat.S_ISDIR/S_ISSOCK) owned by this user."""
+    st = os.lstat(path)
+    if not kind(st.st_mode) or st.st_uid != _uid() or (kind is stat.S_ISDIR and st.st_mode & 0o077):
+        raise DaemonUnavailable(f"Refusing {path}: not private to this user")
+
+
+def socket_dir(create=False):
+    """Per-user directory of the daemon sockets (mode 0700).
+
+    $XDG_RUNTIME_DIR/vaultd when set, else vaultd-<uid> in the temp dir;
+    not in the vault because socket paths are limited to ~100 bytes and
+    vault paths often are not. Raises DaemonUnavailable if the directory
+    is missing (and not created) or another user could reach into it.
+    """
+    runtime = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime and os.path.isabs(runtime):
+        path = os.path.join(runtime, "vaultd")
+    else:
+        path = os.path.join(tempfile.gettempdir(), f"vaultd-{_uid()}")
+    try:
+        if create and not os.path.lexists(path):
+            os.mkdir(path, 0o700)
+        _check_private(path, stat.S_ISDIR)
+    except FileNotFoundError as e:
+        raise DaemonUnavailable() from e
+    except OSError as e:
+        raise DaemonUnavailable(f"Cannot use {path}: {e}") from e
+    return path
+
+
+def socket_path(vault_root, create=False):
+    """Unix socket of the daemon serving `vault_root` (see socket_dir)."""
+    vault = os.path.realpath(vault_root)
+    digest = hashlib.sha1(vault.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(socket_dir(create), f"{digest}.sock")
+
+
+def call(vault_root, method, timeout=60, **params):
+    """Send one JSON-RPC request to the vault's daemon and return its result.
+
+    Raises DaemonUnavailable if no daemon of this user is listening (the
+    request was not sent, so running locally instead is safe), DaemonError
+    if the daemon reported an error and DaemonTimeout if it got the
+    request but did not answer within `timeout` seconds.
+    """
+    if os.environ.get(DISABLE_ENV) or not hasattr(socket, 'AF_UNIX'):
+        raise DaemonUnavailable()
+    path = socket_path(vault_root)
+    try:
+        _check_private(path, stat.S_ISSOCK)
+    except OSError as e:
+        raise DaemonUnavailable() from e
+
+    request = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+    sent = False
+    try:
+        with perf_trace.span("vaultd", method=method), socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(path)
+            sock.settimeout(timeout)
+            sent = True
+            sock.sendall(json.dumps(request, ensure_ascii=False).encode('utf-8') + b"\n")
+            with sock.makefile('rb') as f:
+                line = f.readline()
+    except socket.timeout as e:
+        if sent:
+            raise DaemonTimeout(f"vaultd did not answer '{method}' within {timeout}s and may still be "
+                                "working on it; retry later or stop it") from e
+        raise DaemonUnavailable() from e
+    except OSError as e:
+        raise DaemonUnavailable() from e
+    if not line:
+        raise DaemonUnavailable()
+
+    response = json.loads(line)
+    if "error" in response:
+        raise DaemonError(response["error"]["message"])
+    return response["result"]
+
+
+def is_running(vault_root):
+    try:
+        call(vault_root, "ping")
+        return True
+    except (DaemonUnavailable, DaemonError):
+        return False
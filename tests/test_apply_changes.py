@@ -0,0 +1,89 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from audit_vault import VaultAuditor  # noqa: E402
+
+
+def audit(vault):
+    auditor = VaultAuditor(vault, use_index=False)
+    auditor.scan_vault(quiet=True)
+    auditor.verify_links()
+    auditor.identify_orphans()
+    return auditor
+
+
+def state(auditor):
+    return {
+        "files": sorted(auditor.all_files),
+        "links": {s: sorted(t) for s, t in auditor.all_links.items()},
+        "broken": {s: sorted(t) for s, t in auditor.broken_links.items() if t},
+        "incoming": {t: sorted(s) for t, s in auditor.incoming.items()},
+        "orphans": sorted(auditor.orphans),
+        "empty": sorted(auditor.empty_files),
+        "tags": auditor.tags,
+        "broken_anchors": {s: sorted(a) for s, a in auditor.broken_anchors.items()},
+    }
+
+
+class ApplyChangesTest(unittest.TestCase):
+    """apply_changes must leave the same results as auditing the changed vault from scratch."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.vault = self._tmp.name
+        self.write("index.md", "[[alpha]] [[beta#Part]] [[gone]] #home\n")
+        self.write("a/alpha.md", "# Part\n[[beta]] [[index]]\n")
+        self.write("b/beta.md", "# Part\nno links\n")
+        self.write("b/lonely.md", "nobody links here #solo\n")
+        self.auditor = audit(self.vault)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, path, text):
+        full = os.path.join(self.vault, path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def assertMatchesRescan(self, paths):
+        self.auditor.apply_changes(paths)
+        self.assertEqual(state(self.auditor), state(audit(self.vault)))
+
+    def test_create(self):
+        self.write("gone.md", "now it exists [[lonely]]\n")
+        self.assertMatchesRescan({"gone.md"})
+
+    def test_modify(self):
+        self.write("a/alpha.md", "# Other\n[[lonely]] #tag\n")
+        self.write("b/beta.md", "")
+        self.assertMatchesRescan({"a/alpha.md", "b/beta.md"})
+
+    def test_delete(self):
+        os.remove(os.path.join(self.vault, "b/beta.md"))
+        self.assertMatchesRescan({"b/beta.md"})
+
+    def test_rename(self):
+        os.replace(os.path.join(self.vault, "a/alpha.md"), os.path.join(self.vault, "b/gone.md"))
+        self.assertMatchesRescan({"a/alpha.md", "b/gone.md"})
+
+    def test_folder_rename(self):
+        # A directory path stands for everything below it
+        shutil.move(os.path.join(self.vault, "b"), os.path.join(self.vault, "c"))
+        self.assertMatchesRescan({"b", "c"})
+
+    def test_several_batches(self):
+        self.write("gone.md", "[[beta]]\n")
+        self.assertMatchesRescan({"gone.md"})
+        os.remove(os.path.join(self.vault, "index.md"))
+        self.write("a/alpha.md", "[[gone]]\n")
+        self.assertMatchesRescan({"index.md", "a/alpha.md"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from audit_vault import VaultAuditor  # noqa: E402
+
+
+class DuplicateOriginalTest(unittest.TestCase):
+    def test_referenced_copy_is_kept_as_original(self):
+        with tempfile.TemporaryDirectory() as vault:
+            os.makedirs(os.path.join(vault, "附件"))
+            for name in ("dup.png", "pic.png"):
+                with open(os.path.join(vault, "附件", name), "wb") as f:
+                    f.write(b"\x89PNG same bytes")
+            with open(os.path.join(vault, "index.md"), "w", encoding="utf-8") as f:
+                f.write("![[pic.png]]\n")
+
+            auditor = VaultAuditor(vault, use_index=False)
+            auditor.scan_vault(quiet=True)
+            auditor.verify_links()
+            auditor.audit_attachments(use_cache=False)
+
+            # dup.png sorts first, but only pic.png is embedded
+            self.assertEqual(auditor.duplicates, {"附件/dup.png": "附件/pic.png"})
+            self.assertEqual(auditor.unreferenced, {"附件/dup.png"})
+
+
+if __name__ == "__main__":
+    unittest.main()
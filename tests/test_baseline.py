@@ -0,0 +1,69 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from audit_vault import VaultAuditor, load_baseline  # noqa: E402
+
+
+class BaselineTest(unittest.TestCase):
+    """A diff-mode run reuses the baseline's resolutions; its results must match a fresh audit."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.vault = os.path.join(self._tmp.name, "vault")
+        self.snapshot = os.path.join(self._tmp.name, "snapshot.json")
+        self.write("index.md", "[[plan]] [[notes/idea#Goal]] [[missing]]\n")
+        self.write("work/plan.md", "# Steps\n[[idea]]\n")
+        self.write("notes/idea.md", "# Goal\n[[plan#Steps]] [[plan#Nope]]\n")
+        self.write("notes/stale.md", "[[index]]\n")
+        self.write("notes/alone.md", "nobody links here\n")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, path, text):
+        full = os.path.join(self.vault, path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def audit(self, baseline=None, snapshot=False):
+        auditor = VaultAuditor(self.vault, use_index=False)
+        auditor.scan_vault(quiet=True)
+        if snapshot:
+            auditor.resolved_out = {}
+        auditor.verify_links(baseline)
+        auditor.identify_orphans()
+        if snapshot:
+            auditor.write_snapshot(self.snapshot)
+        return auditor
+
+    def test_diff_run_matches_a_fresh_audit(self):
+        before = {(r["type"], r["path"], r.get("target")) for r in self.audit(snapshot=True).findings()}
+        self.write("missing.md", "now it exists\n")  # resolves a broken link in an unchanged note
+        self.write("plan.md", "a second plan, closer to the root\n")  # changes where [[plan]] points
+        self.write("notes/idea.md", "# Goal\n[[plan#Steps]]\n")
+        os.remove(os.path.join(self.vault, "notes/stale.md"))
+        os.replace(os.path.join(self.vault, "notes/alone.md"), os.path.join(self.vault, "work/alone.md"))
+
+        baseline = load_baseline(self.snapshot)
+        diffed, fresh = self.audit(baseline, snapshot=True), self.audit()
+        self.assertGreater(diffed.baseline_stats["carried"], 0)
+        self.assertEqual(list(diffed.findings()), list(fresh.findings()))
+        self.assertEqual({t: sorted(s) for t, s in diffed.incoming.items()},
+                         {t: sorted(s) for t, s in fresh.incoming.items()})
+
+        after = {(r["type"], r["path"], r.get("target")) for r in fresh.findings()}
+        new, resolved = diffed.diff_findings(baseline)
+        self.assertEqual({(r["type"], r["path"], r.get("target")) for r in new}, after - before)
+        self.assertEqual({(r["type"], r["path"], r.get("target")) for r in resolved}, before - after)
+
+        # The snapshot written by the diff run is itself a valid baseline
+        self.assertEqual(list(self.audit(load_baseline(self.snapshot)).findings()), list(fresh.findings()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from obsidian_fs import move_paths  # noqa: E402
+
+
+class MoveRewriteTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.vault = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, path, text):
+        full = os.path.join(self.vault, path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(os.path.join(self.vault, path), encoding="utf-8") as f:
+            return f.read()
+
+    def move(self, sources, dest):
+        with redirect_stdout(io.StringIO()):
+            move_paths(self.vault, sources, dest)
+
+    def test_bare_name_follows_a_rename(self):
+        self.write("inbox/draft.md", "text\n")
+        self.write("index.md", "See [[draft]].\n")
+        self.move(["inbox/draft.md"], "inbox/idea.md")
+        self.assertEqual(self.read("index.md"), "See [[idea]].\n")
+
+    def test_relative_links_stay_relative(self):
+        self.write("inbox/draft.md", "text\n")
+        self.write("notes/ref.md", "[draft](../inbox/draft.md) and [[../inbox/draft]]\n")
+        self.move(["inbox/draft.md"], "archive/")
+        self.assertEqual(self.read("notes/ref.md"), "[draft](../archive/draft.md) and [[../archive/draft]]\n")
+
+    def test_anchor_and_alias_are_kept(self):
+        self.write("inbox/draft.md", "# Head\ntext\n")
+        self.write("index.md", "[[draft#Head|the draft]] and [d](inbox/draft.md#Head)\n")
+        self.move(["inbox/draft.md"], "inbox/idea.md")
+        self.assertEqual(self.read("index.md"), "[[idea#Head|the draft]] and [d](inbox/idea.md#Head)\n")
+
+    def test_name_collision_keeps_both_targets(self):
+        self.write("inbox/draft.md", "text\n")
+        self.write("work/plan.md", "text\n")
+        self.write("index.md", "[[draft]] and [[plan]]\n")
+        # After the move two notes are named plan; both links must still reach their own
+        self.move(["inbox/draft.md"], "archive/plan.md")
+        self.assertEqual(self.read("index.md"), "[[plan]] and [[work/plan]]\n")
+
+    def test_links_inside_a_moved_note_are_fixed(self):
+        self.write("inbox/draft.md", "[[./sibling]]\n")
+        self.write("inbox/sibling.md", "text\n")
+        self.move(["inbox/draft.md"], "archive/draft.md")
+        self.assertEqual(self.read("archive/draft.md"), "[[../inbox/sibling]]\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from note_sections import SectionIndex, section_table  # noqa: E402
+from obsidian_fs import patch_section, read_file  # noqa: E402
+
+NOTE = "# 笔记\nintro\n## Tasks\n- one\n### Done\n- zero\n## Log\nday 1\n"
+
+
+class SectionRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.vault = self._tmp.name
+        self.path = os.path.join(self.vault, "note.md")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(NOTE)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def read(self, section):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            read_file(self.vault, "note.md", section=section)
+        return out.getvalue()
+
+    def patch(self, section, content):
+        with redirect_stdout(io.StringIO()):
+            patch_section(self.vault, "note.md", section, content)
+
+    def cached_table(self):
+        sections = SectionIndex(self.vault)
+        try:
+            return sections.table("note.md", self.path)
+        finally:
+            sections.close()
+
+    def test_read_returns_the_section_with_its_subsections(self):
+        self.assertEqual(self.read("Tasks"), "## Tasks\n- one\n### Done\n- zero\n")
+        self.assertEqual(self.read("笔记#Log"), "## Log\nday 1\n")
+
+    def test_patch_then_read_round_trips(self):
+        self.read("Tasks")  # caches the heading table
+        self.patch("Tasks", "- two\n#### Later\n- three")
+        self.assertEqual(self.read("Tasks"), "## Tasks\n- two\n#### Later\n- three\n")
+        self.assertEqual(self.read("Later"), "#### Later\n- three\n")
+        self.patch("Log", "day 2\n")
+        with open(self.path, encoding="utf-8") as f:
+            data = f.read()
+        self.assertEqual(data, "# 笔记\nintro\n## Tasks\n- two\n#### Later\n- three\n## Log\nday 2\n")
+        # The spliced table stored by the patches matches a fresh parse
+        self.assertEqual(self.cached_table(), section_table(data.encode("utf-8")))
+
+    def test_missing_section_is_an_error(self):
+        with self.assertRaises(ValueError):
+            self.patch("Nope", "x\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from search_index import SearchIndex  # noqa: E402
+
+
+class CjkSearchTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        notes = {"a.md": "中文笔记\n", "b.md": "我学习中文\n", "c.md": "english only 中\n", "d.md": "日本語\n"}
+        for name, text in notes.items():
+            with open(os.path.join(self._tmp.name, name), "w", encoding="utf-8") as f:
+                f.write(text)
+        self.index = SearchIndex(self._tmp.name)
+        self.index.update()
+
+    def tearDown(self):
+        self.index.close()
+        self._tmp.cleanup()
+
+    def paths(self, query):
+        return sorted(path for path, _ in self.index.search(query))
+
+    def test_single_character_matches_anywhere_in_a_run(self):
+        self.assertEqual(self.paths("中"), ["a.md", "b.md", "c.md"])
+        self.assertEqual(self.paths("记"), ["a.md"])  # last character of its run
+        self.assertEqual(self.paths("語"), ["d.md"])
+
+    def test_runs_match_as_bigrams(self):
+        self.assertEqual(self.paths("中文"), ["a.md", "b.md"])
+        self.assertEqual(self.paths("学习中文"), ["b.md"])
+        self.assertEqual(self.paths("文中"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
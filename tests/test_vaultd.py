@@ -0,0 +1,37 @@
+import io
+import os
+import sys
+import json
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+from obsidian_fs import write_file  # noqa: E402
+from vault_watch import PollingWatcher  # noqa: E402
+from vaultd import VaultService  # noqa: E402
+
+
+class WriteThenQueryTest(unittest.TestCase):
+    def test_search_sees_a_note_written_just_before(self):
+        with tempfile.TemporaryDirectory() as vault:
+            with open(os.path.join(vault, "old.md"), "w", encoding="utf-8") as f:
+                f.write("nothing to see [[new]]\n")
+            # The watcher's own loop never runs here: only the query can pick the write up
+            service = VaultService(vault, watcher=PollingWatcher(vault, interval=3600))
+            try:
+                with redirect_stdout(io.StringIO()):
+                    write_file(vault, "new.md", "fresh uniqueword\n")
+                response = service.handle_request(json.dumps(
+                    {"jsonrpc": "2.0", "id": 1, "method": "search", "params": {"query": "uniqueword"}}))
+                self.assertEqual([r["path"] for r in response["result"]["results"]], ["new.md"])
+                response = service.handle_request(json.dumps(
+                    {"jsonrpc": "2.0", "id": 2, "method": "backlinks", "params": {"file": "new.md"}}))
+                self.assertEqual(response["result"]["backlinks"], ["old.md"])
+            finally:
+                service.close()
+
+
+if __name__ == "__main__":
+    unittest.main()